@@ -1 +1,24 @@
-# This file can be left empty or used to initialize the package
\ No newline at end of file
+"""Tree editor for JSON-like Python data, embeddable in Tkinter applications.
+
+The editor modules are imported on first use, so `import dictedit2` stays cheap.
+"""
+__version__ = "1.0"
+
+# Public name -> module that defines it
+_EXPORTS = {
+    "DataEditor": "dictedit2.editor",
+    "DocumentModel": "dictedit2.model",
+}
+
+__all__ = ["__version__", *_EXPORTS]
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
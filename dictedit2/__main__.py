@@ -0,0 +1,3 @@
+from dictedit2.main import main
+
+main()
@@ -0,0 +1,68 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def json_pointer(path):
+    """Render a path tuple as an RFC 6901 JSON pointer, e.g. ("items", 0) -> "/items/0"."""
+    return "".join("/" + str(segment).replace("~", "~0").replace("/", "~1") for segment in path)
+
+
+def unescape_pointer(pointer):
+    """Split an RFC 6901 JSON pointer into its (string) segments."""
+    if not pointer:
+        return []
+    return [segment.replace("~1", "/").replace("~0", "~") for segment in pointer[1:].split("/")]
+
+
+def coalesce(patches):
+    """Merge adjacent patches to the same path and drop the ones that cancel out.
+
+    Only neighbouring patches are merged, so list positions in later patches stay valid.
+    """
+    result = []
+    for patch in patches:
+        previous = result[-1] if result else None
+        if previous is not None and previous["path"] == patch["path"] and "from" not in previous:
+            if previous["op"] in ("replace", "add") and patch["op"] == "replace":
+                result[-1] = dict(previous, value=patch["value"])
+                if previous["op"] == "replace" and previous["old"] == patch["value"]:
+                    result.pop()
+                continue
+            if previous["op"] == "add" and patch["op"] == "remove":
+                result.pop()
+                continue
+        result.append(patch)
+    return result
+
+
+class ChangeNotifier:
+    """Collects patches and delivers them in bursts of at most one call per `window_ms`.
+
+    `callback(patches)` runs on the Tk thread; with `window_ms <= 0` it runs immediately.
+    """
+    def __init__(self, master, callback, window_ms=100):
+        self.master = master
+        self.callback = callback
+        self.window_ms = window_ms
+        self.pending = []
+        self._timer = None
+
+    def push(self, patches):
+        if not patches:
+            return
+        self.pending.extend(patches)
+        if self.window_ms <= 0:
+            self.flush()
+        elif self._timer is None:
+            self._timer = self.master.after(self.window_ms, self.flush)
+
+    def flush(self):
+        if self._timer is not None:
+            self.master.after_cancel(self._timer)
+            self._timer = None
+        patches = coalesce(self.pending)
+        self.pending = []
+        if patches:
+            logger.debug(f"Emitting {len(patches)} change(s)")
+            self.callback(patches)
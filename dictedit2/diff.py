@@ -0,0 +1,263 @@
+import logging
+from bisect import bisect_left
+from difflib import SequenceMatcher
+
+from dictedit2.json_io import snapshot
+from dictedit2.operations import Insert, Remove, SetValue, resolve
+
+logger = logging.getLogger(__name__)
+
+
+# Keys that identify the items of a list of dicts, tried in this order
+ID_KEYS = ("id", "_id", "uuid", "key", "name")
+
+
+class Change:
+    """One difference between two documents: `kind` is "add", "remove" or "replace".
+
+    `path` is where the change applies when all changes of a diff are applied in order.
+    `old_path` and `new_path` locate it in either document on its own; for an add,
+    `old_path` is where the item would go in the old document, and for a remove,
+    `new_path` is where it would go in the new one.
+    """
+    __slots__ = ("kind", "path", "old", "new", "old_path", "new_path")
+
+    def __init__(self, kind, path, old=None, new=None, old_path=None, new_path=None):
+        self.kind = kind
+        self.path = tuple(path)
+        self.old = old
+        self.new = new
+        self.old_path = self.path if old_path is None else tuple(old_path)
+        self.new_path = self.path if new_path is None else tuple(new_path)
+
+    def operation(self):
+        """The model operation that makes this change; container values are copied."""
+        if self.kind == "remove":
+            return Remove(self.path)
+        if self.kind == "add":
+            return Insert(self.path, snapshot(self.new))
+        return SetValue(self.path, snapshot(self.new))
+
+    def operation_on(self, document):
+        """The operation that applies just this change to one side.
+
+        On the "old" document it makes that spot match the new document; on the "new"
+        document it reverts the spot to the old one.
+        """
+        if document == "old":
+            kind, path, value = self.kind, self.old_path, self.new
+        else:
+            kind, path, value = {"add": "remove", "remove": "add"}.get(self.kind, self.kind), self.new_path, self.old
+        if kind == "remove":
+            return Remove(path)
+        if kind == "add":
+            return Insert(path, snapshot(value))
+        return SetValue(path, snapshot(value))
+
+    def __eq__(self, other):
+        return isinstance(other, Change) and all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return f"Change({self.kind!r}, {self.path!r})"
+
+
+def same_value(a, b):
+    """Equality that tells 1, 1.0 and True apart, as JSON does."""
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(same_value(value, b[key]) for key, value in a.items())
+    if isinstance(a, list):
+        return len(a) == len(b) and all(same_value(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+class _Fingerprints:
+    """Structural hashes of values, computed once per container within one diff."""
+    def __init__(self):
+        # id -> (value, hash); holding the value keeps its id from being reused
+        self._cache = {}
+
+    def __call__(self, value):
+        if not isinstance(value, (dict, list)):
+            return hash((value.__class__, value))
+        cached = self._cache.get(id(value))
+        if cached is None:
+            # Scalars are hashed inline: one call per container keeps this fast on wide documents
+            if isinstance(value, dict):
+                members = tuple((key, hash((item.__class__, item)) if not isinstance(item, (dict, list)) else self(item))
+                                for key, item in value.items())
+            else:
+                members = tuple(hash((item.__class__, item)) if not isinstance(item, (dict, list)) else self(item)
+                                for item in value)
+            cached = self._cache[id(value)] = (value, hash((value.__class__, members)))
+        return cached[1]
+
+
+def _unique_ids(items, key):
+    seen = set()
+    for item in items:
+        if not isinstance(item, dict) or key not in item or isinstance(item[key], (dict, list)) or item[key] in seen:
+            return False
+        seen.add(item[key])
+    return True
+
+
+def _id_key(a, b):
+    """A key of ID_KEYS whose scalar value is present and unique in every item of both lists."""
+    if not a or not b or not isinstance(a[0], dict) or not isinstance(b[0], dict):
+        return None
+    for key in ID_KEYS:
+        if _unique_ids(a, key) and _unique_ids(b, key):
+            return key
+    return None
+
+
+def _increasing(pairs):
+    """Longest run of `pairs` (sorted by their second index) whose first index also increases."""
+    tails, tail_firsts = [], []
+    previous = [None] * len(pairs)
+    for position, (i, _) in enumerate(pairs):
+        k = bisect_left(tail_firsts, i)
+        if k:
+            previous[position] = tails[k - 1]
+        if k == len(tails):
+            tails.append(position)
+            tail_firsts.append(i)
+        else:
+            tails[k] = position
+            tail_firsts[k] = i
+    result = []
+    position = tails[-1] if tails else None
+    while position is not None:
+        result.append(pairs[position])
+        position = previous[position]
+    return result[::-1]
+
+
+def _match_items(a, b, fingerprint):
+    """Pairs `(i, j)` of corresponding items of two lists, increasing in both indices.
+
+    Lists of dicts with an ID key (see ID_KEYS) are matched by ID; reordered items become a
+    remove and an add. Other lists are aligned on the structural hashes of their items, and
+    the unaligned stretches are paired by position so edited items diff member by member.
+    """
+    key = _id_key(a, b)
+    if key is not None:
+        positions = {item[key]: i for i, item in enumerate(a)}
+        return _increasing([(positions[item[key]], j) for j, item in enumerate(b) if item[key] in positions])
+
+    pairs = []
+    matcher = SequenceMatcher(None, [fingerprint(item) for item in a], [fingerprint(item) for item in b])
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag in ("equal", "replace"):
+            pairs.extend(zip(range(i1, i2), range(j1, j2)))
+    return pairs
+
+
+def _list_changes(a, b, pairs, at, old_at, new_at):
+    changes = []
+    bounds = [(-1, -1)] + pairs + [(len(a), len(b))]
+    # Gaps from the last one backwards, so positions before each gap are still those of `a`
+    for (pi, pj), (qi, qj) in reversed(list(zip(bounds, bounds[1:]))):
+        for i in range(qi - 1, pi, -1):
+            changes.append(Change("remove", at + (i,), old=a[i], old_path=old_at + (i,),
+                                  new_path=new_at + (pj + i - pi,)))
+        for offset, j in enumerate(range(pj + 1, qj)):
+            changes.append(Change("add", at + (pi + 1 + offset,), new=b[j], old_path=old_at + (pi + 1 + offset,),
+                                  new_path=new_at + (j,)))
+    return changes
+
+
+def diff(old, new, path=(), lists="match"):
+    """Changes that turn `old` into `new` when applied in order.
+
+    Dict members are matched by key. With `lists="match"` list items are matched by ID or
+    by content (see _match_items), otherwise by position, with extra items added or
+    removed at the end. Each container is visited once and list alignment is near-linear
+    in practice, so the cost grows with the size of the documents.
+    """
+    fingerprint = _Fingerprints() if lists == "match" else None
+    changes = []
+    path = tuple(path)
+    # (old value, new value, path when applied in order, path in old, path in new)
+    stack = [(old, new, path, path, path)]
+    while stack:
+        a, b, at, old_at, new_at = stack.pop()
+        if a is b:
+            continue
+        if isinstance(a, dict) and isinstance(b, dict):
+            nested = []
+            for key, value in a.items():
+                if key not in b:
+                    changes.append(Change("remove", at + (key,), old=value, old_path=old_at + (key,),
+                                          new_path=new_at + (key,)))
+                else:
+                    nested.append((value, b[key], at + (key,), old_at + (key,), new_at + (key,)))
+            for key, value in b.items():
+                if key not in a:
+                    changes.append(Change("add", at + (key,), new=value, old_path=old_at + (key,),
+                                          new_path=new_at + (key,)))
+        elif isinstance(a, list) and isinstance(b, list):
+            if fingerprint is not None:
+                pairs = _match_items(a, b, fingerprint)
+            else:
+                pairs = list(zip(range(len(a)), range(len(b))))
+            changes.extend(_list_changes(a, b, pairs, at, old_at, new_at))
+            # Items keep their new position once the list itself has been changed
+            nested = [(a[i], b[j], at + (j,), old_at + (i,), new_at + (j,)) for i, j in pairs]
+        else:
+            if not same_value(a, b):
+                changes.append(Change("replace", at, old=a, new=b, old_path=old_at, new_path=new_at))
+            continue
+        # Reversed so the stack visits children in document order
+        stack.extend(reversed(nested))
+    return changes
+
+
+def merge(base, local, remote):
+    """Three-way merge: the changes from `base` to `remote` that can be applied to `local`.
+
+    Returns `(changes, conflicts)`. A remote change conflicts when `local` changed the same
+    path, an ancestor or a descendant of it to something else; it is then left out and
+    reported. Remote changes that `local` already contains are dropped.
+    """
+    # Matched by position, so the remote changes stay valid when some of them are left out
+    local_paths = set()
+    for change in diff(base, local, lists="position"):
+        local_paths.add(change.path)
+        if change.kind != "replace" and isinstance(change.path[-1], int):
+            # Items were added to or removed from a list, so its positions moved
+            local_paths.add(change.path[:-1])
+    local_ancestors = {path[:depth] for path in local_paths for depth in range(len(path))}
+
+    changes, conflicts = [], []
+    for change in diff(base, remote, lists="position"):
+        path = change.path
+        touched = (path in local_paths or path in local_ancestors
+                   or any(path[:depth] in local_paths for depth in range(len(path))))
+        if not touched:
+            changes.append(change)
+            continue
+        try:
+            current = resolve(local, path)
+        except (KeyError, IndexError, TypeError):
+            if change.kind == "remove":
+                # Removed on both sides
+                continue
+        else:
+            if change.kind != "remove" and same_value(current, change.new):
+                continue
+        conflicts.append(change)
+    return changes, conflicts
+
+
+def apply_changes(model, changes, label="merge", undoable=True):
+    """Apply `changes` to `model` in one transaction; returns the paths to re-render."""
+    paths = []
+    with model.transaction(label, undoable=undoable):
+        for change in changes:
+            operation = change.operation()
+            model.apply(operation, label)
+            paths.append(operation.render_path)
+    return paths
@@ -1,38 +1,276 @@
 import logging
 import tkinter as tk
+from contextlib import contextmanager
 
 
-from renderers.base import CanvasWithScrollbar, TypeConverter, RendererFactory
+from dictedit2.renderers.base import CanvasWithScrollbar, RendererFactory, GUIUtils
+from dictedit2.changes import ChangeNotifier
+from dictedit2.model import DocumentModel
+from dictedit2.operations import common_path
+from dictedit2.profiling import NULL_PROFILER, RenderProfiler
+from dictedit2.render_tree import flatten
 
 logger = logging.getLogger(__name__)
 
 class DataEditor:
-    def __init__(self, master, data, callbacks=None, window_size=(800, 600)):
+    def __init__(self, master, data, callbacks=None, window_size=(800, 600), incremental=True, virtual=False,
+                 expand_depth=1, change_window_ms=100):
         self.master = master
-        self.data = data
+        # All document state and edit logic lives in the display-free model; this class only renders it.
+        # Containers shallower than expand_depth start expanded; explicit toggles are kept per node ID
+        # so they survive re-renders and insertions that shift positional paths
+        self.model = DocumentModel(data, expand_depth)
         self.callbacks = callbacks or {}
+        # Edits are reported as JSON-Patch style deltas, coalesced within change_window_ms
+        self.changes = ChangeNotifier(master, self._emit_changes, change_window_ms)
+        self.model.listeners.append(self.changes.push)
+        self.incremental = incremental
+        self.virtual = virtual
 
-        self.canvas_with_scrollbar = CanvasWithScrollbar(master, *window_size)
-        self.frame = self.canvas_with_scrollbar.frame
+        if virtual:
+            # Flat rows with recycled widgets: widget count stays constant regardless of document size
+            from dictedit2.renderers.virtual_view import VirtualTreeView
+            self.view = VirtualTreeView(master, self, *window_size)
+            self.canvas_with_scrollbar = None
+            self.frame = None
+        else:
+            self.view = None
+            self.canvas_with_scrollbar = CanvasWithScrollbar(master, *window_size)
+            self.frame = self.canvas_with_scrollbar.frame
 
+        # Renderer of every node currently on screen, keyed by its path
+        self._renderers = {}
         self._is_rendering = False
+        # Paths to re-render once the current batch ends; None outside of a batch
+        self._batch_paths = None
+        # Opt-in render instrumentation, see enable_profiling
+        self.profiler = NULL_PROFILER
+        # Validation problems by node ID, shown as row markers; kept by a SchemaValidator
+        self.issues = {}
         self.render()
 
-    def render(self):
+        # Bound on the editor's own canvas, not on master: an embedding window keeps its bindings.
+        # Hosts that want the shortcuts window-wide bind them to handle_shortcut themselves.
+        canvas = self.canvas
+        canvas.bind("<Button-1>", lambda e: canvas.focus_set(), add="+")
+        canvas.bind("<Control-z>", lambda e: self.handle_shortcut(self.undo))
+        canvas.bind("<Control-y>", lambda e: self.handle_shortcut(self.redo))
+
+    def render(self, path=None):
+        """Re-render the whole tree, or only the subtree at `path` in incremental mode."""
+        if self._batch_paths is not None:
+            self._batch_paths.append(() if path is None else tuple(path))
+            return
         if self._is_rendering:
             return
         self._is_rendering = True
 
-        self.clear_widgets()
-        self.render_data()
-        self._is_rendering = False
+        profiler = self.profiler
+        try:
+            with profiler.render(path):
+                with profiler.phase("model"):
+                    if self.model.refresh_filter():
+                        # Edits can add or remove matches anywhere in the document
+                        path = None
+                if self.virtual:
+                    self.render_rows(path)
+                elif path is None or not self.incremental:
+                    self.clear_widgets()
+                    self.render_data()
+                else:
+                    self.render_subtree(path)
+                if profiler.enabled:
+                    # Geometry is otherwise computed lazily when Tk is idle
+                    with profiler.phase("layout"):
+                        self.master.update_idletasks()
+        finally:
+            self._is_rendering = False
+
+    def render_paths(self, paths):
+        """Re-render each of `paths` on its own instead of their common ancestor.
+
+        Meant for many small scattered updates (e.g. a data feed); paths inside another one
+        of `paths` are skipped.
+        """
+        paths = sorted({tuple(path) for path in paths}, key=len)
+        if not paths:
+            return
+        if self.virtual:
+            # Scalar changes only rebind the visible rows, which a single render does for all of them
+            structural = any(isinstance(self.get_data_at_path(path), (dict, list)) for path in paths)
+            self.render(None if structural else paths[0])
+            return
+        rendered = set()
+        for path in paths:
+            if not any(path[:depth] in rendered for depth in range(len(path))):
+                rendered.add(path)
+                self.render(path)
+
+    def enable_profiling(self, cprofile=False):
+        """Start recording render timings; returns the RenderProfiler (kept if already enabled)."""
+        if not self.profiler.enabled:
+            self.profiler = RenderProfiler(lambda: GUIUtils.pool.created + GUIUtils.pool.reused, cprofile=cprofile)
+        return self.profiler
+
+    def disable_profiling(self):
+        self.profiler = NULL_PROFILER
 
     def clear_widgets(self):
-        for widget in self.frame.winfo_children():
-            widget.destroy()
+        # Widgets go back to the pool so the next render reuses them instead of creating new ones
+        self._renderers.clear()
+        GUIUtils.pool.recycle_children(self.frame)
+
+    def render_subtree(self, path):
+        """Replace the widgets of the node at `path` in place, leaving all other widgets alive."""
+        path = requested = tuple(path)
+        # A path can vanish (e.g. a removed list item); fall back to its closest rendered ancestor
+        while path and path not in self._renderers:
+            path = path[:-1]
+        renderer = self._renderers.get(path)
+        if renderer is None or renderer.frame is None or not path:
+            self.clear_widgets()
+            self.render_data()
+            return
+        if len(path) < len(requested) and renderer.refresh_descendant(requested):
+            return
+
+        grid_info = renderer.frame.grid_info()
+        self._forget_renderers(path)
+        GUIUtils.recycle(renderer.frame)
+
+        new_renderer = self.render_item(self.get_data_at_path(path), renderer.parent, path)
+        if grid_info and new_renderer.frame is not None:
+            new_renderer.frame.grid(row=grid_info["row"], column=grid_info["column"])
+
+    def render_rows(self, path=None):
+        """Update the virtual view; a changed scalar only rebinds the visible rows."""
+        if path is not None:
+            try:
+                structural = isinstance(self.get_data_at_path(path), (dict, list))
+            except (KeyError, IndexError, TypeError):
+                structural = True
+            if not structural:
+                with self.profiler.phase("build"):
+                    self.view.refresh(rebind=True)
+                return
+
+        with self.profiler.phase("model"):
+            rows = flatten(self.model.render_tree())
+        with self.profiler.phase("build"):
+            self.view.set_rows(rows)
+
+    def _forget_renderers(self, path):
+        depth = len(path)
+        for rendered_path in [p for p in self._renderers if p[:depth] == path]:
+            del self._renderers[rendered_path]
 
     def render_data(self):
         self.render_item(self.data, self.frame, path=())
+
+    @property
+    def data(self):
+        return self.model.data
+
+    @data.setter
+    def data(self, data):
+        # Assigning a new document (e.g. on import) rebuilds the node index
+        self.model.load(data)
+
+    @property
+    def index(self):
+        return self.model.index
+
+    @property
+    def history(self):
+        return self.model.history
+
+    def load(self, data, index=None, expanded=None):
+        """Replace the document and render it; `index` may be a NodeIndex built off the UI thread."""
+        self.model.load(data, index, expanded)
+        self.render()
+
+    def path_of(self, node_id):
+        return self.model.path_of(node_id)
+
+    def get_node_value(self, node_id):
+        return self.model.value_of(node_id)
+
+    def is_expanded(self, path):
+        return self.model.is_expanded(path)
+
+    def set_expanded(self, path, expanded):
+        if self.model.set_expanded(tuple(path), expanded):
+            self.render(tuple(path))
+
+    def toggle_expanded(self, path):
+        self.set_expanded(path, not self.is_expanded(path))
+
+    def is_visible(self, path):
+        return self.model.is_visible(path)
+
+    @property
+    def canvas(self):
+        return self.view.canvas if self.virtual else self.canvas_with_scrollbar.canvas
+
+    def search(self, query, regex=False, case_sensitive=False, keys=True, values=True):
+        """Paths whose key or scalar value matches `query`; see SearchIndex.search."""
+        return self.model.search(query, regex, case_sensitive, keys, values)
+
+    def select(self, query):
+        """Paths matching a JSONPath-like `query` such as "items[*].details.status"; see compile_query."""
+        return self.model.select(query)
+
+    def set_all(self, query, value):
+        """Set every match of `query` to `value`; see DocumentModel.set_all."""
+        return self._apply_all(self.model.set_all, "set all", query, value)
+
+    def delete_all(self, query):
+        return self._apply_all(self.model.delete_all, "delete all", query)
+
+    def rename_all(self, query, new_key):
+        """Rename every matching dict key; see DocumentModel.rename_all."""
+        return self._apply_all(self.model.rename_all, "rename all", query, new_key)
+
+    def transform_all(self, query, func):
+        """Replace every match of `query` by `func(value)`; see DocumentModel.transform_all."""
+        return self._apply_all(self.model.transform_all, "transform all", query, func)
+
+    def _apply_all(self, edit, label, *args):
+        """Run a bulk edit as one batch: one undo step, one render and one change notification.
+
+        Errors propagate with every edit of the batch rolled back.
+        """
+        with self.batch(label):
+            operations = edit(*args, label=label)
+            for operation in operations:
+                self._render_applied(operation)
+        logger.debug(f"{label}: {len(operations)} edit(s)")
+        return operations
+
+    def set_filter(self, results):
+        """Render only the matches in `results` and their ancestors; None renders everything."""
+        self.model.set_filter(results)
+        self.render()
+
+    def jump_to(self, path):
+        """Expand the ancestors of `path` and scroll its node into view."""
+        path = tuple(path)
+        changed = [path[:depth] for depth in range(len(path)) if self.model.set_expanded(path[:depth], True)]
+        if changed:
+            self.render(changed[0])
+        if self.virtual:
+            self.view.scroll_to(path)
+        else:
+            # Nodes drawn by their container (e.g. table cells) have no renderer of their own
+            while path and path not in self._renderers:
+                path = path[:-1]
+            renderer = self._renderers.get(path)
+            if renderer is not None and renderer.frame is not None:
+                self.canvas_with_scrollbar.scroll_to(renderer.frame)
+
+    def _emit_changes(self, patches):
+        """Deliver a coalesced burst of patches; only called when the model actually changed."""
+        self.notify_callback("on_patch", patches)
         self.notify_callback("on_data_changed", self.data)
 
     def notify_callback(self, event, *args):
@@ -40,22 +278,113 @@ class DataEditor:
             self.callbacks[event](*args)
 
     def render_item(self, item, parent, path):
-        renderer = RendererFactory.get_renderer(self, item, parent, path)
-        renderer.render(item)
+        profiler = self.profiler
+        with profiler.node(path):
+            if self.model.backend is not None and self.is_expanded(path):
+                # Containers of an out-of-core document are parsed when first shown expanded
+                with profiler.phase("model"):
+                    item = self.model.materialize(path)
+            with profiler.phase("dispatch"):
+                renderer = RendererFactory.get_renderer(self, item, parent, path)
+                renderer.node_id = self.index.id_at(path)
+            profiler.label(renderer)
+            self._renderers[path] = renderer
+            renderer.render(item)
+            if self.issues:
+                self._show_issues(renderer)
+        return renderer
 
-    def update_key(self, path, new_key):
-        old_key = path[-1]
-        parent_path = path[:-1]
-        parent_data = self.data
-        for p in parent_path:
-            parent_data = parent_data[p]
-
-        if new_key in parent_data:
-            logger.error(f"Key '{new_key}' already exists in parent data.")
+    def issues_at(self, path):
+        """Validation problems of the node at `path`."""
+        try:
+            return self.issues.get(self.index.id_at(path), [])
+        except KeyError:
+            return []
+
+    def refresh_markers(self, paths):
+        """Show the current validation problems of `paths` without re-rendering them."""
+        if self.virtual:
+            self.view.refresh_markers()
             return
+        for path in paths:
+            renderer = self._renderers.get(tuple(path))
+            if renderer is not None:
+                self._show_issues(renderer)
 
-        parent_data[new_key] = parent_data.pop(old_key)
-        self.render()
+    def _show_issues(self, renderer):
+        frame = renderer.frame
+        if frame is None or not frame.winfo_exists():
+            return
+        messages = self.issues.get(renderer.node_id)
+        if messages:
+            frame.configure(highlightbackground="red", highlightcolor="red", highlightthickness=2)
+            GUIUtils.add_tooltip(frame, "\n".join(messages))
+        elif int(frame.cget("highlightthickness")):
+            frame.configure(highlightthickness=0)
+            frame.unbind("<Enter>")
+            frame.unbind("<Leave>")
+            GUIUtils.forget_tooltip(frame)
+
+    @property
+    def in_batch(self):
+        return self._batch_paths is not None
+
+    @contextmanager
+    def batch(self, label="batch"):
+        """Group edits into one undo step, one render and one change notification.
+
+        Inside the block the edit methods raise instead of logging errors; any exception
+        rolls back every edit of the batch and propagates. Nested batches join the outer one.
+        """
+        if self._batch_paths is not None:
+            yield self
+            return
+
+        self._batch_paths = []
+        try:
+            with self.model.transaction(label):
+                yield self
+        finally:
+            paths, self._batch_paths = self._batch_paths, None
+            # Also after a rollback: restored nodes have new IDs the old widgets do not know
+            if paths:
+                self.render(common_path(paths))
+
+    def apply(self, operation, label=None):
+        """Apply an operation through the model and re-render the affected subtree."""
+        self._render_applied(self.model.apply(operation, label))
+
+    def undo(self):
+        entry = self.model.undo()
+        if entry is not None:
+            self.render(entry.render_path)
+        return entry is not None
+
+    def redo(self):
+        entry = self.model.redo()
+        if entry is not None:
+            self.render(entry.render_path)
+        return entry is not None
+
+    def handle_shortcut(self, action):
+        """Run an undo/redo shortcut, unless a text field has focus: it keeps its own editing keys."""
+        if isinstance(self.master.focus_get(), (tk.Entry, tk.Text)):
+            return None
+        action()
+        return "break"
+
+    def _render_applied(self, operation):
+        if operation is not None:
+            self.render(operation.render_path)
+
+    def update_key(self, path, new_key):
+        self._render_applied(self.model.rename_key(path, new_key))
+
+    def add_key(self, path, base_key="new_key"):
+        """Add a uniquely named key with an empty value to the dict at `path`."""
+        operation = self.model.add_key(path, base_key)
+        self._render_applied(operation)
+        return operation.key
 
     def add_button(self, parent, path, action, row, column=0):
         text = "+" if "add" in action else "-"
@@ -63,57 +392,35 @@ class DataEditor:
         button.grid(row=row, column=column, padx=2, pady=2)
 
     def handle_action(self, path, action):
-        parent_data = self.data
-        for p in path[:-1]:
-            parent_data = parent_data[p]
-
-        target = path[-1]
+        parent_data = self.get_data_at_path(path[:-1])
 
         try:
             if action == "add_item":
                 if isinstance(parent_data, list):
-                    parent_data.insert(target, None)  # Use None as a placeholder for any datatype
+                    self._render_applied(self.model.insert_item(path, None))  # Use None as a placeholder for any datatype
             elif action == "remove_item":
                 if isinstance(parent_data, list):
-                    parent_data.pop(target)
+                    self._render_applied(self.model.remove(path))
             elif action == "remove_key":
                 if isinstance(parent_data, dict):
-                    del parent_data[target]
+                    self._render_applied(self.model.remove(path))
         except (IndexError, KeyError) as e:
+            if self.in_batch:
+                raise
             logger.error(f"Error handling action '{action}': {e}")
 
-        self.render()
-
     def get_data_at_path(self, path):
-        data = self.data
-        for segment in path:
-            data = data[segment]
-        return data
+        return self.model.get(path)
 
-    def update_value(self, path, new_value):
-        current_value = self.get_data_at_path(path)
-        new_value = TypeConverter.convert_to_type(new_value, type(current_value))
-
-        if current_value == new_value:
-            logger.debug("No change in value, skipping update.")
-            return
-        self.update_data(path[:-1], lambda d: d.__setitem__(path[-1], new_value))
+    def update_value(self, path, new_value, convert=True):
+        """Set a scalar; with `convert` the value is first converted to the current value's type."""
+        self._render_applied(self.model.set_value(path, new_value, convert))
 
     def update_data(self, path, update_func):
         logger.debug(f"update_data called with path={path}")
-        data = self.data
         try:
-            for key in path:
-                data = data[key]
-
-            previous_state = data.copy() if isinstance(data, dict) else list(data)
-            update_func(data)
-
-            if data == previous_state:
-                logger.debug("No changes detected, skipping re-render.")
-                return
-
-            logger.debug(f"Data after update at path {path}: {self.data}")
-            self.render()
+            self._render_applied(self.model.update(path, update_func))
         except Exception as e:
+            if self.in_batch:
+                raise
             logger.error(f"Error in update_data: {e}")
\ No newline at end of file
@@ -0,0 +1,185 @@
+import hashlib
+import logging
+
+from dictedit2.diff import Change, apply_changes, merge
+from dictedit2.json_io import BackgroundTask, decode_document, file_stamp, read_text, snapshot
+from dictedit2.operations import resolve
+
+logger = logging.getLogger(__name__)
+
+
+def _find(data, path):
+    try:
+        return True, resolve(data, path)
+    except (KeyError, IndexError, TypeError):
+        return False, None
+
+
+class ReloadTask(BackgroundTask):
+    """Reads a changed file off the UI thread and parses it unless its content hash is unchanged.
+
+    The result passed to `on_done` is `(digest, data)`, with `data` None if the content is
+    the same as `previous_digest`.
+    """
+    def __init__(self, master, file_path, previous_digest=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.file_path = file_path
+        self.previous_digest = previous_digest
+
+    def work(self):
+        digest = hashlib.blake2b()
+        text = read_text(self.file_path, self.check_cancelled, digest=digest)
+        digest = digest.hexdigest()
+        if digest == self.previous_digest:
+            return digest, None
+        return digest, decode_document(text, self.check_cancelled)
+
+
+class FileWatcher:
+    """Merges external rewrites of a file into an editor's document.
+
+    The file is polled with os.stat every `interval_ms`; when its modification time or
+    size changes it is hashed and, if the content differs, parsed by a ReloadTask. The new
+    version is merged three-way against `base` (the file content the document started
+    from) so only changed paths are applied and re-rendered. Remote changes to paths that
+    were also edited locally are not applied: they are collected in `conflicts` and passed
+    to `on_conflict(changes)`. `on_merged(changes)` runs after a merge that changed something,
+    and `on_rebased(base)` after every merge, with the file's new content (e.g. to restart
+    a journal, see Autosave.rebase).
+    """
+    def __init__(self, editor, file_path, base=None, interval_ms=1000, on_merged=None, on_conflict=None,
+                 on_rebased=None):
+        self.editor = editor
+        self.file_path = file_path
+        # Kept as a private copy: the document is edited in place
+        self.base = snapshot(editor.data if base is None else base)
+        self.interval_ms = interval_ms
+        self.on_merged = on_merged
+        self.on_conflict = on_conflict
+        self.on_rebased = on_rebased
+        # path -> the remote Change that was not applied
+        self.conflicts = {}
+        self.task = None
+        self._stamp = None
+        self._digest = None
+        self._timer = None
+
+    @property
+    def running(self):
+        return self._timer is not None
+
+    def start(self):
+        try:
+            self._stamp = file_stamp(self.file_path)
+        except OSError as e:
+            logger.warning(f"Cannot watch {self.file_path}: {e}")
+        self.editor.model.listeners.append(self.on_patches)
+        self._timer = self.editor.master.after(self.interval_ms, self.poll)
+        return self
+
+    def stop(self):
+        if self.on_patches in self.editor.model.listeners:
+            self.editor.model.listeners.remove(self.on_patches)
+        if self._timer is not None:
+            self.editor.master.after_cancel(self._timer)
+            self._timer = None
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def on_patches(self, patches):
+        if any(patch["op"] == "load" for patch in patches):
+            # A different document was loaded into the editor
+            self.stop()
+
+    def poll(self):
+        self._timer = self.editor.master.after(self.interval_ms, self.poll)
+        if self.task is not None:
+            return
+        try:
+            stamp = file_stamp(self.file_path)
+        except OSError:
+            # Missing for a moment while another program replaces it
+            return
+        if stamp == self._stamp:
+            return
+        self._stamp = stamp
+        self.task = ReloadTask(self.editor.master, self.file_path, self._digest,
+                               on_done=self._on_loaded, on_error=self._on_failed, on_cancel=self._on_failed)
+        self.task.start()
+
+    def written(self, data):
+        """The editor itself wrote `data` (a snapshot of its document) to the file."""
+        if self.task is not None:
+            # Would only read back what was just written
+            self.task.cancel()
+            self.task = None
+        self.base = data
+        self._digest = None
+        try:
+            self._stamp = file_stamp(self.file_path)
+        except OSError:
+            self._stamp = None
+
+    def _on_failed(self, error=None):
+        # Probably caught mid-write; the next modification triggers another attempt
+        self.task = None
+        if error is not None:
+            logger.warning(f"Cannot reload {self.file_path}: {error}")
+
+    def _on_loaded(self, result):
+        self.task = None
+        if self.editor.model.in_transaction:
+            # Not merged into a batch in progress; reloaded on the next poll
+            self._stamp = None
+            return
+        digest, remote = result
+        self._digest = digest
+        if remote is not None:
+            self.merge(remote)
+
+    def merge(self, remote):
+        """Apply the changes from `base` to `remote` that do not clash with local edits."""
+        changes, conflicts = merge(self.base, self.editor.data, remote)
+        self.base = remote
+        if changes:
+            try:
+                paths = apply_changes(self.editor.model, changes, label="external change")
+            except (KeyError, IndexError, TypeError) as e:
+                logger.error(f"Cannot merge changes of {self.file_path}: {e}")
+                conflicts = changes + conflicts
+                changes = []
+            else:
+                self.editor.render_paths(paths)
+                logger.info(f"Merged {len(changes)} external change(s) from {self.file_path}")
+                if self.on_merged:
+                    self.on_merged(changes)
+        if self.on_rebased:
+            self.on_rebased(self.base)
+        for change in conflicts:
+            self.conflicts[change.path] = change
+        if conflicts:
+            logger.warning(f"{len(conflicts)} external change(s) conflict with local edits")
+            if self.on_conflict:
+                self.on_conflict(conflicts)
+        return changes, conflicts
+
+    def accept(self, path):
+        """Resolve the conflict at `path` by taking the file's version of it."""
+        path = tuple(path)
+        self.conflicts.pop(path, None)
+        in_remote, remote = _find(self.base, path)
+        in_local, _ = _find(self.editor.data, path)
+        if not in_remote and not in_local:
+            return
+        if not in_remote:
+            change = Change("remove", path)
+        elif not in_local:
+            change = Change("add", path, new=remote)
+        else:
+            change = Change("replace", path, new=remote)
+        self.editor.render_paths(apply_changes(self.editor.model, [change], label="accept external change"))
+
+    def dismiss(self, path):
+        """Resolve the conflict at `path` by keeping the local version."""
+        self.conflicts.pop(tuple(path), None)
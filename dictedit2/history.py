@@ -0,0 +1,73 @@
+import logging
+
+from dictedit2.operations import common_path
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryEntry:
+    """The inverse operations of one user-visible change, in the order they were recorded."""
+    def __init__(self, inverses, label=None, applied=None):
+        self.inverses = list(inverses)
+        self.label = label
+        # Operations whose application produced `inverses` (set when replaying)
+        self.applied = applied
+
+    def patches(self):
+        return [op.patch(inverse) for op, inverse in zip(self.applied or [], self.inverses)]
+
+    @property
+    def render_path(self):
+        return common_path(op.render_path for op in self.inverses)
+
+
+class History:
+    """Undo/redo stacks built from an operation log.
+
+    Undoing an entry applies its inverse operations in reverse order; the inverses of
+    those become the redo entry, so both directions share the same mechanism.
+    """
+    def __init__(self, limit=1000):
+        self.limit = limit
+        self.undo_stack = []
+        self.redo_stack = []
+
+    @property
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    @property
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def record(self, inverses, label=None):
+        if not inverses:
+            return
+        self.undo_stack.append(HistoryEntry(inverses, label))
+        if len(self.undo_stack) > self.limit:
+            del self.undo_stack[0]
+        self.redo_stack.clear()
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+
+    def undo(self, data, index=None):
+        """Revert the latest entry; returns it (or None) so the caller can re-render its path."""
+        return self._replay(self.undo_stack, self.redo_stack, data, index)
+
+    def redo(self, data, index=None):
+        return self._replay(self.redo_stack, self.undo_stack, data, index)
+
+    @staticmethod
+    def _replay(source, target, data, index):
+        if not source:
+            return None
+        entry = source.pop()
+        # Applying in reverse yields inverses that themselves replay correctly in reverse
+        applied = list(reversed(entry.inverses))
+        inverses = [op.apply(data, index) for op in applied]
+        replayed = HistoryEntry(inverses, entry.label, applied)
+        target.append(replayed)
+        logger.debug(f"Replayed {len(inverses)} operation(s) of '{entry.label}'")
+        return replayed
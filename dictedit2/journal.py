@@ -0,0 +1,289 @@
+import json
+import logging
+import os
+
+from dictedit2.changes import json_pointer
+from dictedit2.json_io import ExportTask, atomic_file, write_json_atomic
+from dictedit2.lazy_json import SpliceExportTask
+from dictedit2.operations import apply_patch
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_SUFFIX = ".journal"
+JOURNAL_VERSION = 1
+
+
+def journal_path(document_path):
+    return document_path + JOURNAL_SUFFIX
+
+
+def document_stamp(document_path):
+    """Identifies the version of the document file a journal applies to."""
+    stat = os.stat(document_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def encode_entry(patches):
+    """One journal line for the patches of one committed change.
+
+    The "old" values are only needed for undo, so they are left out. Values are encoded
+    right away: patches refer to live containers that later edits keep changing.
+    """
+    return json.dumps([{k: v for k, v in patch.items() if k != "old"} for patch in patches],
+                      ensure_ascii=False, separators=(",", ":"))
+
+
+def change_patch(change):
+    """Journal patch for one Change of dictedit2.diff, applied at its in-order path."""
+    patch = {"op": change.kind, "path": json_pointer(change.path)}
+    if change.kind != "remove":
+        patch["value"] = change.new
+    return patch
+
+
+def read_journal(document_path):
+    """The entries journaled against the current version of `document_path`.
+
+    Returns None when there is no journal or it was written against a different version
+    of the file. A torn last line (a crash in the middle of an append) is ignored.
+    """
+    path = journal_path(document_path)
+    try:
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().split("\n")
+    except FileNotFoundError:
+        return None
+
+    try:
+        header = json.loads(lines[0])
+    except ValueError:
+        logger.warning(f"Ignoring journal {path} without a valid header")
+        return None
+    if header.get("version") != JOURNAL_VERSION or header.get("base") != document_stamp(document_path):
+        logger.warning(f"Ignoring journal {path}: it belongs to another version of the document")
+        return None
+
+    entries = []
+    for number, line in enumerate(lines[1:], start=2):
+        if not line:
+            continue
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            if number < len(lines) - 1:
+                # Entries after a corrupt one cannot be applied safely either
+                logger.error(f"Journal {path} is corrupt at line {number}; later entries are skipped")
+            break
+    return entries
+
+
+def replay(data, entries):
+    """Apply journal entries to the document they were recorded against; returns the new root."""
+    for patches in entries:
+        for patch in patches:
+            data = apply_patch(data, patch)
+    return data
+
+
+def recover(document_path, data):
+    """Return `(data, count)` with any journaled edits of `document_path` replayed onto `data`."""
+    entries = read_journal(document_path)
+    if not entries:
+        return data, 0
+    data = replay(data, entries)
+    logger.info(f"Replayed {len(entries)} journaled change(s) onto {document_path}")
+    return data, len(entries)
+
+
+class Journal:
+    """Append-only log of the changes made to a document since it was last written in full.
+
+    The first line stamps the size and modification time of the document file; each
+    further line holds the patches of one committed change. Appends are flushed to the
+    OS right away, so a crash of the application loses nothing; `sync` forces them to disk.
+    """
+    def __init__(self, document_path):
+        self.document_path = document_path
+        self.path = journal_path(document_path)
+        self.entries = 0
+        self._file = None
+
+    @property
+    def is_open(self):
+        return self._file is not None
+
+    def open(self, resume=True):
+        """Start journaling; with `resume`, a journal that matches the document is continued."""
+        existing = read_journal(self.document_path) if resume else None
+        if existing is None:
+            self.restart([])
+        else:
+            self.entries = len(existing)
+            self._file = open(self.path, "a", encoding="utf-8")
+        return self
+
+    def restart(self, lines):
+        """Begin a new journal against the document as it is on disk now, keeping `lines`.
+
+        Used after compaction, with the entries appended while the snapshot was written.
+        """
+        self.close()
+        header = json.dumps({"version": JOURNAL_VERSION, "base": document_stamp(self.document_path)})
+        with atomic_file(self.path) as f:
+            f.write(header + "\n")
+            for line in lines:
+                f.write(line + "\n")
+        self.entries = len(lines)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def append(self, patches):
+        """Write one entry and return its line."""
+        line = encode_entry(patches)
+        self._file.write(line + "\n")
+        self._file.flush()
+        self.entries += 1
+        return line
+
+    def sync(self):
+        if self._file is not None:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def discard(self):
+        self.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        self.entries = 0
+
+
+class Autosave:
+    """Saves every committed edit of a model by appending it to the document's journal.
+
+    A save costs time proportional to the edit, not the document. Once `compact_after`
+    entries have accumulated, the full document is written in the background (by splicing
+    for out-of-core documents) and the journal restarts from it. Start with the data the
+    journal was recovered into (see `recover`), so resumed entries stay consistent. With
+    `sync_ms <= 0` the journal is not fsynced periodically.
+    """
+    def __init__(self, master, model, document_path, compact_after=500, sync_ms=1000, pretty=True, on_written=None):
+        self.master = master
+        self.model = model
+        self.journal = Journal(document_path)
+        self.compact_after = compact_after
+        self.sync_ms = sync_ms
+        self.pretty = pretty
+        # Called with the written document after an in-memory document was compacted
+        self.on_written = on_written
+        self.task = None
+        # Lines appended while a compaction is writing the document, or None
+        self._pending = None
+        self._timer = None
+
+    @property
+    def active(self):
+        return self.journal.is_open
+
+    def start(self):
+        self.journal.open(resume=True)
+        self.model.listeners.append(self.on_patches)
+        if self.sync_ms > 0:
+            self._timer = self.master.after(self.sync_ms, self._sync)
+        logger.info(f"Autosaving {self.journal.document_path} ({self.journal.entries} journaled change(s))")
+        return self
+
+    def stop(self):
+        """Stop journaling; the journal stays on disk so its edits can still be recovered."""
+        if self.on_patches in self.model.listeners:
+            self.model.listeners.remove(self.on_patches)
+        if self._timer is not None:
+            self.master.after_cancel(self._timer)
+            self._timer = None
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        self._pending = None
+        self.journal.sync()
+        self.journal.close()
+
+    def on_patches(self, patches):
+        if any(patch["op"] == "load" for patch in patches):
+            # A different document was loaded into the model
+            self.stop()
+            return
+        try:
+            line = self.journal.append(patches)
+        except (TypeError, ValueError) as e:
+            # Skipping one entry would corrupt every later replay, so stop at a consistent journal
+            logger.error(f"Autosave stopped, change cannot be journaled: {e}")
+            self.stop()
+            return
+        if self._pending is not None:
+            self._pending.append(line)
+        elif self.journal.entries >= self.compact_after:
+            self.compact()
+
+    def compact(self):
+        """Write the whole document in the background and restart the journal from it."""
+        if self.task is not None:
+            return self.task
+        document_path = self.journal.document_path
+        callbacks = {"on_done": self._on_compacted, "on_error": self._on_failed, "on_cancel": self._on_failed}
+        if self.model.backend is not None:
+            self.task = SpliceExportTask(self.master, self.model.backend, document_path, **callbacks)
+        else:
+            self.task = ExportTask(self.master, self.model.data, document_path, pretty=self.pretty, **callbacks)
+        self._pending = []
+        logger.debug(f"Compacting {self.journal.entries} journaled change(s) into {document_path}")
+        return self.task.start()
+
+    def _on_compacted(self, path):
+        pending, self._pending = self._pending, None
+        task, self.task = self.task, None
+        self.journal.restart(pending)
+        logger.info(f"Compacted journal into {path}")
+        if self.on_written and isinstance(task, ExportTask):
+            self.on_written(task.data)
+
+    def rebase(self, base):
+        """Restart the journal against the file as it is on disk now, whose content is `base`.
+
+        Used after another program rewrote the file: the old journal's stamp no longer matches
+        it, so its edits would be discarded on recovery. The new journal starts with one entry
+        turning `base` into the current document.
+        """
+        from dictedit2.diff import diff
+
+        if not self.active:
+            return
+        if self.task is not None:
+            # Would overwrite the external version that was just merged
+            self.task.cancel()
+            self.task = None
+            self._pending = None
+        changes = diff(base, self.model.data)
+        self.journal.restart([encode_entry([change_patch(change) for change in changes])] if changes else [])
+        logger.info(f"Journal of {self.journal.document_path} restarted after an external change")
+
+    def _on_failed(self, error=None):
+        # The journal is intact; entries appended meanwhile are already in it
+        self._pending = None
+        self.task = None
+
+    def finish(self):
+        """Write the document in full now and remove the journal, e.g. on a clean exit."""
+        self.stop()
+        if self.journal.entries and self.model.backend is not None:
+            self.model.backend.save(self.journal.document_path)
+        elif self.journal.entries:
+            write_json_atomic(self.model.data, self.journal.document_path, self.pretty)
+        self.journal.discard()
+
+    def _sync(self):
+        self.journal.sync()
+        self._timer = self.master.after(self.sync_ms, self._sync)
@@ -0,0 +1,398 @@
+import json
+import logging
+import os
+import queue
+import re
+import stat
+import threading
+from contextlib import contextmanager
+
+from dictedit2.node_index import NodeIndex
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1 << 20
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class TaskCancelled(Exception):
+    """Raised inside a worker when its task has been cancelled."""
+
+
+class BackgroundTask:
+    """Runs `work` on a worker thread and reports back on the Tk thread via after() polling.
+
+    Callbacks (`on_progress(fraction)`, `on_done(result)`, `on_error(exception)`,
+    `on_cancel()`, `on_partial(value)`) are always invoked from the Tk event loop, never
+    from the worker.
+    """
+    def __init__(self, master, on_progress=None, on_done=None, on_error=None, on_cancel=None, poll_ms=50,
+                 on_partial=None):
+        self.master = master
+        self.on_progress = on_progress
+        self.on_partial = on_partial
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_cancel = on_cancel
+        self.poll_ms = poll_ms
+        self._events = queue.Queue()
+        self._cancel_event = threading.Event()
+        self._thread = None
+        self._last_reported = -1.0
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self.master.after(self.poll_ms, self._poll)
+        return self
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise TaskCancelled()
+
+    def report(self, fraction):
+        # Skip updates below 1% so fine-grained workers don't flood the queue
+        if fraction - self._last_reported >= 0.01 or fraction >= 1.0:
+            self._last_reported = fraction
+            self._events.put(("progress", fraction))
+
+    def publish(self, value):
+        """Hand a partial result to `on_partial` while the work goes on."""
+        self._events.put(("partial", value))
+
+    def work(self):
+        raise NotImplementedError
+
+    def _run(self):
+        try:
+            result = self.work()
+        except TaskCancelled:
+            self._events.put(("cancelled", None))
+        except Exception as e:
+            self._events.put(("error", e))
+        else:
+            self._events.put(("done", result))
+
+    def _poll(self):
+        progress = None
+        while True:
+            try:
+                kind, payload = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                # Only the latest progress value matters for the UI
+                progress = payload
+                continue
+            if kind == "partial":
+                if not self.cancelled:
+                    self._dispatch(self.on_partial, payload)
+                continue
+            if kind == "done" and self.cancelled:
+                kind = "cancelled"
+            self._dispatch(self.on_progress, progress)
+            self._finish(kind, payload)
+            return
+
+        self._dispatch(self.on_progress, progress)
+        self.master.after(self.poll_ms, self._poll)
+
+    def _finish(self, kind, payload):
+        if kind == "done":
+            self._dispatch(self.on_done, payload)
+        elif kind == "error":
+            logger.error(f"Background task failed: {payload}")
+            self._dispatch(self.on_error, payload)
+        else:
+            logger.info("Background task cancelled.")
+            if self.on_cancel:
+                self.on_cancel()
+
+    @staticmethod
+    def _dispatch(callback, value):
+        if callback and value is not None:
+            callback(value)
+
+
+def _check_end(text, pos):
+    """Reject anything but whitespace after the top-level value, as json.loads does."""
+    pos = WHITESPACE.match(text, pos).end()
+    if pos != len(text):
+        raise json.JSONDecodeError("Extra data", text, pos)
+
+
+def iter_members(text, start=0, decoder=None):
+    """Decode the top-level container in `text` one member at a time.
+
+    Yields `(key, value, end)` per member, where `key` is the dict key (None for list
+    items) and `end` the offset just past the member. A scalar document yields once.
+    Text after the top-level value raises JSONDecodeError once the members are decoded.
+    """
+    decoder = decoder or json.JSONDecoder()
+    pos = WHITESPACE.match(text, start).end()
+    opening = text[pos:pos + 1]
+    if opening not in ("{", "["):
+        value, end = decoder.raw_decode(text, pos)
+        _check_end(text, end)
+        yield None, value, end
+        return
+
+    closing = "}" if opening == "{" else "]"
+    pos = WHITESPACE.match(text, pos + 1).end()
+    if text[pos:pos + 1] == closing:
+        _check_end(text, pos + 1)
+        return
+    while True:
+        key = None
+        if opening == "{":
+            if text[pos:pos + 1] != '"':
+                raise json.JSONDecodeError("Expecting property name enclosed in double quotes", text, pos)
+            key, pos = decoder.raw_decode(text, pos)
+            pos = WHITESPACE.match(text, pos).end()
+            if text[pos:pos + 1] != ":":
+                raise json.JSONDecodeError("Expecting ':' delimiter", text, pos)
+            pos = WHITESPACE.match(text, pos + 1).end()
+        value, pos = decoder.raw_decode(text, pos)
+        yield key, value, pos
+
+        pos = WHITESPACE.match(text, pos).end()
+        delimiter = text[pos:pos + 1]
+        if delimiter == closing:
+            _check_end(text, pos + 1)
+            return
+        if delimiter != ",":
+            raise json.JSONDecodeError("Expecting ',' delimiter", text, pos)
+        pos = WHITESPACE.match(text, pos + 1).end()
+
+
+def decode_document(text, check_cancelled=None, report=None):
+    """Decode a JSON document member by member so it can be cancelled and report progress."""
+    stripped = WHITESPACE.match(text).end()
+    container = {"{": {}, "[": []}.get(text[stripped:stripped + 1])
+    total = max(1, len(text))
+    for key, value, end in iter_members(text, stripped):
+        if container is None:
+            return value
+        if isinstance(container, dict):
+            container[key] = value
+        else:
+            container.append(value)
+        if check_cancelled:
+            check_cancelled()
+        if report:
+            report(end / total)
+    return container
+
+
+def snapshot(data):
+    """Copy the containers of a JSON document so a worker can read it while the UI keeps editing.
+
+    Scalars are immutable and shared; only dicts and lists are duplicated.
+    """
+    if not isinstance(data, (dict, list)):
+        return data
+    root = type(data)()
+    stack = [(data, root)]
+    while stack:
+        source, target = stack.pop()
+        items = source.items() if isinstance(source, dict) else enumerate(source)
+        for key, value in items:
+            if isinstance(value, (dict, list)):
+                copy = type(value)()
+                stack.append((value, copy))
+                value = copy
+            if isinstance(target, dict):
+                target[key] = value
+            else:
+                target.append(value)
+    return root
+
+
+def iter_json_chunks(data, pretty=True):
+    """Encode a document one top-level member at a time.
+
+    Each member is encoded by the C encoder in one shot; the output is identical to
+    `json.dumps(data, indent=4)` when pretty, or to the compact separators otherwise.
+    """
+    options = {"indent": 4} if pretty else {"separators": (",", ":")}
+    if not isinstance(data, (dict, list)) or not data:
+        yield json.dumps(data, **options)
+        return
+
+    is_dict = isinstance(data, dict)
+    yield "{" if is_dict else "["
+    items = data.items() if is_dict else ((None, value) for value in data)
+    for position, (key, value) in enumerate(items):
+        member = json.dumps(value, **options)
+        prefix = "," if position else ""
+        if pretty:
+            # JSON strings never contain raw newlines, so this only indents structure
+            member = member.replace("\n", "\n    ")
+            prefix += "\n    "
+        if is_dict:
+            key = key if isinstance(key, str) else json.dumps(key)
+            prefix += json.dumps(key) + (": " if pretty else ":")
+        yield prefix + member
+    yield ("\n" if pretty else "") + ("}" if is_dict else "]")
+
+
+def _read_umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# Read once at import: os.umask can only be read by changing it for the whole process, which
+# would race with files created by other threads if the writer threads did it
+_UMASK = _read_umask()
+
+
+def _file_mode(file_path):
+    """Permissions for a replacement of `file_path`: those it has, or the default for a new file."""
+    try:
+        return stat.S_IMODE(os.stat(file_path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+@contextmanager
+def atomic_file(file_path, binary=False):
+    """Open a temporary file next to `file_path` that replaces it when the block succeeds.
+
+    The target is either left untouched or fully replaced, never truncated, and keeps its
+    permissions (mkstemp would make it private to the owner).
+    """
+    # Imported on first use: tempfile alone costs more at startup than the rest of this module
+    import tempfile
+
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(file_path)}.", suffix=".tmp")
+    try:
+        if binary:
+            f = os.fdopen(fd, "wb", buffering=CHUNK_SIZE)
+        else:
+            f = os.fdopen(fd, "w", encoding="utf-8", buffering=CHUNK_SIZE)
+        with f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temp_path, _file_mode(file_path))
+        os.replace(temp_path, file_path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def write_json_atomic(data, file_path, pretty=True, check_cancelled=None, report=None):
+    """Write `data` to a temporary file next to `file_path` and rename it into place."""
+    total = max(1, len(data) if isinstance(data, (dict, list)) else 1)
+    with atomic_file(file_path) as f:
+        for position, chunk in enumerate(iter_json_chunks(data, pretty)):
+            if check_cancelled:
+                check_cancelled()
+            f.write(chunk)
+            if report:
+                report(min(1.0, position / total))
+    return file_path
+
+
+class ExportTask(BackgroundTask):
+    """Serializes a snapshot of the document on a worker thread and writes it atomically.
+
+    The snapshot is taken on the calling (UI) thread, so later edits don't affect the output.
+    """
+    def __init__(self, master, data, file_path, pretty=True, **kwargs):
+        super().__init__(master, **kwargs)
+        self.data = snapshot(data)
+        self.file_path = file_path
+        self.pretty = pretty
+
+    def work(self):
+        return write_json_atomic(self.data, self.file_path, self.pretty, self.check_cancelled, self.report)
+
+
+def file_stamp(file_path):
+    """Modification time and size of a file, which change whenever it is rewritten."""
+    stat = os.stat(file_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def looks_pretty(file_path):
+    """True if a JSON file is laid out over several lines, False if it is compact."""
+    with open(file_path, "rb") as f:
+        head = f.read(CHUNK_SIZE)
+    return b"\n" in head.strip()
+
+
+def read_text(file_path, check_cancelled=None, report=None, digest=None):
+    """Read a JSON file in chunks and decode it in whichever encoding JSON allows.
+
+    `digest` (a hashlib object) is fed every chunk, so a file is hashed in the same pass.
+    """
+    size = max(1, os.path.getsize(file_path))
+    chunks = []
+    read = 0
+    with open(file_path, "rb") as f:
+        while True:
+            if check_cancelled:
+                check_cancelled()
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            if digest is not None:
+                digest.update(chunk)
+            read += len(chunk)
+            if report:
+                report(read / size)
+
+    raw = b"".join(chunks)
+    del chunks
+    text = raw.decode(json.detect_encoding(raw))
+    del raw
+    if text.startswith("\ufeff"):
+        text = text[1:]
+    return text
+
+
+class ImportTask(BackgroundTask):
+    """Reads and parses a JSON file off the UI thread and builds its node index.
+
+    The result passed to `on_done` is a `(data, index)` tuple ready for `DataEditor.load`.
+    With a SnapshotCache an unchanged file is loaded from its snapshot instead of being
+    parsed, and `expanded` is set to the expansion state saved with it; a parsed file is
+    stored in the cache.
+    """
+    def __init__(self, master, file_path, cache=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.file_path = file_path
+        self.cache = cache
+        self.expanded = None
+
+    def work(self):
+        digest = None
+        if self.cache is not None:
+            cached = self.cache.load(self.file_path, self.check_cancelled)
+            if cached is not None:
+                data, index, self.expanded = cached
+                self.report(1.0)
+                return data, index
+            # Taken before reading, so a write during the import leaves a snapshot that never matches
+            stamp = file_stamp(self.file_path)
+            import hashlib
+            digest = hashlib.blake2b()
+        text = read_text(self.file_path, self.check_cancelled, lambda fraction: self.report(0.4 * fraction), digest)
+        data = decode_document(text, self.check_cancelled, lambda fraction: self.report(0.4 + 0.5 * fraction))
+        self.check_cancelled()
+        index = NodeIndex(data)
+        if self.cache is not None:
+            self.cache.store(self.file_path, data, digest.hexdigest(), stamp, len(index))
+        self.report(1.0)
+        return data, index
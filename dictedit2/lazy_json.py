@@ -0,0 +1,337 @@
+import json
+import logging
+import mmap
+import re
+from array import array
+from bisect import bisect_left
+
+from dictedit2.json_io import CHUNK_SIZE, BackgroundTask, atomic_file
+from dictedit2.node_index import NodeIndex
+
+logger = logging.getLogger(__name__)
+
+# Everything up to the next bracket outside of strings; the bracket is group 1
+NEXT_BRACKET = re.compile(rb'(?:[^"\[\]{}]+|"[^"\\]*(?:\\.[^"\\]*)*")*([\[\]{}])', re.S)
+# Rest of a JSON string after its opening quote, including the closing quote
+STRING_REST = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+LITERAL = re.compile(rb'[^ \t\n\r,\]}]+')
+WHITESPACE = re.compile(rb'[ \t\n\r]*')
+BOM = b"\xef\xbb\xbf"
+
+# Brackets scanned between cancellation checks and progress reports
+CHECK_INTERVAL = 1 << 16
+
+
+class OffsetIndex:
+    """Byte range of every container in a JSON buffer, found in one streaming pass.
+
+    Stored as two parallel arrays of 64-bit offsets (16 bytes per container), sorted by
+    start offset, so `end_of` is a binary search.
+    """
+    def __init__(self, buffer, check_cancelled=None, report=None):
+        self.starts = array("q")
+        self.ends = array("q")
+        self._build(buffer, check_cancelled, report)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _build(self, buffer, check_cancelled, report):
+        starts, ends = self.starts, self.ends
+        open_positions = []
+        size = max(1, len(buffer))
+        pos = 0
+        steps = 0
+        # Strings are consumed inside the regex, so Python only runs once per bracket
+        for match in NEXT_BRACKET.finditer(buffer):
+            if match.start() != pos:
+                # finditer skipped something the pattern cannot consume: an unterminated string
+                raise ValueError(f"Unterminated string at byte {pos}.")
+            bracket = match.start(1)
+            pos = bracket + 1
+            if buffer[bracket] in (0x7b, 0x5b):
+                open_positions.append(len(starts))
+                starts.append(bracket)
+                ends.append(-1)
+            else:
+                if not open_positions:
+                    raise ValueError(f"Unbalanced '{chr(buffer[bracket])}' at byte {bracket}.")
+                ends[open_positions.pop()] = pos
+
+            steps += 1
+            if steps % CHECK_INTERVAL == 0:
+                if check_cancelled:
+                    check_cancelled()
+                if report:
+                    report(pos / size)
+        if open_positions:
+            raise ValueError(f"Unclosed container at byte {starts[open_positions[-1]]}.")
+
+    def end_of(self, start):
+        position = bisect_left(self.starts, start)
+        if position == len(self.starts) or self.starts[position] != start:
+            raise KeyError(start)
+        return self.ends[position]
+
+
+class Unloaded:
+    """Stand-in for a container that has not been parsed yet.
+
+    The model treats it like a collapsed dict or list; it is replaced by the real
+    container (see DocumentModel.materialize) when it is expanded.
+    """
+    __slots__ = ("document", "start", "end", "kind")
+
+    def __init__(self, document, start, end):
+        self.document = document
+        self.start = start
+        self.end = end
+        self.kind = "dict" if document.buffer[start] == 0x7b else "list"
+
+    @property
+    def summary(self):
+        size = self.end - self.start
+        for unit in ("bytes", "KB", "MB", "GB"):
+            if size < 1024 or unit == "GB":
+                break
+            size /= 1024
+        size = f"{size:.0f} {unit}" if unit == "bytes" else f"{size:.1f} {unit}"
+        return f"{size}, not loaded"
+
+    def load(self):
+        return self.document.load_container(self.start, self.end)
+
+    def __str__(self):
+        return f"<{self.kind}, {self.summary}>"
+
+    __repr__ = __str__
+
+
+class LazyDocument:
+    """A JSON file edited out of core: memory-mapped, parsed one container at a time.
+
+    Only the root and the containers that are expanded or edited become Python objects;
+    everything else stays `Unloaded`. `save` writes the file back by copying the byte
+    ranges of untouched containers and serializing only the ones that changed. The file
+    must be UTF-8 encoded.
+    """
+    def __init__(self, file_path, check_cancelled=None, report=None):
+        self.file_path = file_path
+        self._file = open(file_path, "rb")
+        try:
+            self.buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            self.buffer = b""
+        self.index = OffsetIndex(self.buffer, check_cancelled, report)
+        # id(container) -> (container, start, end) for every container parsed from the file.
+        # Holding the container keeps its id from being reused by an unrelated object.
+        self._spans = {}
+        # ids of parsed containers whose own members changed since they were loaded
+        self._dirty = set()
+        self.model = None
+
+        start = WHITESPACE.match(self.buffer, len(BOM) if self.buffer[:len(BOM)] == BOM else 0).end()
+        if start < len(self.buffer) and self.buffer[start] in (0x7b, 0x5b):
+            # Bytes before and after the root (BOM, whitespace) are kept as they are
+            self.root_span = (start, self.index.end_of(start))
+            self.root = self.load_container(*self.root_span)
+        else:
+            self.root_span = (0, len(self.buffer))
+            self.root = json.loads(self.buffer[start:])
+
+    def close(self):
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        self._file.close()
+
+    def load_container(self, start, end):
+        is_dict = self.buffer[start] == 0x7b
+        container = {} if is_dict else []
+        for key, value in self._members(start, end, is_dict):
+            if is_dict:
+                container[key] = value
+            else:
+                container.append(value)
+        self._spans[id(container)] = (container, start, end)
+        return container
+
+    def _members(self, start, end, is_dict):
+        buffer = self.buffer
+        closing = 0x7d if is_dict else 0x5d
+        pos = WHITESPACE.match(buffer, start + 1).end()
+        if buffer[pos] == closing:
+            return
+        while True:
+            key = None
+            if is_dict:
+                key, pos = self._value(pos)
+                pos = WHITESPACE.match(buffer, pos).end()
+                if buffer[pos] != 0x3a:
+                    raise ValueError(f"Expecting ':' at byte {pos}.")
+                pos = WHITESPACE.match(buffer, pos + 1).end()
+            value, pos = self._value(pos)
+            yield key, value
+
+            pos = WHITESPACE.match(buffer, pos).end()
+            if buffer[pos] == closing:
+                return
+            if buffer[pos] != 0x2c:
+                raise ValueError(f"Expecting ',' at byte {pos}.")
+            pos = WHITESPACE.match(buffer, pos + 1).end()
+
+    def _value(self, pos):
+        char = self.buffer[pos]
+        if char in (0x7b, 0x5b):
+            end = self.index.end_of(pos)
+            return Unloaded(self, pos, end), end
+        if char == 0x22:
+            end = STRING_REST.match(self.buffer, pos + 1).end()
+        else:
+            end = LITERAL.match(self.buffer, pos).end()
+        return json.loads(self.buffer[pos:end]), end
+
+    def attach(self, model):
+        """Track the edits of `model`, whose document must be `self.root`."""
+        self.model = model
+        model.backend = self
+        model.listeners.append(self.on_patches)
+        # Told as each edit, undo or rollback is applied: patches of a transaction arrive only
+        # at its end, when their pointers may resolve to different containers
+        model.index.on_change = self._mark_dirty
+
+    def detach(self):
+        if self.model is not None:
+            self.model.listeners.remove(self.on_patches)
+            if self.model.index.on_change == self._mark_dirty:
+                self.model.index.on_change = None
+            self.model.backend = None
+            self.model = None
+
+    def on_patches(self, patches):
+        if any(patch["op"] == "load" for patch in patches):
+            # A different document was loaded into the model
+            self.detach()
+
+    def _mark_dirty(self, container):
+        """`container`'s own members changed; containers it holds are tracked separately."""
+        self._dirty.add(id(container))
+
+    @property
+    def modified(self):
+        return bool(self._dirty)
+
+    def splice_plan(self):
+        """Describe the current document as byte ranges of the file and new JSON text.
+
+        Runs on the UI thread and costs time proportional to the parsed part of the
+        document; the pieces can then be written by a worker while editing continues.
+        """
+        start, end = self.root_span
+        pieces = [(0, start)]
+        self._plan(self.model.data if self.model is not None else self.root, pieces, {})
+        pieces.append((end, len(self.buffer)))
+        return pieces
+
+    def _subtree_dirty(self, obj, memo):
+        key = id(obj)
+        if key not in memo:
+            span = self._spans.get(key)
+            if span is None or span[0] is not obj:
+                # Not parsed from the file: has to be serialized
+                memo[key] = True
+            else:
+                memo[key] = key in self._dirty or any(
+                    self._subtree_dirty(child, memo)
+                    for child in (obj.values() if isinstance(obj, dict) else obj)
+                    if isinstance(child, (dict, list))
+                )
+        return memo[key]
+
+    def _plan(self, obj, pieces, memo):
+        if isinstance(obj, Unloaded) and obj.document is self:
+            pieces.append((obj.start, obj.end))
+            return
+        if not isinstance(obj, (dict, list)):
+            pieces.append(json.dumps(obj))
+            return
+        if not self._subtree_dirty(obj, memo):
+            _, start, end = self._spans[id(obj)]
+            pieces.append((start, end))
+            return
+
+        children = obj.values() if isinstance(obj, dict) else obj
+        if id(obj) in self._spans and id(obj) not in self._dirty:
+            # Own members unchanged: copy the original bytes around the children that changed
+            _, pos, end = self._spans[id(obj)]
+            for child in children:
+                if isinstance(child, (dict, list)) and self._subtree_dirty(child, memo):
+                    _, child_start, child_end = self._spans[id(child)]
+                    pieces.append((pos, child_start))
+                    self._plan(child, pieces, memo)
+                    pos = child_end
+            pieces.append((pos, end))
+            return
+
+        is_dict = isinstance(obj, dict)
+        pieces.append("{" if is_dict else "[")
+        for position, (key, value) in enumerate(obj.items() if is_dict else enumerate(obj)):
+            separator = ", " if position else ""
+            pieces.append(separator + (json.dumps(str(key)) + ": " if is_dict else ""))
+            self._plan(value, pieces, memo)
+        pieces.append("}" if is_dict else "]")
+
+    def write(self, pieces, file_path, check_cancelled=None, report=None):
+        """Write a splice plan to `file_path` atomically."""
+        total = max(1, sum(piece[1] - piece[0] if isinstance(piece, tuple) else len(piece) for piece in pieces))
+        written = 0
+        with atomic_file(file_path, binary=True) as f:
+            for piece in pieces:
+                if isinstance(piece, str):
+                    f.write(piece.encode("utf-8"))
+                    written += len(piece)
+                    continue
+                start, end = piece
+                while start < end:
+                    if check_cancelled:
+                        check_cancelled()
+                    chunk_end = min(end, start + CHUNK_SIZE)
+                    f.write(self.buffer[start:chunk_end])
+                    written += chunk_end - start
+                    start = chunk_end
+                    if report:
+                        report(written / total)
+        return file_path
+
+    def save(self, file_path=None):
+        return self.write(self.splice_plan(), file_path or self.file_path)
+
+
+class LazyOpenTask(BackgroundTask):
+    """Builds the offset index of a large JSON file off the UI thread.
+
+    The result passed to `on_done` is a `(document, index)` tuple: load `document.root`
+    with the NodeIndex into the editor, then `document.attach(editor.model)`.
+    """
+    def __init__(self, master, file_path, **kwargs):
+        super().__init__(master, **kwargs)
+        self.file_path = file_path
+
+    def work(self):
+        document = LazyDocument(self.file_path, self.check_cancelled, lambda fraction: self.report(0.9 * fraction))
+        self.check_cancelled()
+        index = NodeIndex(document.root)
+        self.report(1.0)
+        return document, index
+
+
+class SpliceExportTask(BackgroundTask):
+    """Writes a lazily loaded document by splicing; the plan is made on the calling (UI) thread."""
+    def __init__(self, master, document, file_path, **kwargs):
+        super().__init__(master, **kwargs)
+        self.document = document
+        self.pieces = document.splice_plan()
+        self.file_path = file_path
+
+    def work(self):
+        return self.document.write(self.pieces, self.file_path, self.check_cancelled, self.report)
@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import threading
+import tkinter as tk
+
+from dictedit2.operations import Insert, SetValue
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateQueue:
+    """Thread-safe buffer of `path -> value` updates that keeps only the latest value per path.
+
+    Producers on any thread (or asyncio task) call `put`; the UI drains it once per frame,
+    so memory and work per frame grow with the number of distinct paths, not the update rate.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self.received = 0
+        self.coalesced = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
+
+    def put(self, path, value):
+        path = tuple(path)
+        with self._lock:
+            self.received += 1
+            if path in self._pending:
+                self.coalesced += 1
+                # Re-inserted so paths are applied in the order of their latest update
+                del self._pending[path]
+            self._pending[path] = value
+
+    def put_many(self, updates):
+        for path, value in updates:
+            self.put(path, value)
+
+    def drain(self):
+        """Take all pending updates as a list of (path, value)."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return list(pending.items())
+
+
+def apply_updates(model, updates, undoable=False):
+    """Set each `(path, value)` in one transaction of `model`; returns the paths that changed.
+
+    A missing dict key is added. Updates whose container does not exist, or that point
+    past the end of a list, are skipped with a warning rather than failing the others.
+    """
+    changed = []
+    with model.transaction("live update", undoable=undoable):
+        for path, value in updates:
+            if not path:
+                logger.warning("Ignoring live update of the document root")
+                continue
+            try:
+                container = model.get(path[:-1])
+            except (KeyError, IndexError, TypeError):
+                logger.warning(f"Ignoring live update of {path}: no such container")
+                continue
+            key = path[-1]
+            if isinstance(container, dict):
+                if key not in container:
+                    model.apply(Insert(path, value), "live update")
+                    changed.append(path[:-1])
+                    continue
+            elif not isinstance(container, list) or not isinstance(key, int) or not 0 <= key < len(container):
+                logger.warning(f"Ignoring live update of {path}: no such item")
+                continue
+            if container[key] != value or type(container[key]) is not type(value):
+                model.apply(SetValue(path, value), "live update")
+                changed.append(path)
+    return changed
+
+
+class LiveUpdater:
+    """Applies queued updates to a DataEditor at most `fps` times per second.
+
+    Each frame drains the queue, applies the latest value per path in one transaction
+    (one change notification; not undoable unless `undoable`) and re-renders only the
+    touched nodes. Runs on the Tk event loop, so it works under `mainloop` and `run_tk`.
+    """
+    def __init__(self, editor, queue=None, fps=30, undoable=False):
+        self.editor = editor
+        self.queue = queue if queue is not None else UpdateQueue()
+        self.interval_ms = max(1, round(1000 / fps))
+        self.undoable = undoable
+        self.frames = 0
+        self._timer = None
+
+    @property
+    def running(self):
+        return self._timer is not None
+
+    def start(self):
+        if self._timer is None:
+            self._timer = self.editor.master.after(self.interval_ms, self._frame)
+        return self
+
+    def stop(self):
+        if self._timer is not None:
+            self.editor.master.after_cancel(self._timer)
+            self._timer = None
+
+    def flush(self):
+        """Apply everything queued now; returns the number of updates applied."""
+        if self.editor.model.in_transaction:
+            # Never mix feed updates into a user's batch; they wait for the next frame
+            return 0
+        updates = self.queue.drain()
+        if not updates:
+            return 0
+        changed = apply_updates(self.editor.model, updates, self.undoable)
+        self.editor.render_paths(changed)
+        self.frames += 1
+        return len(updates)
+
+    def _frame(self):
+        try:
+            self.flush()
+        finally:
+            self._timer = self.editor.master.after(self.interval_ms, self._frame)
+
+
+async def run_tk(root, interval=1 / 120):
+    """Drive the Tk event loop from asyncio instead of `root.mainloop()`.
+
+    Coroutines on the same loop can then push into an UpdateQueue (or touch the editor)
+    directly. Returns when the window is destroyed.
+    """
+    while True:
+        try:
+            root.update()
+        except tk.TclError:
+            # The application was destroyed
+            return
+        await asyncio.sleep(interval)
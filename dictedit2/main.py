@@ -1,31 +1,266 @@
 # main.py
+import argparse
 import tkinter as tk
-from tkinter import filedialog
-import json
+from tkinter import filedialog, messagebox, ttk
 import logging
-from editor import DataEditor
+import os
+from dictedit2.editor import DataEditor
+from dictedit2.journal import Autosave, Journal, read_journal, replay
+from dictedit2.json_io import ExportTask, ImportTask, looks_pretty, snapshot
+from dictedit2.lazy_json import LazyOpenTask, SpliceExportTask
+from dictedit2.model import DocumentModel
+from dictedit2.renderers.search_bar import SearchBar
+from dictedit2.schema import Schema, SchemaValidator
+from dictedit2.snapshot_cache import SnapshotCache
 
-logging.basicConfig(level=logging.DEBUG, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
-def on_data_changed(data):
-    logger.info("Data changed: %s", data)
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
 
-def export_data(data):
+# The application window and its editor, created by main()
+root = None
+editor = None
+autosave_enabled = None
+# File the current document was imported or opened from, if any
+document_path = None
+# Autosave and watcher of that file; autosave only runs when turned on
+autosave = None
+watcher = None
+# Validator of the attached schema, if any
+validator = None
+# Parsed imports, so reopening an unchanged file skips parsing
+snapshot_cache = SnapshotCache()
+# File whose snapshot the current document was loaded from or stored as, if it was not recovered
+snapshot_path = None
+
+def on_patch(patches):
+    logger.info("Data changed: %d change(s)", len(patches))
+    for patch in patches:
+        logger.debug("%s %s", patch["op"], patch["path"])
+
+def export_data(editor, pretty=True):
     file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON files", "*.json")])
-    if file_path:
-        with open(file_path, 'w') as f:
-            json.dump(data, f, indent=4)
-        logger.info("Data exported to %s", file_path)
+    if not file_path:
+        return
+
+    # Serialization runs on a worker thread against a snapshot; the file is replaced atomically
+    def on_done(path):
+        window.destroy()
+        logger.info("Data exported to %s", path)
+        if watcher is not None and watcher.running and os.path.abspath(path) == os.path.abspath(watcher.file_path):
+            watcher.written(task.data)
+
+    def on_error(error):
+        window.destroy()
+        messagebox.showerror("Export failed", str(error))
+
+    callbacks = {"on_done": on_done, "on_error": on_error, "on_cancel": lambda: window.destroy()}
+    if editor.model.backend is not None:
+        # Out-of-core documents are written by splicing; unchanged parts keep their formatting
+        task = SpliceExportTask(editor.master, editor.model.backend, file_path, **callbacks)
+    else:
+        task = ExportTask(editor.master, editor.data, file_path, pretty=pretty, **callbacks)
+    window, progress = create_progress_window(editor.master, f"Exporting {os.path.basename(file_path)}", task.cancel)
+    task.on_progress = lambda fraction: progress.set(fraction * 100)
+    task.start()
+
+def create_progress_window(master, title, on_cancel):
+    window = tk.Toplevel(master)
+    window.title(title)
+    window.transient(master)
+    window.protocol("WM_DELETE_WINDOW", on_cancel)
+    progress = tk.DoubleVar(window, value=0.0)
+    ttk.Progressbar(window, variable=progress, maximum=100, length=300).pack(padx=10, pady=10)
+    tk.Button(window, text="Cancel", command=on_cancel).pack(pady=(0, 10))
+    return window, progress
 
 def import_data(editor):
     file_path = filedialog.askopenfilename(filetypes=[("JSON files", "*.json")])
     if file_path:
-        with open(file_path, 'r') as f:
-            imported_data = json.load(f)
-        editor.data = imported_data
-        editor.render()
+        import_file(editor, file_path)
+
+def import_file(editor, file_path):
+    # Parsing and indexing run on a worker thread (or are skipped for a cached file); the UI only polls for progress
+    def on_done(result):
+        global snapshot_path
+        window.destroy()
+        data, index = result
+        expanded = task.expanded
+        base = None
+        entries = read_journal(file_path)
+        if entries and messagebox.askyesno(
+                "Recover changes", f"{len(entries)} change(s) to this file were not saved in full. Recover them?"):
+            # The watcher merges external changes against the file as it is on disk
+            base = snapshot(data)
+            data = replay(data, entries)
+            index = expanded = None
+        elif entries:
+            Journal(file_path).discard()
+        remember_view(editor)
+        editor.load(data, index, expanded)
+        set_document_path(file_path)
+        # Node IDs of a recovered document differ from those of the snapshot
+        snapshot_path = file_path if base is None else None
         logger.info("Data imported from %s", file_path)
+        start_autosave(editor, file_path)
+        start_watcher(editor, file_path, base)
+
+    def on_error(error):
+        window.destroy()
+        messagebox.showerror("Import failed", str(error))
+
+    task = ImportTask(editor.master, file_path, snapshot_cache, on_done=on_done, on_error=on_error,
+                      on_cancel=lambda: window.destroy())
+    window, progress = create_progress_window(editor.master, f"Importing {os.path.basename(file_path)}", task.cancel)
+    task.on_progress = lambda fraction: progress.set(fraction * 100)
+    task.start()
+
+def open_large_file(editor):
+    file_path = filedialog.askopenfilename(filetypes=[("JSON files", "*.json")])
+    if not file_path:
+        return
+
+    # Only an offset index is built; containers are parsed when they are expanded
+    def on_done(result):
+        window.destroy()
+        document, index = result
+        remember_view(editor)
+        editor.load(document.root, index)
+        document.attach(editor.model)
+        set_document_path(file_path)
+        logger.info("Opened %s out of core (%d containers)", file_path, len(document.index))
+        if read_journal(file_path):
+            # Replaying needs the whole document in memory
+            messagebox.showwarning(
+                "Unsaved changes", "This file has journaled changes; use Import to recover them. Autosave is off.")
+        else:
+            start_autosave(editor, file_path)
+
+    def on_error(error):
+        window.destroy()
+        messagebox.showerror("Open failed", str(error))
+
+    task = LazyOpenTask(editor.master, file_path, on_done=on_done, on_error=on_error, on_cancel=lambda: window.destroy())
+    window, progress = create_progress_window(editor.master, f"Indexing {os.path.basename(file_path)}", task.cancel)
+    task.on_progress = lambda fraction: progress.set(fraction * 100)
+    task.start()
+
+def compare_with_file(editor):
+    # Only needed once a comparison is opened; the diff is not loaded at startup
+    from dictedit2.renderers.compare_view import CompareWindow
+
+    file_path = filedialog.askopenfilename(filetypes=[("JSON files", "*.json")])
+    if not file_path:
+        return
+
+    def on_done(result):
+        window.destroy()
+        data, index = result
+        # Loaded with the index built by the worker
+        other = DocumentModel({})
+        other.load(data, index)
+        # Changes taken into the current document are re-rendered in the editor
+        on_applied = lambda document, paths: editor.render_paths(paths) if document == "old" else None
+        CompareWindow(editor.master, editor.model, other, ("Current", os.path.basename(file_path)), on_applied)
+
+    def on_error(error):
+        window.destroy()
+        messagebox.showerror("Compare failed", str(error))
+
+    task = ImportTask(editor.master, file_path, snapshot_cache, on_done=on_done, on_error=on_error,
+                      on_cancel=lambda: window.destroy())
+    window, progress = create_progress_window(editor.master, f"Reading {os.path.basename(file_path)}", task.cancel)
+    task.on_progress = lambda fraction: progress.set(fraction * 100)
+    task.start()
+
+def remember_view(editor):
+    """Save the expansion state of a document loaded from a snapshot, for the next time it is opened."""
+    global snapshot_path
+    if snapshot_path is not None:
+        snapshot_cache.save_view(snapshot_path, editor.model.expanded)
+        snapshot_path = None
+
+def set_document_path(file_path):
+    global document_path
+    document_path = file_path
+
+def start_autosave(editor, file_path):
+    global autosave
+    if autosave is not None:
+        autosave.stop()
+    autosave = None
+    if autosave_enabled.get():
+        # Compactions keep the file's layout
+        autosave = Autosave(editor.master, editor.model, file_path, pretty=looks_pretty(file_path),
+                            on_written=lambda data: watcher.written(data) if watcher is not None else None).start()
+
+def start_watcher(editor, file_path, base=None):
+    from dictedit2.file_watcher import FileWatcher
+
+    global watcher
+    if watcher is not None:
+        watcher.stop()
+    watcher = FileWatcher(editor, file_path, base, on_conflict=resolve_conflicts, on_rebased=rebase_autosave).start()
+
+def rebase_autosave(base):
+    if autosave is not None:
+        autosave.rebase(base)
+
+def resolve_conflicts(changes):
+    paths = [change.path for change in changes]
+    listing = "\n".join("/".join(map(str, path)) or "/" for path in paths[:10])
+    if len(paths) > 10:
+        listing += f"\n\u2026 and {len(paths) - 10} more"
+    if messagebox.askyesno(
+            "File changed on disk",
+            f"These paths were changed both here and in the file:\n\n{listing}\n\nTake the file's version?"):
+        for path in paths:
+            watcher.accept(path)
+    else:
+        for path in paths:
+            watcher.dismiss(path)
+
+def attach_schema(editor):
+    global validator
+    file_path = filedialog.askopenfilename(filetypes=[("JSON Schema", "*.json"), ("All files", "*")])
+    if not file_path:
+        return
+    try:
+        schema = Schema.load(file_path)
+    except (OSError, ValueError) as e:
+        messagebox.showerror("Schema", f"Cannot load {file_path}: {e}")
+        return
+    detach_schema()
+    validator = SchemaValidator(editor, schema).start()
+    logger.info(f"Validating against {file_path}")
+
+def detach_schema():
+    global validator
+    if validator is not None:
+        validator.stop()
+        validator = None
+
+def toggle_autosave():
+    global autosave
+    if autosave_enabled.get():
+        if autosave is None and document_path is not None:
+            if editor.model.history.can_undo:
+                # The journal replays onto the file as it is on disk, which misses the edits made so far
+                logger.info("Autosave starts with the next import")
+            else:
+                start_autosave(editor, document_path)
+        return
+    if autosave is not None:
+        # The file is only written by an explicit Export again; journaled edits are dropped with the journal
+        autosave.stop()
+        autosave.journal.discard()
+        autosave = None
+
+def on_close():
+    remember_view(editor)
+    if autosave is not None and autosave.active:
+        autosave.finish()
+    root.destroy()
 
 def add_custom_button(editor, frame):
     def custom_action():
@@ -34,6 +269,11 @@ def add_custom_button(editor, frame):
     custom_button = tk.Button(frame, text="Custom Action", command=custom_action, bg="lightgrey")
     custom_button.pack(side=tk.LEFT, padx=5, pady=5)
 
+def show_render_stats(editor):
+    from dictedit2.renderers.stats_panel import RenderStatsWindow
+
+    RenderStatsWindow(editor.master, editor)
+
 # Sample data for testing
 sample_data = {
     "name": "Example",
@@ -63,25 +303,82 @@ sample_data = {
     ]
 }
 
-# Initialize Tkinter
-root = tk.Tk()
-root.title("Enhanced Data Editor")
+def window_size(text):
+    try:
+        width, height = (int(part) for part in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got '{text}'") from None
+    return width, height
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="dictedit2", description="Edit JSON documents as a tree.")
+    parser.add_argument("file", nargs="?", help="JSON file to open (a sample document if left out)")
+    parser.add_argument("--size", type=window_size, default=(800, 600), metavar="WIDTHxHEIGHT",
+                        help="size of the tree view (default: 800x600)")
+    parser.add_argument("--log-level", type=str.upper, default="WARNING",
+                        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"], help="default: WARNING")
+    parser.add_argument("--virtual", action="store_true", help="only create widgets for visible rows (large documents)")
+    parser.add_argument("--autosave", action="store_true",
+                        help="journal every edit and write it back into the opened file (default: off)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Entry point of the dictedit2 command."""
+    global root, editor, autosave_enabled
+    args = parse_args(argv)
+    # Configured here, not on import, so embedding applications keep their own logging setup
+    logging.basicConfig(level=args.log_level, format=LOG_FORMAT)
+
+    # Initialize Tkinter
+    root = tk.Tk()
+    root.title("Enhanced Data Editor")
+    root.protocol("WM_DELETE_WINDOW", on_close)
+    autosave_enabled = tk.BooleanVar(root, value=args.autosave)
+
+    # Create editor instance
+    editor = DataEditor(root, {} if args.file else sample_data, callbacks={"on_patch": on_patch},
+                        window_size=args.size, virtual=args.virtual)
+
+    # Search box above the tree
+    search_bar = SearchBar(root, editor)
+    search_bar.pack(side=tk.TOP, fill=tk.X, before=editor.canvas)
+    root.bind("<Control-f>", lambda e: search_bar.entry.focus_set())
+    root.bind("<Control-z>", lambda e: editor.handle_shortcut(editor.undo))
+    root.bind("<Control-y>", lambda e: editor.handle_shortcut(editor.redo))
+
+    # Add menu for export/import functionality
+    menu_bar = tk.Menu(root)
+    file_menu = tk.Menu(menu_bar, tearoff=0)
+    file_menu.add_command(label="Export", command=lambda: export_data(editor))
+    file_menu.add_command(label="Export (compact)", command=lambda: export_data(editor, pretty=False))
+    file_menu.add_command(label="Import", command=lambda: import_data(editor))
+    file_menu.add_command(label="Open large file\u2026", command=lambda: open_large_file(editor))
+    file_menu.add_command(label="Compare with file\u2026", command=lambda: compare_with_file(editor))
+    file_menu.add_checkbutton(label="Autosave", variable=autosave_enabled, command=toggle_autosave)
+    menu_bar.add_cascade(label="File", menu=file_menu)
+    edit_menu = tk.Menu(menu_bar, tearoff=0)
+    edit_menu.add_command(label="Undo", accelerator="Ctrl+Z", command=editor.undo)
+    edit_menu.add_command(label="Redo", accelerator="Ctrl+Y", command=editor.redo)
+    edit_menu.add_separator()
+    edit_menu.add_command(label="Attach schema\u2026", command=lambda: attach_schema(editor))
+    edit_menu.add_command(label="Detach schema", command=detach_schema)
+    menu_bar.add_cascade(label="Edit", menu=edit_menu)
+    view_menu = tk.Menu(menu_bar, tearoff=0)
+    view_menu.add_command(label="Render statistics\u2026", command=lambda: show_render_stats(editor))
+    menu_bar.add_cascade(label="View", menu=view_menu)
+    root.config(menu=menu_bar)
 
-# Create editor instance
-editor = DataEditor(root, sample_data, callbacks={"on_data_changed": on_data_changed}, window_size=(800, 600))
+    # Add custom button
+    control_frame = tk.Frame(root, bg="white")
+    control_frame.pack(side=tk.BOTTOM, fill=tk.X)
+    add_custom_button(editor, control_frame)
 
-# Add menu for export/import functionality
-menu_bar = tk.Menu(root)
-file_menu = tk.Menu(menu_bar, tearoff=0)
-file_menu.add_command(label="Export", command=lambda: export_data(editor.data))
-file_menu.add_command(label="Import", command=lambda: import_data(editor))
-menu_bar.add_cascade(label="File", menu=file_menu)
-root.config(menu=menu_bar)
+    if args.file:
+        # Once the window is up, so the progress window has a parent to show over
+        root.after_idle(import_file, editor, args.file)
 
-# Add custom button
-control_frame = tk.Frame(root, bg="white")
-control_frame.pack(side=tk.BOTTOM, fill=tk.X)
-add_custom_button(editor, control_frame)
+    # Start main loop
+    root.mainloop()
 
-# Start main loop
-root.mainloop()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
\ No newline at end of file
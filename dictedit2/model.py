@@ -0,0 +1,377 @@
+import logging
+from contextlib import contextmanager
+
+from dictedit2.changes import json_pointer
+from dictedit2.history import History
+from dictedit2.json_io import snapshot
+from dictedit2.lazy_json import Unloaded
+from dictedit2.node_index import NodeIndex
+from dictedit2.operations import Insert, Remove, RenameKey, ReplaceContents, SetValue, resolve
+from dictedit2.query import compile_query
+from dictedit2.render_tree import build_render_tree
+from dictedit2.schema import parse_bool, parse_scalar
+from dictedit2.search import SearchIndex
+
+logger = logging.getLogger(__name__)
+
+
+def _edit_order(path):
+    """Sort key for paths that orders list positions by number and dict keys of any type."""
+    return tuple((0, key) if isinstance(key, int) else (1, str(key)) for key in path)
+
+
+class TypeConverter:
+    """Handles type conversions for editor values."""
+    @staticmethod
+    def convert_to_type(value, target_type):
+        """Convert `value` to `target_type`, or return it unchanged if it does not convert.
+
+        Text for a bool must be a yes/no word: ValueError is raised for anything else, so a
+        typo never turns a flag into a string.
+        """
+        if isinstance(value, str) and target_type is bool:
+            # bool() is True for any non-empty text, "false" included
+            return parse_bool(value)
+        try:
+            if isinstance(value, str):
+                if target_type is type(None):
+                    # A placeholder takes the type of what is typed into it
+                    return parse_scalar(value)
+            return target_type(value)
+        except (ValueError, TypeError):
+            logger.warning(f"Cannot convert value '{value}' to {target_type.__name__}.")
+            return value
+
+
+class Transaction:
+    """Edits applied inside `DocumentModel.transaction`, kept for one history entry or a rollback."""
+    def __init__(self, label):
+        self.label = label
+        self.inverses = []
+        self.patches = []
+
+    def rollback(self, data, index):
+        """Undo every edit of the transaction; returns the patches describing the rollback."""
+        patches = []
+        for inverse in reversed(self.inverses):
+            patches.append(inverse.patch(inverse.apply(data, index)))
+        self.inverses = []
+        self.patches = []
+        return patches
+
+
+class DocumentModel:
+    """The edited document without any GUI: data, node index, undo history and expansion state.
+
+    Every edit goes through `apply`, which records the inverse for undo and reports a
+    JSON-Patch style delta to each callable in `listeners`. Edit methods return the
+    applied operation (None when nothing changed) so a view knows what to re-render.
+    """
+    def __init__(self, data, expand_depth=1):
+        self.expand_depth = expand_depth
+        self.history = History()
+        self.listeners = []
+        self.search_index = SearchIndex(self)
+        self._transaction = None
+        # LazyDocument the data was loaded from when editing a file out of core
+        self.backend = None
+        # Schema edited values are converted by and checked against, see SchemaValidator
+        self.schema = None
+        self._set_document(data)
+
+    def load(self, data, index=None, expanded=None):
+        """Replace the document; `index` may be a NodeIndex built elsewhere (e.g. off the UI thread).
+
+        `expanded` restores expand/collapse choices (by node ID of `index`) saved earlier.
+        """
+        old_data = self.data
+        self._set_document(data, index)
+        if expanded:
+            self.expanded.update(expanded)
+        # Its own op: an edit that replaces the root contents reports a "replace" at "" too
+        self._emit([{"op": "load", "path": "", "old": old_data, "value": data}])
+
+    def _set_document(self, data, index=None):
+        self.data = data
+        self.index = index if index is not None else NodeIndex(data)
+        # Explicit expand/collapse choices, keyed by node ID so they survive insertions
+        self.expanded = {}
+        # SearchResults restricting the rendered nodes to matches and their ancestors
+        self.filter = None
+        self.history.clear()
+
+    def get(self, path):
+        return resolve(self.data, path)
+
+    def path_of(self, node_id):
+        return self.index.path(node_id)
+
+    def value_of(self, node_id):
+        return self.index.value(node_id)
+
+    def is_expanded(self, path):
+        try:
+            node_id = self.index.id_at(path)
+        except KeyError:
+            return False
+        if self.filter is not None and path in self.filter.ancestors:
+            return self.expanded.get(node_id, True)
+        return self.expanded.get(node_id, len(path) < self.expand_depth)
+
+    def set_expanded(self, path, expanded):
+        """Returns True if the expansion state actually changed."""
+        if self.is_expanded(path) == expanded:
+            return False
+        self.expanded[self.index.id_at(path)] = expanded
+        return True
+
+    def is_visible(self, path):
+        """False for nodes hidden by the filter; descendants of a match stay visible."""
+        if self.filter is None or path in self.filter.visible:
+            return True
+        return any(path[:depth] in self.filter.matches for depth in range(len(path)))
+
+    def search(self, query, regex=False, case_sensitive=False, keys=True, values=True):
+        return self.search_index.search(query, regex, case_sensitive, keys, values)
+
+    def set_filter(self, results):
+        """Show only the paths in `results` (None shows everything again)."""
+        self.filter = results
+        if results is not None:
+            # Reveal every match, even below containers the user collapsed earlier
+            for path in results.ancestors:
+                self.expanded.pop(self.index.id_at(path), None)
+
+    def refresh_filter(self):
+        """Re-run the filter query after edits; returns True if the filter was stale."""
+        if self.filter is None or self.filter.generation == self.search_index.generation:
+            return False
+        self.set_filter(self.search_index.search(self.filter.query, *self.filter.options))
+        return True
+
+    def materialize(self, path):
+        """Parse the `Unloaded` container at `path` in place; returns the value at `path`.
+
+        Loading is not an edit: it is not recorded for undo and listeners are not told.
+        """
+        path = tuple(path)
+        value = self.get(path)
+        if not isinstance(value, Unloaded):
+            return value
+        loaded = value.load()
+        if path:
+            self.get(path[:-1])[path[-1]] = loaded
+        else:
+            self.data = loaded
+        self.index.on_load(path, loaded)
+        if self.search_index.built:
+            self.search_index.reindex(path)
+        logger.debug(f"Loaded {loaded.__class__.__name__} with {len(loaded)} member(s) at {path}")
+        return loaded
+
+    def render_tree(self, path=()):
+        is_visible = self.is_visible if self.filter is not None else None
+        return build_render_tree(self.get(path), self.is_expanded, self.index, path, is_visible, self.materialize)
+
+    @property
+    def in_transaction(self):
+        return self._transaction is not None
+
+    @contextmanager
+    def transaction(self, label="batch", undoable=True):
+        """Group the edits made in the block into one undo entry and one listener call.
+
+        Edits apply immediately, so later ones see earlier ones. If the block raises, all of
+        them are rolled back and listeners hear nothing. Nested transactions join the outer one.
+        With `undoable=False` the edits are not added to the undo history (e.g. a data feed).
+        """
+        if self._transaction is not None:
+            yield self._transaction
+            return
+
+        transaction = self._transaction = Transaction(label)
+        try:
+            yield transaction
+        except BaseException:
+            self._transaction = None
+            patches = transaction.rollback(self.data, self.index)
+            # Rolled-back removals come back under new node IDs, which the search index must see
+            self.search_index.on_patches(patches)
+            logger.debug(f"Rolled back {len(patches)} operation(s) of '{label}'")
+            raise
+        self._transaction = None
+        if undoable:
+            self.history.record(transaction.inverses, label)
+        if transaction.patches:
+            self._emit(transaction.patches)
+
+    def apply(self, operation, label=None):
+        inverse = operation.apply(self.data, self.index)
+        self._record(inverse, label or type(operation).__name__, operation.patch(inverse))
+        return operation
+
+    def _record(self, inverse, label, patch):
+        if self._transaction is not None:
+            self._transaction.inverses.append(inverse)
+            self._transaction.patches.append(patch)
+            return
+        self.history.record([inverse], label)
+        self._emit([patch])
+
+    def undo(self):
+        if self._transaction is not None:
+            raise RuntimeError("Cannot undo inside a transaction.")
+        entry = self.history.undo(self.data, self.index)
+        if entry is not None:
+            self._emit(entry.patches())
+        return entry
+
+    def redo(self):
+        if self._transaction is not None:
+            raise RuntimeError("Cannot redo inside a transaction.")
+        entry = self.history.redo(self.data, self.index)
+        if entry is not None:
+            self._emit(entry.patches())
+        return entry
+
+    def set_value(self, path, value, convert=True):
+        """Set a scalar; raises ValueError if the value breaks the schema for `path`."""
+        current_value = self.get(path)
+        rule = self.schema.rule(path) if self.schema is not None else None
+        if convert and isinstance(value, str) and rule is not None and rule.converts:
+            value = rule.convert(value)
+        elif convert:
+            value = TypeConverter.convert_to_type(value, type(current_value))
+        if rule is not None:
+            problems = rule.problems(value)
+            if problems:
+                raise ValueError(f"{'/'.join(map(str, path))}: {problems[0]}")
+
+        if current_value == value:
+            logger.debug("No change in value, skipping update.")
+            return None
+        return self.apply(SetValue(path, value))
+
+    def rename_key(self, path, new_key):
+        if new_key in self.get(path[:-1]):
+            if self._transaction is not None:
+                # A skipped edit would break the all-or-nothing promise of the transaction
+                raise KeyError(f"Key '{new_key}' already exists in parent data.")
+            logger.error(f"Key '{new_key}' already exists in parent data.")
+            return None
+        return self.apply(RenameKey(path, new_key))
+
+    def unique_key(self, path, base_key="new_key"):
+        existing_keys = self.get(path)
+        counter = 1
+        new_key = f"{base_key}_{counter}"
+        while new_key in existing_keys:
+            counter += 1
+            new_key = f"{base_key}_{counter}"
+        return new_key
+
+    def add_key(self, path, base_key="new_key", value=""):
+        return self.apply(Insert(tuple(path) + (self.unique_key(path, base_key),), value))
+
+    def insert_item(self, path, value=None):
+        return self.apply(Insert(path, value))
+
+    def remove(self, path):
+        return self.apply(Remove(path))
+
+    def update(self, path, update_func):
+        """Apply an arbitrary in-place edit to the container at `path`."""
+        data = self.get(path)
+        previous_state = data.copy() if isinstance(data, dict) else list(data)
+        try:
+            update_func(data)
+        except Exception:
+            # Do not leave a half-applied edit behind
+            ReplaceContents(path, previous_state).apply(self.data)
+            raise
+
+        if data == previous_state:
+            logger.debug("No changes detected, skipping re-render.")
+            return None
+
+        # Recorded as a contents swap of this one container
+        self.index.on_replace(path)
+        patch = {"op": "replace", "path": json_pointer(path), "old": previous_state, "value": data}
+        self._record(ReplaceContents(path, previous_state), "update_data", patch)
+        logger.debug(f"Data updated at path {path}")
+        return ReplaceContents(path, data)
+
+    def select(self, query):
+        """Paths matching a JSONPath-like `query` (text or a compiled Query), see compile_query.
+
+        Unloaded containers the query has to look into are parsed.
+        """
+        if isinstance(query, str):
+            query = compile_query(query)
+        return query.paths(self.data, self.materialize)
+
+    def _select_for_edit(self, query, action, outermost=False):
+        """Matches of `query` deepest first, so each edit leaves the remaining paths valid."""
+        paths = self.select(query)
+        if () in paths:
+            raise ValueError(f"Cannot {action} the document root.")
+        if outermost:
+            # Edits of a match replace or remove everything below it
+            selected = set(paths)
+            paths = [path for path in paths if not any(path[:depth] in selected for depth in range(1, len(path)))]
+        # Later list positions first; dicts may mix key types, e.g. {1: ..., "b": ...}
+        return sorted(set(paths), key=_edit_order, reverse=True)
+
+    def set_all(self, query, value, label="set all"):
+        """Set every match of `query` to `value` in one transaction; returns the applied operations.
+
+        Container values are copied for each match. Raises ValueError, with nothing applied,
+        if the value breaks the schema at any match.
+        """
+        operations = []
+        with self.transaction(label):
+            for path in self._select_for_edit(query, "set", outermost=True):
+                operation = self.set_value(path, snapshot(value), convert=False)
+                if operation is not None:
+                    operations.append(operation)
+        return operations
+
+    def delete_all(self, query, label="delete all"):
+        """Remove every match of `query` in one transaction; returns the applied operations."""
+        with self.transaction(label):
+            return [self.remove(path) for path in self._select_for_edit(query, "delete", outermost=True)]
+
+    def rename_all(self, query, new_key, label="rename all"):
+        """Rename every matching dict key to `new_key`, or to `new_key(old_key)` if it is callable.
+
+        Raises ValueError if a match is not a dict key and KeyError if a new name is taken;
+        either way nothing is applied.
+        """
+        operations = []
+        with self.transaction(label):
+            for path in self._select_for_edit(query, "rename"):
+                if not isinstance(self.get(path[:-1]), dict):
+                    raise ValueError(f"{'/'.join(map(str, path))} is not a dict key.")
+                key = new_key(path[-1]) if callable(new_key) else new_key
+                if key != path[-1]:
+                    operations.append(self.rename_key(path, key))
+        return operations
+
+    def transform_all(self, query, func, label="transform all"):
+        """Replace every match of `query` by `func(value)` in one transaction; returns the applied operations.
+
+        `func` gets a copy of container values, so it may change and return it. Deeper
+        matches are transformed first. Anything `func` raises rolls back the whole transform.
+        """
+        operations = []
+        with self.transaction(label):
+            for path in self._select_for_edit(query, "transform"):
+                operation = self.set_value(path, func(snapshot(self.materialize(path))), convert=False)
+                if operation is not None:
+                    operations.append(operation)
+        return operations
+
+    def _emit(self, patches):
+        # A copy: listeners may remove themselves, e.g. a backend detaching when a document is loaded
+        for listener in list(self.listeners):
+            listener(patches)
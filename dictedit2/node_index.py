@@ -0,0 +1,235 @@
+import itertools
+import logging
+
+from dictedit2.changes import unescape_pointer
+
+logger = logging.getLogger(__name__)
+
+
+class Node:
+    """Index entry for a single value in the document."""
+    __slots__ = ("node_id", "parent", "key", "obj", "children")
+
+    def __init__(self, node_id, parent, key):
+        self.node_id = node_id
+        self.parent = parent
+        # Dict key or current list position within the parent container
+        self.key = key
+        # The dict/list itself for container nodes, None for scalars
+        self.obj = None
+        # {key: Node} for dicts, [Node] for lists, None for scalars
+        self.children = None
+
+
+class NodeIndex:
+    """Maps stable node IDs to their parent container and current path.
+
+    IDs stay valid while the document is edited through the on_* hooks, so widgets can
+    refer to a node by ID instead of a positional path that shifts when items are inserted.
+    """
+    def __init__(self, data):
+        self._ids = itertools.count()
+        # Called with each container whose members an on_* hook reports changed, as the edit is applied
+        self.on_change = None
+        self.rebuild(data)
+
+    def rebuild(self, data):
+        self.data = data
+        self.nodes = {}
+        self.root = self._index(data, None, None)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __contains__(self, node_id):
+        return node_id in self.nodes
+
+    def node_at(self, path):
+        node = self.root
+        try:
+            for segment in path:
+                node = node.children[segment]
+        except (KeyError, IndexError, TypeError):
+            raise KeyError(tuple(path)) from None
+        return node
+
+    def id_at(self, path):
+        return self.node_at(path).node_id
+
+    def existing_path(self, pointer):
+        """Longest prefix of the JSON pointer `pointer` that exists in the document, as a path tuple."""
+        node = self.root
+        path = ()
+        for segment in unescape_pointer(pointer):
+            children = node.children
+            if isinstance(children, list):
+                if not segment.isdigit() or int(segment) >= len(children):
+                    break
+                key = int(segment)
+            elif isinstance(children, dict) and segment in children:
+                key = segment
+            else:
+                break
+            node = children[key]
+            path += (key,)
+        return path
+
+    def path(self, node_id):
+        node = self.nodes[node_id]
+        keys = []
+        while node.parent is not None:
+            keys.append(node.key)
+            node = node.parent
+        return tuple(reversed(keys))
+
+    def value(self, node_id):
+        node = self.nodes[node_id]
+        if node.obj is not None:
+            return node.obj
+        return node.parent.obj[node.key]
+
+    def child_ids(self, node_id):
+        children = self.nodes[node_id].children
+        if children is None:
+            return []
+        if isinstance(children, dict):
+            return [child.node_id for child in children.values()]
+        return [child.node_id for child in children]
+
+    def on_set(self, container_path, key, value):
+        """`container[key] = value` was applied; scalars keep their node ID."""
+        parent = self.node_at(container_path)
+        self._changed(parent)
+        old = parent.children[key] if isinstance(parent.children, list) or key in parent.children else None
+        if old is not None and old.obj is None and not isinstance(value, (dict, list)):
+            return old.node_id
+
+        if old is not None:
+            self._drop(old)
+        node = self._index(value, parent, key)
+        parent.children[key] = node
+        return node.node_id
+
+    def on_insert(self, container_path, index, value):
+        """`container.insert(index, value)` was applied to a list."""
+        parent = self.node_at(container_path)
+        self._changed(parent)
+        node = self._index(value, parent, index)
+        parent.children.insert(index, node)
+        self._renumber(parent, index + 1)
+        return node.node_id
+
+    def on_remove(self, container_path, key):
+        """`key` was removed from a dict, or the item at position `key` from a list."""
+        parent = self.node_at(container_path)
+        self._changed(parent)
+        node = parent.children.pop(key)
+        self._drop(node)
+        if isinstance(parent.children, list):
+            self._renumber(parent, key)
+
+    def on_rename(self, container_path, old_key, new_key):
+        """A dict key was renamed; the value keeps its node ID and moves to the end."""
+        parent = self.node_at(container_path)
+        self._changed(parent)
+        node = parent.children.pop(old_key)
+        node.key = new_key
+        parent.children[new_key] = node
+
+    def _changed(self, node):
+        if self.on_change is not None:
+            self.on_change(node.obj)
+
+    def on_load(self, path, value):
+        """The stand-in at `path` was replaced by the parsed container `value`; the node keeps its ID."""
+        node = self.node_at(path)
+        loaded = self._index(value, node.parent, node.key)
+        del self.nodes[loaded.node_id]
+        node.obj = loaded.obj
+        node.children = loaded.children
+        for child in (node.children.values() if isinstance(node.children, dict) else node.children or ()):
+            child.parent = node
+
+    def on_replace(self, container_path):
+        """The container at `container_path` was changed arbitrarily in place.
+
+        Children whose key and value identity are unchanged keep their IDs.
+        """
+        parent = self.node_at(container_path)
+        self._changed(parent)
+        container = parent.obj
+        old_children = parent.children
+
+        if isinstance(container, dict):
+            old_by_key = old_children if isinstance(old_children, dict) else {}
+            items = container.items()
+            parent.children = {}
+        else:
+            old_by_key = dict(enumerate(old_children)) if isinstance(old_children, list) else {}
+            items = enumerate(container)
+            parent.children = []
+
+        for key, value in items:
+            old = old_by_key.pop(key, None)
+            if old is not None and old.obj is None and not isinstance(value, (dict, list)):
+                node = old
+            elif old is not None and old.obj is value:
+                node = old
+            else:
+                if old is not None:
+                    self._drop(old)
+                node = self._index(value, parent, key)
+            node.key = key
+            if isinstance(parent.children, dict):
+                parent.children[key] = node
+            else:
+                parent.children.append(node)
+
+        for old in old_by_key.values():
+            self._drop(old)
+
+    def _renumber(self, parent, start):
+        for position in range(start, len(parent.children)):
+            parent.children[position].key = position
+
+    def _new_node(self, parent, key):
+        node = Node(next(self._ids), parent, key)
+        self.nodes[node.node_id] = node
+        return node
+
+    def _index(self, item, parent, key):
+        # The hot loop of opening a document: _new_node is inlined and scalars never go on the stack.
+        # IDs are handed out in the same order either way, so a rebuild of the same data gives the same IDs.
+        nodes = self.nodes
+        next_id = self._ids.__next__
+        root = self._new_node(parent, key)
+        stack = [(root, item)] if isinstance(item, (dict, list)) else []
+        while stack:
+            node, value = stack.pop()
+            node.obj = value
+            if isinstance(value, dict):
+                children = node.children = {}
+                for child_key, child_value in value.items():
+                    child_id = next_id()
+                    child = nodes[child_id] = children[child_key] = Node(child_id, node, child_key)
+                    if isinstance(child_value, (dict, list)):
+                        stack.append((child, child_value))
+            else:
+                children = node.children = []
+                for position, child_value in enumerate(value):
+                    child_id = next_id()
+                    child = nodes[child_id] = Node(child_id, node, position)
+                    children.append(child)
+                    if isinstance(child_value, (dict, list)):
+                        stack.append((child, child_value))
+        return root
+
+    def _drop(self, node):
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            self.nodes.pop(current.node_id, None)
+            if isinstance(current.children, dict):
+                stack.extend(current.children.values())
+            elif current.children:
+                stack.extend(current.children)
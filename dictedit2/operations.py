@@ -0,0 +1,255 @@
+import logging
+
+from dictedit2.changes import json_pointer, unescape_pointer
+
+logger = logging.getLogger(__name__)
+
+
+def resolve(data, path):
+    for segment in path:
+        data = data[segment]
+    return data
+
+
+def common_path(paths):
+    """Longest path that is a prefix of every path in `paths`."""
+    paths = list(paths)
+    if not paths:
+        return ()
+    prefix = paths[0]
+    for path in paths[1:]:
+        length = 0
+        for a, b in zip(prefix, path):
+            if a != b:
+                break
+            length += 1
+        prefix = prefix[:length]
+    return tuple(prefix)
+
+
+def _move_key(container, key, position):
+    """Move `key` of a dict to `position` in its key order, keeping all values."""
+    items = list(container.items())
+    current = next(i for i, (k, _) in enumerate(items) if k == key)
+    items.insert(position, items.pop(current))
+    container.clear()
+    container.update(items)
+
+
+def _parent_and_key(data, pointer):
+    container = data
+    segments = unescape_pointer(pointer)
+    for segment in segments[:-1]:
+        container = container[int(segment) if isinstance(container, list) else segment]
+    key = segments[-1]
+    return container, int(key) if isinstance(container, list) else key
+
+
+def apply_patch(data, patch):
+    """Apply one patch as emitted by DocumentModel to `data`; returns the (possibly new) root.
+
+    The optional "position" member of dict adds and moves restores the key order.
+    """
+    op = patch["op"]
+    if patch["path"] == "":
+        if op not in ("replace", "add", "load"):
+            raise ValueError(f"Cannot {op} the document root.")
+        return patch["value"]
+
+    if op == "move":
+        source, source_key = _parent_and_key(data, patch["from"])
+        value = source.pop(source_key)
+    else:
+        value = patch.get("value")
+    container, key = _parent_and_key(data, patch["path"])
+
+    if op in ("remove", "replace"):
+        if isinstance(container, dict) and key not in container:
+            raise KeyError(key)
+        if op == "remove":
+            container.pop(key)
+        else:
+            container[key] = value
+    elif op in ("add", "move"):
+        if isinstance(container, list):
+            container.insert(key, value)
+        else:
+            container[key] = value
+            position = patch.get("position")
+            if position is not None and position < len(container) - 1:
+                _move_key(container, key, position)
+    else:
+        raise ValueError(f"Unknown patch operation '{op}'.")
+    return data
+
+
+class Operation:
+    """A reversible edit of the document.
+
+    `apply(data, index)` performs the edit, keeps the optional NodeIndex in sync and
+    returns the inverse operation. Operations hold references to values, never copies,
+    so an undo history costs memory proportional to the edits, not the document.
+    """
+    def __init__(self, path):
+        self.path = tuple(path)
+
+    @property
+    def container_path(self):
+        return self.path[:-1]
+
+    @property
+    def key(self):
+        return self.path[-1]
+
+    @property
+    def render_path(self):
+        """Deepest path whose subtree has to be re-rendered after this operation."""
+        return self.container_path
+
+    def apply(self, data, index=None):
+        raise NotImplementedError
+
+    def patch(self, inverse):
+        """JSON-Patch style description of this operation, given the inverse `apply` returned."""
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.path!r})"
+
+    def __eq__(self, other):
+        return type(self) is type(other) and vars(self) == vars(other)
+
+
+class SetValue(Operation):
+    """Replace the value at `path`."""
+    def __init__(self, path, value):
+        super().__init__(path)
+        self.value = value
+
+    @property
+    def render_path(self):
+        return self.path
+
+    def apply(self, data, index=None):
+        container = resolve(data, self.container_path)
+        old_value = container[self.key]
+        container[self.key] = self.value
+        if index is not None:
+            index.on_set(self.container_path, self.key, self.value)
+        return SetValue(self.path, old_value)
+
+    def patch(self, inverse):
+        return {"op": "replace", "path": json_pointer(self.path), "old": inverse.value, "value": self.value}
+
+
+class Insert(Operation):
+    """Insert `value` into a list at position `path[-1]`, or add the dict key `path[-1]`.
+
+    For dicts, `position` places the new key in the key order (default: last).
+    """
+    def __init__(self, path, value, position=None):
+        super().__init__(path)
+        self.value = value
+        self.position = position
+
+    def apply(self, data, index=None):
+        container = resolve(data, self.container_path)
+        if isinstance(container, list):
+            container.insert(self.key, self.value)
+            if index is not None:
+                index.on_insert(self.container_path, min(self.key, len(container) - 1), self.value)
+            return Remove(self.container_path + (min(self.key, len(container) - 1),))
+
+        if self.key in container:
+            raise KeyError(f"Key '{self.key}' already exists.")
+        container[self.key] = self.value
+        if self.position is not None and self.position < len(container) - 1:
+            _move_key(container, self.key, self.position)
+            if index is not None:
+                index.on_replace(self.container_path)
+        elif index is not None:
+            index.on_set(self.container_path, self.key, self.value)
+        return Remove(self.path)
+
+    def patch(self, inverse):
+        patch = {"op": "add", "path": json_pointer(inverse.path), "value": self.value}
+        if self.position is not None:
+            patch["position"] = self.position
+        return patch
+
+
+class Remove(Operation):
+    """Remove the list item or dict key at `path`."""
+    def apply(self, data, index=None):
+        container = resolve(data, self.container_path)
+        if isinstance(container, list):
+            old_value = container.pop(self.key)
+            position = None
+        else:
+            if self.key not in container:
+                raise KeyError(self.key)
+            position = list(container).index(self.key)
+            old_value = container.pop(self.key)
+        if index is not None:
+            index.on_remove(self.container_path, self.key)
+        return Insert(self.path, old_value, position)
+
+    def patch(self, inverse):
+        return {"op": "remove", "path": json_pointer(self.path), "old": inverse.value}
+
+
+class RenameKey(Operation):
+    """Rename the dict key at `path` to `new_key`.
+
+    The renamed key moves to the end unless `position` is given (used by undo).
+    """
+    def __init__(self, path, new_key, position=None):
+        super().__init__(path)
+        self.new_key = new_key
+        self.position = position
+
+    def apply(self, data, index=None):
+        container = resolve(data, self.container_path)
+        if self.new_key in container:
+            raise KeyError(f"Key '{self.new_key}' already exists.")
+        old_position = list(container).index(self.key)
+        container[self.new_key] = container.pop(self.key)
+        if index is not None:
+            index.on_rename(self.container_path, self.key, self.new_key)
+        if self.position is not None and self.position < len(container) - 1:
+            _move_key(container, self.new_key, self.position)
+            if index is not None:
+                index.on_replace(self.container_path)
+        return RenameKey(self.container_path + (self.new_key,), self.key, old_position)
+
+    def patch(self, inverse):
+        patch = {"op": "move", "from": json_pointer(self.path), "path": json_pointer(inverse.path)}
+        if self.position is not None:
+            patch["position"] = self.position
+        return patch
+
+
+class ReplaceContents(Operation):
+    """Replace the whole contents of the container at `path` (an arbitrary in-place edit)."""
+    def __init__(self, path, contents):
+        super().__init__(path)
+        self.contents = contents
+
+    @property
+    def render_path(self):
+        return self.path
+
+    def apply(self, data, index=None):
+        container = resolve(data, self.path)
+        old_contents = container.copy()
+        container.clear()
+        if isinstance(container, dict):
+            container.update(self.contents)
+        else:
+            container.extend(self.contents)
+        if index is not None:
+            index.on_replace(self.path)
+        return ReplaceContents(self.path, old_contents)
+
+    def patch(self, inverse):
+        return {"op": "replace", "path": json_pointer(self.path), "old": inverse.contents, "value": self.contents}
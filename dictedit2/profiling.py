@@ -0,0 +1,221 @@
+import json
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+from dictedit2.changes import json_pointer
+
+logger = logging.getLogger(__name__)
+
+# Where render time goes: walking the model (filters, parsing out-of-core containers),
+# picking renderers, building widgets, and Tk geometry management
+PHASES = ("model", "dispatch", "build", "layout")
+
+
+class NullProfiler:
+    """Stand-in used while profiling is off; every hook is a no-op."""
+    enabled = False
+    _null = nullcontext()
+
+    def render(self, path):
+        return self._null
+
+    def phase(self, name):
+        return self._null
+
+    def node(self, path):
+        return self._null
+
+    def label(self, renderer):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+def _new_cprofile():
+    # Imported on first use, so the editor does not load cProfile at startup
+    import cProfile
+    return cProfile.Profile()
+
+
+def _trim(table, limit, seconds=lambda value: value):
+    """Keep the costliest half of `table` once it holds `limit` entries."""
+    if len(table) >= limit:
+        ranked = sorted(table.items(), key=lambda entry: seconds(entry[1]), reverse=True)
+        table.clear()
+        table.update(ranked[:limit // 2])
+
+
+class _Frame:
+    __slots__ = ("name", "path", "started", "widgets", "child_seconds", "child_widgets", "excluded")
+
+    def __init__(self, path, started, widgets):
+        self.name = "?"
+        self.path = path
+        self.started = started
+        self.widgets = widgets
+        self.child_seconds = 0.0
+        self.child_widgets = 0
+        # Time spent in explicit phases of this node, which is not widget building
+        self.excluded = 0.0
+
+
+class RenderProfiler:
+    """Records where the time of each render goes, per phase, renderer type and path.
+
+    Node costs are self costs: the time and widgets of a node exclude those of the child
+    nodes rendered inside it, so they add up to the totals. `widget_count()` returns a
+    running count of widgets handed out. With `cprofile`, renders also run under
+    cProfile, for `export_pstats`. At most `max_paths` paths and call stacks are kept; the
+    cheapest are dropped first, so long sessions on large documents stay bounded.
+    """
+    enabled = True
+
+    def __init__(self, widget_count=None, clock=time.perf_counter, history=200, cprofile=False, max_paths=10000):
+        self.widget_count = widget_count or (lambda: 0)
+        self.clock = clock
+        self.renders = deque(maxlen=history)
+        self.max_paths = max_paths
+        self.cprofile = _new_cprofile() if cprofile else None
+        self.reset()
+
+    def reset(self):
+        self.render_count = 0
+        self.totals = dict.fromkeys(PHASES, 0.0)
+        self.renders.clear()
+        # path -> [nodes, seconds, widgets]
+        self.paths = {}
+        # renderer class name -> [nodes, seconds, widgets]
+        self.renderers = {}
+        # folded call stack -> seconds, for flame graphs
+        self.stacks = {}
+        self._stack = []
+        self._current = None
+
+    @property
+    def last(self):
+        return self.renders[-1] if self.renders else None
+
+    @contextmanager
+    def render(self, path):
+        """Measure one render of the subtree at `path` (None: the whole tree)."""
+        if self._current is not None:
+            yield
+            return
+        record = {"path": None if path is None else json_pointer(path), "time": time.time(), "nodes": 0}
+        record.update(dict.fromkeys(PHASES, 0.0))
+        self._current = record
+        widgets = self.widget_count()
+        if self.cprofile is not None:
+            self.cprofile.enable()
+        start = self.clock()
+        try:
+            yield
+        finally:
+            record["seconds"] = self.clock() - start
+            if self.cprofile is not None:
+                self.cprofile.disable()
+            record["widgets"] = self.widget_count() - widgets
+            self._current = None
+            self._stack = []
+            self.renders.append(record)
+            self.render_count += 1
+            for phase in PHASES:
+                self.totals[phase] += record[phase]
+
+    @contextmanager
+    def phase(self, name):
+        start = self.clock()
+        try:
+            yield
+        finally:
+            elapsed = self.clock() - start
+            if self._current is not None:
+                self._current[name] += elapsed
+            if self._stack:
+                self._stack[-1].excluded += elapsed
+
+    @contextmanager
+    def node(self, path):
+        """Measure rendering the node at `path`, including its children."""
+        frame = _Frame(tuple(path), self.clock(), self.widget_count())
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            elapsed = self.clock() - frame.started
+            widgets = self.widget_count() - frame.widgets
+            if self._stack:
+                parent = self._stack[-1]
+                parent.child_seconds += elapsed
+                parent.child_widgets += widgets
+            self._record_node(frame, elapsed - frame.child_seconds - frame.excluded, widgets - frame.child_widgets)
+
+    def label(self, renderer):
+        """Name the innermost node after the renderer that draws it."""
+        if self._stack:
+            self._stack[-1].name = type(renderer).__name__
+
+    def _record_node(self, frame, seconds, widgets):
+        if self._current is not None:
+            self._current["build"] += seconds
+            self._current["nodes"] += 1
+        if frame.path not in self.paths:
+            _trim(self.paths, self.max_paths, lambda stats: stats[1])
+        for table, key in ((self.paths, frame.path), (self.renderers, frame.name)):
+            stats = table.setdefault(key, [0, 0.0, 0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] += widgets
+        names = [f"{outer.name} {json_pointer(outer.path) or '/'}" for outer in self._stack]
+        names.append(f"{frame.name} {json_pointer(frame.path) or '/'}")
+        # ';' separates frames in the folded format
+        stack = ";".join(name.replace(";", ",") for name in names)
+        if stack not in self.stacks:
+            _trim(self.stacks, self.max_paths)
+        self.stacks[stack] = self.stacks.get(stack, 0.0) + seconds
+
+    def top_paths(self, limit=20):
+        """The `limit` most expensive paths as (path, nodes, seconds, widgets), costliest first."""
+        ranked = sorted(self.paths.items(), key=lambda entry: entry[1][1], reverse=True)
+        return [(path, *stats) for path, stats in ranked[:limit]]
+
+    def to_dict(self, limit=100):
+        return {
+            "renders": self.render_count,
+            "phases": dict(self.totals),
+            "renderers": {
+                name: {"nodes": nodes, "seconds": seconds, "widgets": widgets}
+                for name, (nodes, seconds, widgets) in self.renderers.items()
+            },
+            "paths": [
+                {"path": json_pointer(path), "nodes": nodes, "seconds": seconds, "widgets": widgets}
+                for path, nodes, seconds, widgets in self.top_paths(limit)
+            ],
+            "recent": list(self.renders),
+        }
+
+    def export_json(self, file_path, limit=100):
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(limit), f, indent=2)
+        return file_path
+
+    def folded_stacks(self):
+        """Lines of "frame;frame;frame microseconds", as read by flamegraph.pl and speedscope."""
+        return [f"{stack} {round(seconds * 1e6)}" for stack, seconds in sorted(self.stacks.items())]
+
+    def export_folded(self, file_path):
+        with open(file_path, "w", encoding="utf-8") as f:
+            for line in self.folded_stacks():
+                f.write(line + "\n")
+        return file_path
+
+    def export_pstats(self, file_path):
+        """Write the cProfile statistics of all renders (requires `cprofile=True`)."""
+        if self.cprofile is None:
+            raise RuntimeError("Profiler was created without cprofile=True.")
+        self.cprofile.dump_stats(file_path)
+        return file_path
@@ -0,0 +1,324 @@
+import json
+import logging
+import re
+from functools import lru_cache
+
+from dictedit2.lazy_json import Unloaded
+
+logger = logging.getLogger(__name__)
+
+
+# Compiled queries kept by compile_query
+CACHE_SIZE = 256
+
+_NAME = re.compile(r"[^.\[\]\s()=!<>,'\"]+")
+_INTEGER = re.compile(r"-?\d+")
+_SLICE = re.compile(r"(-?\d*):(-?\d*)(?::(-?\d*))?")
+_LITERAL = re.compile(r"""'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?|true|false|null""")
+_OPERATOR = re.compile(r"==|!=|<=|>=|<|>")
+_SPACE = re.compile(r"\s*")
+
+
+def _compare(op, a, b):
+    # JSON tells 1 and true apart
+    if isinstance(a, bool) != isinstance(b, bool):
+        return op == "!="
+    try:
+        if op == "==":
+            return a == b
+        if op == "!=":
+            return a != b
+        if op == "<":
+            return a < b
+        if op == "<=":
+            return a <= b
+        if op == ">":
+            return a > b
+        return a >= b
+    except TypeError:
+        return False
+
+
+_MISSING = object()
+
+
+def _resolve_relative(value, segments):
+    """Value at `segments` below `value`, or `_MISSING`."""
+    for segment in segments:
+        if isinstance(value, dict) and not isinstance(segment, int):
+            if segment not in value:
+                return _MISSING
+        elif isinstance(value, list) and isinstance(segment, int):
+            if not -len(value) <= segment < len(value):
+                return _MISSING
+        else:
+            return _MISSING
+        value = value[segment]
+    return value
+
+
+class Filter:
+    """`?(@.a.b)` holds for children that have `a.b`; `?(@.a.b == 1)` compares it to a JSON literal."""
+    __slots__ = ("segments", "op", "literal")
+
+    def __init__(self, segments, op=None, literal=None):
+        self.segments = segments
+        self.op = op
+        self.literal = literal
+
+    def __call__(self, value):
+        found = _resolve_relative(value, self.segments)
+        if found is _MISSING:
+            return False
+        return self.op is None or _compare(self.op, found, self.literal)
+
+
+def _children(value, path):
+    if isinstance(value, dict):
+        return [(item, path + (key,)) for key, item in value.items()]
+    if isinstance(value, list):
+        return [(item, path + (position,)) for position, item in enumerate(value)]
+    return []
+
+
+def _select(value, path, selector):
+    """Members of the container `value` picked by one bracket selector, in selector order."""
+    kind, argument = selector
+    if kind == "name":
+        if isinstance(value, dict) and argument in value:
+            return [(value[argument], path + (argument,))]
+    elif kind == "index":
+        if isinstance(value, list) and -len(value) <= argument < len(value):
+            position = argument % len(value)
+            return [(value[position], path + (position,))]
+    elif kind == "wildcard":
+        return _children(value, path)
+    elif kind == "slice":
+        if isinstance(value, list):
+            return [(value[position], path + (position,)) for position in range(*argument.indices(len(value)))]
+    elif kind == "filter":
+        return [(item, item_path) for item, item_path in _children(value, path) if argument(item)]
+    return []
+
+
+def _step(selectors):
+    """Function from the nodes a step starts at to the nodes it selects.
+
+    Single selectors get a loop of their own, which avoids a call per node on large lists.
+    """
+    if len(selectors) > 1:
+        return lambda nodes: [match for value, path in nodes for selector in selectors
+                              for match in _select(value, path, selector)]
+    selector = selectors[0]
+    kind, argument = selector
+    if kind == "name":
+        return lambda nodes: [(value[argument], path + (argument,)) for value, path in nodes
+                              if isinstance(value, dict) and argument in value]
+    if kind == "wildcard":
+        def wildcard(nodes):
+            result = []
+            for value, path in nodes:
+                if isinstance(value, dict):
+                    result.extend([(item, path + (key,)) for key, item in value.items()])
+                elif isinstance(value, list):
+                    result.extend([(item, path + (position,)) for position, item in enumerate(value)])
+            return result
+        return wildcard
+    return lambda nodes: [match for value, path in nodes for match in _select(value, path, selector)]
+
+
+def _descendants(nodes, load):
+    """Every node of `nodes` followed by its descendants, in document order."""
+    result = []
+    stack = nodes[::-1]
+    while stack:
+        value, path = stack.pop()
+        if load is not None and isinstance(value, Unloaded):
+            value = load(path)
+        result.append((value, path))
+        if isinstance(value, dict):
+            stack.extend([(item, path + (key,)) for key, item in reversed(value.items())])
+        elif isinstance(value, list):
+            stack.extend([(value[position], path + (position,)) for position in range(len(value) - 1, -1, -1)])
+    return result
+
+
+class Query:
+    """A compiled query: `paths(data)` lists the paths it matches. Build one with compile_query."""
+    def __init__(self, text, steps):
+        self.text = text
+        # (recursive, selectors) per segment of the query
+        self.steps = steps
+        self._selects = [_step(selectors) for _, selectors in steps]
+
+    def matches(self, data, load=None):
+        """`(value, path)` of each match, in document order within every container.
+
+        Queries do not descend into `Unloaded` containers unless `load(path)` is given to
+        parse them (e.g. DocumentModel.materialize).
+        """
+        nodes = [(data, ())]
+        for (recursive, _), select in zip(self.steps, self._selects):
+            if recursive:
+                nodes = _descendants(nodes, load)
+            elif load is not None:
+                nodes = [(load(path), path) if isinstance(value, Unloaded) else (value, path) for value, path in nodes]
+            nodes = select(nodes)
+        return nodes
+
+    def paths(self, data, load=None):
+        return [path for _, path in self.matches(data, load)]
+
+    def __repr__(self):
+        return f"Query({self.text!r})"
+
+
+class _Parser:
+    """Recursive descent over the query text; see compile_query for the grammar."""
+    def __init__(self, text):
+        self.text = text
+        self.position = 0
+
+    def error(self, message):
+        return ValueError(f"Invalid query '{self.text}' at position {self.position}: {message}")
+
+    def peek(self, token):
+        return self.text.startswith(token, self.position)
+
+    def take(self, token):
+        if self.peek(token):
+            self.position += len(token)
+            return True
+        return False
+
+    def expect(self, token):
+        if not self.take(token):
+            raise self.error(f"expected '{token}'")
+
+    def skip_space(self):
+        self.position = _SPACE.match(self.text, self.position).end()
+
+    def match(self, pattern):
+        found = pattern.match(self.text, self.position)
+        if found is None:
+            return None
+        self.position = found.end()
+        return found
+
+    def parse(self):
+        steps = []
+        self.skip_space()
+        if not self.take("$") and self.position < len(self.text) and not self.peek("."):
+            # A leading name is relative to the root: items[*] is $.items[*]
+            if not self.peek("["):
+                steps.append((False, [("name", self.name())]))
+        while self.position < len(self.text):
+            if self.take(".."):
+                steps.append((True, self.member()))
+            elif self.take("."):
+                steps.append((False, self.member()))
+            elif self.peek("["):
+                steps.append((False, self.brackets()))
+            else:
+                raise self.error("expected '.' or '['")
+        return steps
+
+    def name(self):
+        found = self.match(_NAME)
+        if found is None:
+            raise self.error("expected a key")
+        return found.group()
+
+    def member(self):
+        if self.take("*"):
+            return [("wildcard", None)]
+        if self.peek("["):
+            return self.brackets()
+        return [("name", self.name())]
+
+    def brackets(self):
+        self.expect("[")
+        selectors = []
+        while True:
+            self.skip_space()
+            selectors.append(self.selector())
+            self.skip_space()
+            if self.take("]"):
+                return selectors
+            self.expect(",")
+
+    def selector(self):
+        if self.take("*"):
+            return ("wildcard", None)
+        if self.take("?"):
+            self.skip_space()
+            self.expect("(")
+            selector = ("filter", self.filter())
+            self.expect(")")
+            return selector
+        if self.peek("'") or self.peek('"'):
+            return ("name", self.literal(strings_only=True))
+        found = self.match(_SLICE)
+        if found is not None:
+            start, stop, step = (int(part) if part else None for part in found.groups())
+            if step == 0:
+                raise self.error("slice step cannot be zero")
+            return ("slice", slice(start, stop, step))
+        found = self.match(_INTEGER)
+        if found is not None:
+            return ("index", int(found.group()))
+        raise self.error("expected '*', an index, a slice, a quoted key or a filter")
+
+    def filter(self):
+        self.skip_space()
+        self.expect("@")
+        segments = []
+        while True:
+            if self.take("."):
+                segments.append(self.name())
+            elif self.take("["):
+                self.skip_space()
+                if self.peek("'") or self.peek('"'):
+                    segments.append(self.literal(strings_only=True))
+                else:
+                    found = self.match(_INTEGER)
+                    if found is None:
+                        raise self.error("expected an index or a quoted key")
+                    segments.append(int(found.group()))
+                self.skip_space()
+                self.expect("]")
+            else:
+                break
+        self.skip_space()
+        found = self.match(_OPERATOR)
+        if found is None:
+            return Filter(segments)
+        self.skip_space()
+        literal = self.literal()
+        self.skip_space()
+        return Filter(segments, found.group(), literal)
+
+    def literal(self, strings_only=False):
+        start = self.position
+        found = self.match(_LITERAL)
+        if found is None or (strings_only and found.group()[0] not in "'\""):
+            self.position = start
+            raise self.error("expected a quoted string" if strings_only else "expected a JSON literal")
+        text = found.group()
+        if text[0] == "'":
+            # Single-quoted strings use JSON escapes too
+            text = '"' + text[1:-1].replace('\\\'', "'").replace('"', '\\"') + '"'
+        return json.loads(text)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_query(text):
+    """Compile a JSONPath-like query; raises ValueError for invalid syntax.
+
+    Supported: `$` (optional), `.key`, `['key']`, `[0]`, `[-1]`, `[1:5:2]`, `*`, unions
+    like `[0,2]`, recursive descent `..key` and filters such as `[?(@.status == 'open')]`
+    or `[?(@.details)]`. Compiled queries are cached, so repeating one is cheap.
+    """
+    query = Query(text, _Parser(text.strip()).parse())
+    logger.debug(f"Compiled query {text!r} into {len(query.steps)} step(s)")
+    return query
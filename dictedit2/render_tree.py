@@ -0,0 +1,173 @@
+import logging
+
+from dictedit2.lazy_json import Unloaded
+
+logger = logging.getLogger(__name__)
+
+CONTAINER_NAMES = {"dict": "Dictionary Item", "list": "List"}
+
+# Scalars whose text exceeds either limit are shown as a preview and edited in a separate window
+LARGE_TEXT_CHARS = 2000
+LARGE_TEXT_LINES = 20
+PREVIEW_CHARS = 120
+# Rows looks_like_table checks; the table renderer checks all rows when it shows them
+TABLE_SAMPLE_ROWS = 8
+
+
+def node_kind(item):
+    if isinstance(item, dict):
+        return "dict"
+    if isinstance(item, list):
+        return "list"
+    if isinstance(item, Unloaded):
+        return item.kind
+    return "value"
+
+
+def summarize(item):
+    """One-line description of a container, e.g. "3 keys"."""
+    if isinstance(item, Unloaded):
+        return item.summary
+    noun = "key" if isinstance(item, dict) else "item"
+    return f"{len(item)} {noun}{'' if len(item) == 1 else 's'}"
+
+
+def table_columns(item, min_rows=2):
+    """Columns if `item` can be shown as a table, else None.
+
+    Tables are lists of at least `min_rows` equally long lists of scalars (column
+    positions), or of dicts with the same keys and scalar values (the first row's keys).
+    """
+    if not isinstance(item, list) or len(item) < min_rows:
+        return None
+    first = item[0]
+    if isinstance(first, list):
+        width = len(first)
+        if not width or any(not isinstance(row, list) or len(row) != width for row in item):
+            return None
+        columns = list(range(width))
+        cells = (cell for row in item for cell in row)
+    elif isinstance(first, dict):
+        keys = first.keys()
+        if not keys or any(not isinstance(row, dict) or row.keys() != keys for row in item):
+            return None
+        columns = list(keys)
+        cells = (cell for row in item for cell in row.values())
+    else:
+        return None
+    if any(node_kind(cell) != "value" for cell in cells):
+        return None
+    return columns
+
+
+def looks_like_table(item):
+    """table_columns on the first rows only, so picking a renderer stays cheap on long lists."""
+    return isinstance(item, list) and table_columns(item[:TABLE_SAMPLE_ROWS]) is not None
+
+
+def is_large_text(text):
+    return len(text) > LARGE_TEXT_CHARS or text.count("\n", 0, LARGE_TEXT_CHARS) >= LARGE_TEXT_LINES
+
+
+def preview(text):
+    """Cheap one-line stand-in for a large value, e.g. "SGVsbG8… (1,048,576 characters)"."""
+    first_line = text[:PREVIEW_CHARS].split("\n", 1)[0]
+    return f"{first_line}\u2026 ({len(text):,} characters)"
+
+
+class RenderNode:
+    """Display-free description of one node: what to show and which actions it offers.
+
+    `value` is the scalar itself, or a summary string for containers. `children` is
+    empty for scalars and for collapsed containers.
+    """
+    __slots__ = ("path", "node_id", "depth", "key", "label", "kind", "value", "expanded", "actions", "children")
+
+    def __init__(self, path, node_id, key, kind, value, expanded, actions):
+        self.path = path
+        self.node_id = node_id
+        self.depth = len(path)
+        self.key = key
+        self.label = CONTAINER_NAMES.get(kind, "") if key is None else str(key)
+        self.kind = kind
+        self.value = value
+        self.expanded = expanded
+        self.actions = actions
+        self.children = []
+
+    def __repr__(self):
+        return f"RenderNode({self.path!r}, {self.kind!r})"
+
+
+def _actions(kind, parent_kind):
+    actions = []
+    if kind == "dict":
+        actions += ["toggle", "add_key"]
+    elif kind == "list":
+        actions += ["toggle", "add_item"]
+    else:
+        actions.append("edit")
+    if parent_kind == "dict":
+        actions += ["rename_key", "remove_key"]
+    elif parent_kind == "list":
+        actions += ["insert_before", "remove_item"]
+    return tuple(actions)
+
+
+def build_render_tree(data, is_expanded=None, index=None, path=(), is_visible=None, materialize=None):
+    """Plan the rendering of `data` (found at `path`) without touching any GUI toolkit.
+
+    Children of containers for which `is_expanded(path)` is false are not visited, so the
+    cost is proportional to what is visible. Children for which `is_visible(path)` is false
+    are left out (used by the search filter). With a NodeIndex, nodes carry their stable IDs.
+    Expanded `Unloaded` containers are parsed with `materialize(path)`, or shown as empty.
+    """
+    path = tuple(path)
+    parent_kind = None
+    index_node = None
+    if index is not None:
+        index_node = index.node_at(path)
+        if index_node.parent is not None:
+            parent_kind = node_kind(index_node.parent.obj)
+    root = _make_node(data, path, path[-1] if path else None, parent_kind, is_expanded, index_node)
+    stack = [(root, data, index_node)]
+    while stack:
+        node, item, index_node = stack.pop()
+        if not node.expanded:
+            continue
+        if isinstance(item, Unloaded):
+            if materialize is None:
+                continue
+            item = materialize(node.path)
+            if index_node is not None:
+                index_node = index.node_at(node.path)
+        items = item.items() if node.kind == "dict" else enumerate(item)
+        for key, value in items:
+            if is_visible is not None and not is_visible(node.path + (key,)):
+                continue
+            child_index_node = index_node.children[key] if index_node is not None else None
+            child = _make_node(value, node.path + (key,), key, node.kind, is_expanded, child_index_node)
+            node.children.append(child)
+            if child.kind != "value":
+                stack.append((child, value, child_index_node))
+    return root
+
+
+def _make_node(item, path, key, parent_kind, is_expanded, index_node):
+    kind = node_kind(item)
+    node_id = index_node.node_id if index_node is not None else None
+    if kind == "value":
+        return RenderNode(path, node_id, key, kind, item, False, _actions(kind, parent_kind))
+    expanded = True if is_expanded is None else is_expanded(path)
+    return RenderNode(path, node_id, key, kind, summarize(item), expanded, _actions(kind, parent_kind))
+
+
+def flatten(root):
+    """Pre-order list of the nodes in a render tree, i.e. the rows of a flat view."""
+    rows = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        rows.append(node)
+        stack.extend(reversed(node.children))
+    return rows
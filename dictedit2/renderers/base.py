@@ -1,52 +1,201 @@
 from abc import ABC, abstractmethod
+import itertools
 import logging
 import tkinter as tk
 from tkinter import Scrollbar, Canvas, Menu
 #from dictedit2.renderers.dict_renderer import DictRenderer as DictRenderer
-import uuid
 #from base import CanvasWithScrollbar, TypeConverter, RendererFactory
 
+from dictedit2.lazy_json import Unloaded
+# TypeConverter lives in dictedit2.model now; it is re-exported here for renderers that
+# still import it from this module
+from dictedit2.model import TypeConverter
+from dictedit2.render_tree import looks_like_table, summarize
+
+__all__ = [
+    "RESIZE_DELAY_MS", "RegisteredWidget", "CustomFrame", "CustomLabel", "CustomButton", "CustomEntry", "CustomText",
+    "WidgetPool", "GUIUtils", "CanvasWithScrollbar", "RendererRegistry", "RendererFactory", "CustomDataTypeRenderer",
+    "TypeConverter",
+]
+
 logger = logging.getLogger(__name__)
 
-class CustomFrame(tk.Frame):
+# Delay between a key release and the resize of the edited field; later keys in the window are coalesced
+RESIZE_DELAY_MS = 100
+
+_widget_ids = itertools.count()
+
+class RegisteredWidget:
+    """Gives a widget a cheap unique id and drops it from the GUIUtils registries when destroyed."""
+    def _register(self):
+        self.widget_id = next(_widget_ids)
+        self.pool_role = None
+        self.bind("<Destroy>", self._on_destroy, add="+")
+
+    def _on_destroy(self, event):
+        # Destroy events of children do not reach this binding, but compare paths to be sure
+        if str(event.widget) == str(self):
+            GUIUtils.forget_widget(self)
+
+class CustomFrame(RegisteredWidget, tk.Frame):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._register()
+
+class CustomLabel(RegisteredWidget, tk.Label):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._register()
+
+class CustomButton(RegisteredWidget, tk.Button):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.widget_id = str(uuid.uuid4())
+        self._register()
 
-class CustomLabel(tk.Label):
+class CustomEntry(RegisteredWidget, tk.Entry):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.widget_id = str(uuid.uuid4())
+        self._register()
 
-class CustomButton(tk.Button):
+class CustomText(RegisteredWidget, tk.Text):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.widget_id = str(uuid.uuid4())
+        self._register()
+
+
+class WidgetPool:
+    """Recycles released widgets per parent and role so re-renders reuse them instead of creating new ones.
+
+    Tk cannot reparent widgets, so a released widget can only come back under the same parent;
+    recycling a subtree keeps its pooled descendants parked under their (also pooled) parents.
+    """
+    def __init__(self, max_per_role=512):
+        self.max_per_role = max_per_role
+        self._free = {}
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, parent, role, factory):
+        free = self._free.get(str(parent), {}).get(role)
+        while free:
+            widget = free.pop()
+            if widget.winfo_exists():
+                self.reused += 1
+                return widget
+        self.created += 1
+        widget = factory(parent)
+        widget.pool_role = role
+        return widget
+
+    def release(self, widget):
+        """Hide `widget` (and recycle its children) for reuse by a later acquire under the same parent."""
+        role = getattr(widget, "pool_role", None)
+        if role is None or not widget.winfo_exists():
+            widget.destroy()
+            return
+        free = self._free.setdefault(str(widget.master), {}).setdefault(role, [])
+        if len(free) >= self.max_per_role:
+            widget.destroy()
+            return
+
+        self.recycle_children(widget)
+        manager = widget.winfo_manager()
+        if manager:
+            getattr(widget, f"{manager}_forget")()
+        for sequence in widget.bind():
+            if sequence != "<Destroy>":
+                widget.unbind(sequence)
+        GUIUtils.forget_tooltip(widget)
+        free.append(widget)
+
+    def recycle_children(self, parent):
+        for child in parent.winfo_children():
+            if getattr(child, "pool_role", None) is None:
+                child.destroy()
+            else:
+                self.release(child)
+
+    def purge(self, parent):
+        """Forget the pooled children of a destroyed parent."""
+        self._free.pop(str(parent), None)
+
+    def size(self):
+        return sum(len(widgets) for roles in self._free.values() for widgets in roles.values())
+
+
+def _default(widget, option):
+    # configure(option) returns (name, db name, db class, default, current)
+    return widget.configure(option)[3]
+
 
 # GUI Utility Class
 class GUIUtils:
     widget_tooltips = {}
     widget_ids = {}
+    pool = WidgetPool()
 
     @staticmethod
     def create_frame(parent, bg_color):
-        frame = CustomFrame(parent, bd=1, relief=tk.GROOVE, bg=bg_color, padx=5, pady=5)
+        frame = GUIUtils.pool.acquire(
+            parent, "node_frame", lambda p: CustomFrame(p, bd=1, relief=tk.GROOVE, padx=5, pady=5)
+        )
+        # A recycled frame may still show a validation marker
+        frame.configure(bg=bg_color, highlightthickness=0)
         frame.grid(sticky="ew", padx=10, pady=5)
         parent.columnconfigure(0, weight=1)
         return frame
 
+    @staticmethod
+    def create_plain_frame(parent, bg_color):
+        frame = GUIUtils.pool.acquire(parent, "frame", CustomFrame)
+        frame.configure(bg=bg_color)
+        return frame
+
     @staticmethod
     def create_label(parent, text, bg_color, font=None):
-        label = CustomLabel(parent, text=text, bg=bg_color, anchor="w", font=font)
+        label = GUIUtils.pool.acquire(parent, "label", CustomLabel)
+        label.configure(text=text, bg=bg_color, anchor="w", font=font or _default(label, "font"))
         return label
 
     @staticmethod
-    def create_button(parent, text, command, bg_color, tooltip=None):
-        button = CustomButton(parent, text=text, command=command, bg=bg_color)
+    def create_button(parent, text, command, bg_color=None, tooltip=None):
+        button = GUIUtils.pool.acquire(parent, "button", CustomButton)
+        button.configure(text=text, command=command, bg=bg_color or _default(button, "bg"))
         if tooltip:
             GUIUtils.add_tooltip(button, tooltip)
         return button
 
+    @staticmethod
+    def create_entry(parent, font=None):
+        entry = GUIUtils.pool.acquire(parent, "entry", CustomEntry)
+        entry.configure(state="normal", font=font or _default(entry, "font"))
+        entry.delete(0, tk.END)
+        return entry
+
+    @staticmethod
+    def create_text(parent, wrap=tk.WORD):
+        text = GUIUtils.pool.acquire(parent, "text", CustomText)
+        text.configure(state="normal", wrap=wrap)
+        text.delete("1.0", tk.END)
+        return text
+
+    @staticmethod
+    def recycle(widget):
+        """Release a rendered widget tree into the pool instead of destroying it."""
+        GUIUtils.pool.release(widget)
+
+    @staticmethod
+    def forget_widget(widget):
+        GUIUtils.widget_ids.pop(widget.widget_id, None)
+        GUIUtils.forget_tooltip(widget)
+        GUIUtils.pool.purge(widget)
+
+    @staticmethod
+    def forget_tooltip(widget):
+        tooltip = GUIUtils.widget_tooltips.pop(widget.widget_id, None)
+        if tooltip is not None:
+            tooltip.destroy()
+
     @staticmethod
     def assign_widget_id(widget):
         widget_id = widget.widget_id
@@ -97,36 +246,118 @@ class CanvasWithScrollbar:
         # Mouse scrolling support
         self.canvas.bind_all("<MouseWheel>", self._on_mouse_scroll)
 
+    def scroll_to(self, widget):
+        """Scroll so that `widget`, a descendant of the inner frame, is at the top of the viewport."""
+        self.frame.update_idletasks()
+        y = widget.winfo_rooty() - self.frame.winfo_rooty()
+        self.canvas.yview_moveto(y / max(1, self.frame.winfo_height()))
+
     def _on_mouse_scroll(self, event):
         self.canvas.yview_scroll(-1 * (event.delta // 120), "units")
 
-class TypeConverter:
-    """Handles type conversions for editor values."""
-    @staticmethod
-    def convert_to_type(value, target_type):
+class RendererRegistry:
+    """Maps value types to renderer classes.
+
+    A type without its own entry uses the entry of the nearest class in its MRO; the result
+    is cached per concrete type, so dispatch is a single dict lookup after the first node.
+    Entries registered with a `when(item)` predicate are tried first and only used for
+    values the predicate accepts (e.g. lists that can be shown as a table).
+    """
+    def __init__(self, defaults=None):
+        # type -> [(when, renderer class)], conditional entries first, at most one with when=None
+        self._renderers = {}
+        self._cache = {}
+        # Called once before the first lookup, so built-in renderers can import this module
+        self._defaults = defaults
+
+    def register(self, value_type, renderer_class=None, when=None):
+        """Render values of `value_type` (and its subclasses) with `renderer_class`.
+
+        Without `renderer_class` this returns a class decorator.
+        """
+        if renderer_class is None:
+            return lambda cls: self.register(value_type, cls, when)
+        self._load_defaults()
+        entries = self._renderers.setdefault(value_type, [])
+        if when is None:
+            entries[:] = [entry for entry in entries if entry[0] is not None] + [(None, renderer_class)]
+        else:
+            entries.insert(0, (when, renderer_class))
+        self._cache.clear()
+        return renderer_class
+
+    def unregister(self, value_type):
+        self._renderers.pop(value_type, None)
+        self._cache.clear()
+
+    def candidates(self, value_type):
+        """Entries to try for `value_type`, ending with the first unconditional one."""
         try:
-            return target_type(value)
-        except ValueError:
-            logger.warning(f"Cannot convert value '{value}' to {target_type.__name__}.")
-            return value
+            return self._cache[value_type]
+        except KeyError:
+            pass
+        self._load_defaults()
+        candidates = []
+        for cls in value_type.__mro__:
+            candidates.extend(self._renderers.get(cls, ()))
+            if candidates and candidates[-1][0] is None:
+                break
+        else:
+            raise LookupError(f"No renderer registered for {value_type.__name__}.")
+        self._cache[value_type] = candidates
+        return candidates
+
+    def lookup(self, value_type):
+        """Renderer class used for `value_type` when no predicate applies."""
+        return self.candidates(value_type)[-1][1]
+
+    def renderer_for(self, item):
+        for when, renderer_class in self.candidates(type(item)):
+            if when is None or when(item):
+                return renderer_class
+
+    def _load_defaults(self):
+        if self._defaults is not None:
+            defaults, self._defaults = self._defaults, None
+            defaults(self)
+
+
+def _register_builtin_renderers(registry):
+    from dictedit2.renderers.dict_renderer import DictRendererCustom
+    from dictedit2.renderers.list_renderer import ListRendererCustom
+    from dictedit2.renderers.value_renderer import ValueRendererCustom
+    from dictedit2.renderers.typed_value_renderer import register_typed_renderers
+    from dictedit2.renderers.table_renderer import TableRendererCustom
+
+    registry.register(dict, DictRendererCustom)
+    registry.register(list, ListRendererCustom)
+    registry.register(list, TableRendererCustom, when=looks_like_table)
+    # Containers of an out-of-core document that are not parsed yet render collapsed
+    registry.register(Unloaded, ListRendererCustom)
+    registry.register(Unloaded, DictRendererCustom, when=lambda item: item.kind == "dict")
+    registry.register(object, ValueRendererCustom)
+    register_typed_renderers(registry)
 
 
 class RendererFactory:
     """Creates appropriate renderers based on data type."""
+    registry = RendererRegistry(defaults=_register_builtin_renderers)
+    # GUIUtils keeps no per-renderer state, so all renderers share one instance
+    gui_utils = GUIUtils()
+
+    @staticmethod
+    def register(value_type, renderer_class=None):
+        return RendererFactory.registry.register(value_type, renderer_class)
+
     @staticmethod
     def get_renderer(editor, item, parent, path):
-        if isinstance(item, dict):
-            from dictedit2.renderers.dict_renderer import DictRendererCustom
-            return DictRendererCustom(editor, parent, path, GUIUtils())
-        elif isinstance(item, list):
-            from dictedit2.renderers.list_renderer import ListRendererCustom
-            return ListRendererCustom(editor, parent, path, GUIUtils())
-        else:
-            from dictedit2.renderers.value_renderer import ValueRendererCustom
-            return ValueRendererCustom(editor, parent, path, GUIUtils())
+        renderer_class = RendererFactory.registry.renderer_for(item)
+        return renderer_class(editor, parent, path, RendererFactory.gui_utils)
 
 class CustomDataTypeRenderer(ABC):
     """Base class for all custom data type renderers with standardized callbacks and behaviors."""
+    # True if parse_value returns values of the right type already
+    parses_values = False
 
     def __init__(self, editor, parent, path, gui_utils, readonly=False, auto_resize=False, default_value=None):
         self.editor = editor
@@ -136,8 +367,12 @@ class CustomDataTypeRenderer(ABC):
         self.readonly = readonly
         self.auto_resize = auto_resize
         self.default_value = default_value
+        self.frame = None
+        # Stable ID of the rendered node in the editor's node index, set by DataEditor.render_item
+        self.node_id = None
         self.custom_bindings = {}
         self.context_menu = None
+        self._resize_pending = False
         self.default_keypress_handler = lambda event: logger.debug(f"Key pressed: {event.keysym}")
         self.default_click_handler = lambda event: logger.debug(f"Mouse clicked at: ({event.x}, {event.y})")
         self.on_click = self.default_click_handler
@@ -157,6 +392,7 @@ class CustomDataTypeRenderer(ABC):
 
     def create_frame(self, bg_color):
         frame = self.gui_utils.create_frame(self.parent, bg_color)
+        self.frame = frame
         self._add_custom_bindings(frame)
         #self._add_help_tooltip(frame)
         return frame
@@ -248,43 +484,108 @@ class CustomDataTypeRenderer(ABC):
             )
             button.pack(side=tk.LEFT, padx=2)
 
-    def create_header(self, frame):
+    def create_header(self, frame, item=None):
+        """Create the header row; containers (`item` given) get an expand/collapse toggle."""
         metadata = self.get_metadata()
-        header = self.gui_utils.create_label(
-            frame,
-            text=metadata["name"],
-            bg_color=self.appearance()["bg_color"],
-            font=("Arial", 10, "bold")
-        )
+        bg_color = self.appearance()["bg_color"]
+        if item is None:
+            header = self.gui_utils.create_label(frame, text=metadata["name"], bg_color=bg_color, font=("Arial", 10, "bold"))
+            header.grid(row=0, column=0, columnspan=3, sticky="w")
+            return
+
+        expanded = self.editor.is_expanded(self.path)
+        header = self.gui_utils.create_plain_frame(frame, bg_color)
         header.grid(row=0, column=0, columnspan=3, sticky="w")
+        toggle = self.gui_utils.create_button(
+            header,
+            text="\u25be" if expanded else "\u25b8",
+            command=lambda: self.editor.toggle_expanded(self.path),
+            bg_color=bg_color
+        )
+        toggle.pack(side=tk.LEFT)
+        text = metadata["name"] if expanded else f"{metadata['name']} ({summarize(item)})"
+        label = self.gui_utils.create_label(header, text=text, bg_color=bg_color, font=("Arial", 10, "bold"))
+        label.pack(side=tk.LEFT, padx=2)
+
+    def refresh_descendant(self, path):
+        """Update a node this renderer draws itself (no renderer of its own) in place.
+
+        Returns False if the renderer has to be re-rendered instead.
+        """
+        return False
 
     def handle_action(self, action):
         logger.debug(f"Action '{action}' triggered at path {self.path}")
 
+    def format_value(self, item):
+        """Text shown for a scalar value."""
+        return str(item)
+
+    def parse_value(self, text):
+        """Value to store for edited text; raise ValueError if `text` is invalid.
+
+        Unless `parses_values` is set, the editor converts the result to the current type.
+        """
+        return text
+
     def render_with_validation(self, item, entry_field):
         """Render item with input validation on focus out."""
         if self.default_value is not None and item is None:
             item = self.default_value
 
         if isinstance(entry_field, tk.Text):
-            entry_field.insert("1.0", str(item))
+            entry_field.insert("1.0", self.format_value(item))
         else:
-            entry_field.insert(0, str(item))
+            entry_field.insert(0, self.format_value(item))
 
         if self.readonly:
             entry_field.configure(state="readonly")
         else:
             entry_field.bind("<FocusOut>", lambda e: self._validate_and_update(entry_field))
-            entry_field.bind("<KeyRelease>", lambda e: self._resize_field_on_key_release(entry_field))
+            entry_field.bind("<KeyRelease>", lambda e: self._schedule_resize(entry_field))
 
-        self.resize_field(entry_field, str(item))
+        self.resize_field(entry_field, self.format_value(item))
 
-    def _resize_field_on_key_release(self, entry):
-        if isinstance(entry, tk.Text):
-            content = entry.get("1.0", "end-1c")
-        else:
-            content = entry.get()
-        self.resize_field(entry, content)
+    def current_path(self):
+        """Path of the rendered node now, which may differ from `path` after insertions."""
+        if self.node_id is None:
+            return self.path
+        return self.editor.path_of(self.node_id)
+
+    def _schedule_resize(self, field):
+        if self._resize_pending:
+            return
+        self._resize_pending = True
+        field.after(RESIZE_DELAY_MS, self._resize_incrementally, field)
+
+    def _resize_incrementally(self, field):
+        """Grow `field` to fit what was typed without reading its whole content.
+
+        Tk knows the line count and the length of the current line, so the cost does not
+        depend on the size of the value. Fields only grow while being edited.
+        """
+        self._resize_pending = False
+        if not field.winfo_exists():
+            return
+        metadata = self.get_metadata()
+        default_width = metadata.get("default_width", 10)
+        if isinstance(field, tk.Text):
+            if not metadata.get("multiline", False):
+                return
+            lines = int(field.index("end-1c").split(".")[0])
+            line_length = int(field.index("insert lineend").split(".")[1])
+            width = max(default_width, int(field.cget("width")), line_length + 2)
+            field.configure(height=max(int(field.cget("height")), lines), width=width)
+        elif metadata.get("auto_resize", self.auto_resize):
+            field.configure(width=max(default_width, int(field.cget("width")), field.index(tk.END) + 2))
+
+    def commit_text(self, value):
+        """Validate edited text and store it; raises ValueError if it is invalid."""
+        if self.editor.model.schema is None:
+            # Otherwise the schema decides, e.g. whether empty text is allowed
+            self.validate_input(value)
+        # Values from renderers that parse them are stored as is
+        self.editor.update_value(self.current_path(), self.parse_value(value), convert=not self.parses_values)
 
     def _validate_and_update(self, entry):
         try:
@@ -292,7 +593,6 @@ class CustomDataTypeRenderer(ABC):
                 value = entry.get("1.0", "end-1c")
             else:
                 value = entry.get()
-            self.validate_input(value)
-            self.editor.update_value(self.path, value)
+            self.commit_text(value)
         except ValueError as e:
             logger.error(f"Validation failed: {e}")
@@ -0,0 +1,136 @@
+import logging
+import tkinter as tk
+from tkinter import ttk
+
+from dictedit2.changes import json_pointer
+from dictedit2.diff import apply_changes, diff
+from dictedit2.operations import resolve
+from dictedit2.render_tree import preview, summarize
+
+logger = logging.getLogger(__name__)
+
+
+def describe(value):
+    if isinstance(value, (dict, list)):
+        return f"{'dict' if isinstance(value, dict) else 'list'} ({summarize(value)})"
+    return preview(str(value))
+
+
+class CompareWindow(tk.Toplevel):
+    """Differences between two documents, side by side, with changes applied one at a time.
+
+    Only changed paths are listed, under their ancestors for context. Both documents are
+    DocumentModels, so applied changes are undoable edits; `on_applied(document, paths)`
+    (document "old" or "new") lets an editor showing that model re-render the paths.
+    The diff is recomputed whenever either model changes.
+    """
+    def __init__(self, master, old_model, new_model, titles=("Left", "Right"), on_applied=None):
+        super().__init__(master)
+        self.title(f"Compare {titles[0]} ↔ {titles[1]}")
+        self.models = {"old": old_model, "new": new_model}
+        self.on_applied = on_applied
+        self.changes = {}
+        self._refresh_pending = False
+
+        self.status = tk.Label(self, anchor="w")
+        self.status.pack(fill=tk.X, padx=5, pady=(5, 0))
+
+        frame = tk.Frame(self)
+        self.tree = ttk.Treeview(frame, columns=("old", "new"), selectmode="browse", height=25)
+        self.tree.heading("#0", text="Path")
+        self.tree.heading("old", text=titles[0])
+        self.tree.heading("new", text=titles[1])
+        self.tree.column("#0", width=220)
+        self.tree.column("old", width=260)
+        self.tree.column("new", width=260)
+        self.tree.tag_configure("add", background="#dff5dd")
+        self.tree.tag_configure("remove", background="#f8dada")
+        self.tree.tag_configure("replace", background="#fdf3c8")
+        scrollbar = tk.Scrollbar(frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        buttons = tk.Frame(self)
+        tk.Button(buttons, text=f"← Use {titles[1]}", command=lambda: self.apply_selected("old")).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons, text=f"Use {titles[0]} →", command=lambda: self.apply_selected("new")).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons, text=f"← Use all of {titles[1]}", command=lambda: self.apply_all("old")).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons, text=f"Use all of {titles[0]} →", command=lambda: self.apply_all("new")).pack(side=tk.LEFT, padx=5)
+        buttons.pack(fill=tk.X, pady=(0, 5))
+
+        for model in self.models.values():
+            model.listeners.append(self._on_patches)
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.refresh()
+
+    def _on_patches(self, patches):
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            self.after_idle(self.refresh)
+
+    def refresh(self):
+        self._refresh_pending = False
+        selection = self.tree.selection()
+        order = list(self.changes)
+        selected = order.index(selection[0]) if selection and selection[0] in self.changes else None
+        self.tree.delete(*self.tree.get_children())
+        self.changes = {}
+        old, new = self.models["old"].data, self.models["new"].data
+        changes = diff(old, new)
+        for number, change in enumerate(changes):
+            path = change.old_path if change.kind == "remove" else change.new_path
+            parent = self._ancestor_row(path[:-1])
+            iid = f"change{number}"
+            self.changes[iid] = change
+            self.tree.insert(parent, tk.END, iid=iid, text=str(path[-1]) if path else "/", tags=(change.kind,),
+                             values=(describe(change.old) if change.kind != "add" else "",
+                                     describe(change.new) if change.kind != "remove" else ""))
+        self.status.configure(text=f"{len(changes)} difference(s)" if changes else "The documents are identical")
+        if selected is not None and self.changes:
+            # Keep the selection near where it was, so changes can be applied one after another
+            rows = list(self.changes)
+            self.tree.selection_set(rows[min(selected, len(rows) - 1)])
+            self.tree.see(self.tree.selection()[0])
+
+    def _ancestor_row(self, path):
+        """Row of the container at `path`, created with its own ancestors on first use."""
+        if not path:
+            return ""
+        iid = "node" + json_pointer(path)
+        if not self.tree.exists(iid):
+            parent = self._ancestor_row(path[:-1])
+            summaries = []
+            for document in ("old", "new"):
+                try:
+                    summaries.append(describe(resolve(self.models[document].data, path)))
+                except (KeyError, IndexError, TypeError):
+                    summaries.append("")
+            self.tree.insert(parent, tk.END, iid=iid, text=str(path[-1]), open=True, values=summaries)
+        return iid
+
+    def apply_selected(self, document):
+        """Apply the selected change to one document: "old" takes the new version, "new" the old one."""
+        selection = self.tree.selection()
+        change = self.changes.get(selection[0]) if selection else None
+        if change is None:
+            return
+        operation = change.operation_on(document)
+        self.models[document].apply(operation, "apply difference")
+        self._applied(document, [operation.render_path])
+
+    def apply_all(self, document):
+        old, new = self.models["old"].data, self.models["new"].data
+        changes = diff(old, new) if document == "old" else diff(new, old)
+        if changes:
+            self._applied(document, apply_changes(self.models[document], changes, label="apply differences"))
+
+    def _applied(self, document, paths):
+        if self.on_applied:
+            self.on_applied(document, paths)
+
+    def close(self):
+        for model in self.models.values():
+            if self._on_patches in model.listeners:
+                model.listeners.remove(self._on_patches)
+        self.destroy()
@@ -1,52 +1,49 @@
 import tkinter as tk
-from .base import CustomDataTypeRenderer
+from dictedit2.renderers.base import CustomDataTypeRenderer
 
 class ListRendererCustom(CustomDataTypeRenderer):
     def render(self, item):
         frame = self.create_frame(bg_color=self.appearance()["bg_color"])
-        self.create_header(frame)
-
-        for i, value in enumerate(item):
-            list_item_frame = tk.Frame(frame, bg=self.appearance()["bg_color"])
+        self.create_header(frame, item)
+        # Collapsed lists only show their header; children are built when first expanded
+        if not self.editor.is_expanded(self.path):
+            return
+
+        child_ids = self.editor.index.child_ids(self.node_id)
+        for i, (value, child_id) in enumerate(zip(item, child_ids)):
+            if not self.editor.is_visible(self.path + (i,)):
+                continue
+            list_item_frame = self.gui_utils.create_plain_frame(frame, self.appearance()["bg_color"])
             list_item_frame.grid(row=i+1, column=0, sticky="ew", padx=5, pady=2)
             list_item_frame.columnconfigure(0, weight=1)
 
             self.editor.render_item(value, list_item_frame, self.path + (i,))
 
-            action_button_frame = tk.Frame(list_item_frame, bg=self.appearance()["bg_color"])
+            action_button_frame = self.gui_utils.create_plain_frame(list_item_frame, self.appearance()["bg_color"])
             action_button_frame.grid(row=0, column=1, sticky="e", padx=5, pady=2)
 
-            tk.Button(
+            self.gui_utils.create_button(
                 action_button_frame,
                 text="-",
-                command=lambda index=i: self.editor.handle_action(self.path + (index,), "remove_item")
+                command=lambda node_id=child_id: self.editor.handle_action(self.item_path(node_id), "remove_item")
             ).pack(side=tk.LEFT, padx=2)
 
-            tk.Button(
+            self.gui_utils.create_button(
                 action_button_frame,
                 text="+",
-                command=lambda index=i: self.editor.handle_action(self.path + (index + 1,), "add_item")
+                command=lambda node_id=child_id: self.editor.handle_action(self.item_path(node_id, 1), "add_item")
             ).pack(side=tk.LEFT, padx=2)
 
-        tk.Button(
+        self.gui_utils.create_button(
             frame,
             text="+",
-            command=lambda: self.editor.handle_action(self.path + (len(item),), "add_item")
+            command=lambda: self.editor.handle_action(self.current_path() + (len(item),), "add_item")
         ).grid(row=len(item)+1, column=0, sticky="w", padx=5, pady=2)
 
-    def remove_item(self, index):
-        try:
-            self.editor.update_data(self.path, lambda d: d.pop(index))
-        except Exception as e:
-            print(f"Error removing item: {e}")
-        self.editor.render()
-
-    def add_item(self):
-        try:
-            self.editor.update_data(self.path, lambda d: d.append(""))
-        except Exception as e:
-            print(f"Error adding item: {e}")
-        self.editor.render()
+    def item_path(self, node_id, offset=0):
+        """Current path of a list item, optionally shifted to a neighbouring position."""
+        path = self.editor.path_of(node_id)
+        return path[:-1] + (path[-1] + offset,)
 
     def get_metadata(self):
         return {
@@ -0,0 +1,76 @@
+import logging
+import re
+import tkinter as tk
+
+logger = logging.getLogger(__name__)
+
+
+class SearchBar(tk.Frame):
+    """Search box for a DataEditor: incremental query, optional filtered view and jump between results.
+
+    Queries run after `delay_ms` without typing; Return jumps to the next result, Escape clears.
+    """
+    def __init__(self, master, editor, delay_ms=150, **kwargs):
+        super().__init__(master, **kwargs)
+        self.editor = editor
+        self.delay_ms = delay_ms
+        self.results = None
+        self.position = -1
+        self._timer = None
+
+        self.query = tk.StringVar(self)
+        self.regex = tk.BooleanVar(self, value=False)
+        self.case_sensitive = tk.BooleanVar(self, value=False)
+        self.filter = tk.BooleanVar(self, value=False)
+
+        tk.Label(self, text="Search:").pack(side=tk.LEFT, padx=(5, 2))
+        self.entry = tk.Entry(self, textvariable=self.query)
+        self.entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        tk.Checkbutton(self, text="Regex", variable=self.regex, command=self.run).pack(side=tk.LEFT)
+        tk.Checkbutton(self, text="Aa", variable=self.case_sensitive, command=self.run).pack(side=tk.LEFT)
+        tk.Checkbutton(self, text="Filter", variable=self.filter, command=self.apply_filter).pack(side=tk.LEFT)
+        tk.Button(self, text="▲", command=lambda: self.step(-1)).pack(side=tk.LEFT)
+        tk.Button(self, text="▼", command=lambda: self.step(1)).pack(side=tk.LEFT)
+        self.status = tk.Label(self, width=12, anchor="w")
+        self.status.pack(side=tk.LEFT, padx=5)
+
+        self.query.trace_add("write", lambda *args: self.schedule())
+        self.entry.bind("<Return>", lambda e: self.step(1))
+        self.entry.bind("<Shift-Return>", lambda e: self.step(-1))
+        self.entry.bind("<Escape>", lambda e: self.query.set(""))
+
+    def schedule(self):
+        if self._timer is not None:
+            self.after_cancel(self._timer)
+        self._timer = self.after(self.delay_ms, self.run)
+
+    def run(self):
+        self._timer = None
+        query = self.query.get()
+        self.position = -1
+        if not query:
+            self.results = None
+            self.status.configure(text="")
+        else:
+            try:
+                self.results = self.editor.search(query, self.regex.get(), self.case_sensitive.get())
+            except re.error as e:
+                self.results = None
+                self.status.configure(text="Invalid regex", fg="red")
+                logger.debug(f"Invalid search pattern '{query}': {e}")
+                return
+            self.status.configure(text=f"{len(self.results)} found", fg="black")
+        self.apply_filter()
+
+    def apply_filter(self):
+        self.editor.set_filter(self.results if self.filter.get() else None)
+
+    def step(self, offset):
+        if self.results is not None and self.results.generation != self.editor.model.search_index.generation:
+            # The document changed since the query ran; result paths may have shifted
+            self.results = self.editor.search(self.results.query, *self.results.options)
+        if not self.results:
+            return
+        self.position = (self.position + offset) % len(self.results)
+        self.status.configure(text=f"{self.position + 1} of {len(self.results)}")
+        self.editor.jump_to(self.results[self.position])
@@ -0,0 +1,90 @@
+import logging
+import tkinter as tk
+from tkinter import filedialog, ttk
+
+from dictedit2.changes import json_pointer
+from dictedit2.profiling import PHASES
+
+logger = logging.getLogger(__name__)
+
+
+class RenderStatsWindow(tk.Toplevel):
+    """Live view of an editor's render profiler: last render, phase totals, renderers and costly paths.
+
+    Opening the window enables profiling; closing it turns profiling off again unless it
+    was already on. The figures refresh every `interval_ms`.
+    """
+    def __init__(self, master, editor, interval_ms=500, paths=15):
+        super().__init__(master)
+        self.title("Render statistics")
+        self.editor = editor
+        self.interval_ms = interval_ms
+        self.paths = paths
+        self._was_enabled = editor.profiler.enabled
+        self.profiler = editor.enable_profiling()
+
+        self.summary = tk.Label(self, anchor="w", justify=tk.LEFT, font="Courier")
+        self.summary.pack(fill=tk.X, padx=5, pady=5)
+
+        self.renderer_table = self._create_table(("renderer", "nodes", "ms", "widgets"), height=6)
+        self.path_table = self._create_table(("path", "nodes", "ms", "widgets"), height=self.paths)
+
+        buttons = tk.Frame(self)
+        tk.Button(buttons, text="Reset", command=self.reset).pack(side=tk.LEFT, padx=5, pady=5)
+        tk.Button(buttons, text="Export JSON…", command=self.export_json).pack(side=tk.LEFT, padx=5, pady=5)
+        tk.Button(buttons, text="Export flame graph…", command=self.export_folded).pack(side=tk.LEFT, padx=5, pady=5)
+        buttons.pack(fill=tk.X)
+
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self._timer = None
+        self.refresh()
+
+    def _create_table(self, columns, height):
+        table = ttk.Treeview(self, columns=columns, show="headings", height=height)
+        for column in columns:
+            table.heading(column, text=column)
+            table.column(column, width=80 if column != columns[0] else 260, anchor="e" if column != columns[0] else "w")
+        table.pack(fill=tk.BOTH, expand=True, padx=5)
+        return table
+
+    def refresh(self):
+        profiler = self.profiler
+        last = profiler.last
+        lines = [f"renders: {profiler.render_count}"]
+        if last is not None:
+            lines.append(f"last: {last['path'] or '/'} {last['seconds'] * 1000:.1f} ms, "
+                         f"{last['nodes']} nodes, {last['widgets']} widgets")
+        lines.append("total: " + ", ".join(f"{phase} {profiler.totals[phase] * 1000:.1f} ms" for phase in PHASES))
+        self.summary.configure(text="\n".join(lines))
+
+        self.renderer_table.delete(*self.renderer_table.get_children())
+        for name, (nodes, seconds, widgets) in sorted(profiler.renderers.items(), key=lambda e: -e[1][1]):
+            self.renderer_table.insert("", tk.END, values=(name, nodes, f"{seconds * 1000:.1f}", widgets))
+        self.path_table.delete(*self.path_table.get_children())
+        for path, nodes, seconds, widgets in profiler.top_paths(self.paths):
+            self.path_table.insert("", tk.END, values=(json_pointer(path) or "/", nodes, f"{seconds * 1000:.1f}", widgets))
+
+        self._timer = self.after(self.interval_ms, self.refresh)
+
+    def reset(self):
+        self.profiler.reset()
+
+    def export_json(self):
+        file_path = filedialog.asksaveasfilename(parent=self, defaultextension=".json", filetypes=[("JSON files", "*.json")])
+        if file_path:
+            self.profiler.export_json(file_path)
+            logger.info(f"Render statistics exported to {file_path}")
+
+    def export_folded(self):
+        file_path = filedialog.asksaveasfilename(parent=self, defaultextension=".folded",
+                                                 filetypes=[("Folded stacks", "*.folded"), ("All files", "*")])
+        if file_path:
+            self.profiler.export_folded(file_path)
+            logger.info(f"Folded render stacks exported to {file_path}")
+
+    def close(self):
+        if self._timer is not None:
+            self.after_cancel(self._timer)
+        if not self._was_enabled:
+            self.editor.disable_profiling()
+        self.destroy()
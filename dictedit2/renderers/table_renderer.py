@@ -0,0 +1,144 @@
+import logging
+import tkinter as tk
+from tkinter import ttk
+
+from dictedit2.operations import Insert
+from dictedit2.render_tree import table_columns
+from dictedit2.renderers.list_renderer import ListRendererCustom
+
+logger = logging.getLogger(__name__)
+
+MAX_VISIBLE_ROWS = 15
+
+
+def blank_like(value):
+    """Empty value of the same type as `value`, used to fill a new table row."""
+    if isinstance(value, dict):
+        return {key: blank_like(cell) for key, cell in value.items()}
+    if isinstance(value, list):
+        return [blank_like(cell) for cell in value]
+    if value is None:
+        return None
+    try:
+        return type(value)()
+    except TypeError:
+        return None
+
+
+class TableRendererCustom(ListRendererCustom):
+    """Lists of equally shaped rows (matrices, records) in one Treeview.
+
+    The whole table costs a frame, a Treeview, a scrollbar and a single floating Entry
+    that is placed over a cell while it is edited, however many cells there are.
+    The renderer is picked by looking at the first rows only; if a later row does not
+    fit, the list is shown as a plain list instead.
+    """
+    def render(self, item):
+        self.tree = None
+        self.cell_editor = None
+        expanded = self.editor.is_expanded(self.path)
+        self.columns = table_columns(item) if expanded else None
+        if expanded and self.columns is None:
+            return super().render(item)
+
+        frame = self.create_frame(bg_color=self.appearance()["bg_color"])
+        self.create_header(frame, item)
+        if not expanded:
+            return
+        column_ids = [str(position) for position in range(len(self.columns))]
+        self.tree = ttk.Treeview(frame, columns=column_ids, height=min(len(item), MAX_VISIBLE_ROWS), selectmode="browse")
+        self.tree.heading("#0", text="#")
+        self.tree.column("#0", width=50, stretch=False)
+        for column_id, column in zip(column_ids, self.columns):
+            self.tree.heading(column_id, text=str(column))
+            self.tree.column(column_id, width=80, minwidth=40)
+        for position, row in enumerate(item):
+            self.tree.insert("", tk.END, iid=str(position), text=str(position), values=self._row_values(row))
+
+        scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.grid(row=1, column=0, columnspan=2, sticky="ew")
+        scrollbar.grid(row=1, column=2, sticky="ns")
+        frame.columnconfigure(0, weight=1)
+        self.tree.bind("<Double-Button-1>", self._start_edit)
+
+        buttons = self.gui_utils.create_plain_frame(frame, self.appearance()["bg_color"])
+        buttons.grid(row=2, column=0, sticky="w")
+        self.gui_utils.create_button(buttons, text="+", command=self.add_row).pack(side=tk.LEFT, padx=2, pady=2)
+        self.gui_utils.create_button(buttons, text="-", command=self.remove_selected_row).pack(side=tk.LEFT, padx=2, pady=2)
+
+    def _row_values(self, row):
+        if isinstance(row, dict):
+            # Rows may list the same keys in another order than the first row
+            return [str(row.get(column, "")) for column in self.columns]
+        return [str(cell) for cell in row]
+
+    def refresh_descendant(self, path):
+        # Cell edits update one Treeview item instead of rebuilding the table
+        relative = path[len(self.path):]
+        if self.tree is None or len(relative) != 2 or not self.tree.exists(str(relative[0])):
+            return False
+        try:
+            cell = self.editor.get_data_at_path(path)
+        except (KeyError, IndexError, TypeError):
+            return False
+        if isinstance(cell, (dict, list)) or relative[1] not in self.columns:
+            return False
+        self.tree.set(str(relative[0]), str(self.columns.index(relative[1])), str(cell))
+        return True
+
+    def _start_edit(self, event):
+        row_id = self.tree.identify_row(event.y)
+        column = self.tree.identify_column(event.x)
+        if not row_id or column == "#0":
+            return
+        column_id = str(int(column[1:]) - 1)
+        bbox = self.tree.bbox(row_id, column_id)
+        if not bbox:
+            return
+
+        self._finish_edit()
+        x, y, width, height = bbox
+        self.cell_editor = tk.Entry(self.tree)
+        self.cell_editor.insert(0, self.tree.set(row_id, column_id))
+        self.cell_editor.place(x=x, y=y, width=width, height=height)
+        self.cell_editor.focus_set()
+        self.cell_editor.bind("<Return>", lambda e: self._finish_edit(int(row_id), int(column_id)))
+        self.cell_editor.bind("<FocusOut>", lambda e: self._finish_edit(int(row_id), int(column_id)))
+        self.cell_editor.bind("<Escape>", lambda e: self._finish_edit())
+
+    def _finish_edit(self, row=None, column=None):
+        cell_editor, self.cell_editor = self.cell_editor, None
+        if cell_editor is None:
+            return
+        text = cell_editor.get()
+        cell_editor.destroy()
+        if row is not None:
+            try:
+                self.editor.update_value(self.current_path() + (row, self.columns[column]), text)
+            except ValueError as e:
+                logger.error(f"Validation failed: {e}")
+
+    def add_row(self):
+        item = self.editor.get_data_at_path(self.current_path())
+        path = self.current_path() + (len(item),)
+        self.editor.apply(Insert(path, blank_like(item[-1])), "add_row")
+
+    def remove_selected_row(self):
+        selection = self.tree.selection() if self.tree is not None else ()
+        if selection:
+            self.editor.handle_action(self.current_path() + (int(selection[0]),), "remove_item")
+
+    def get_metadata(self):
+        return {
+            "name": "Table",
+            "help_text": "Double-click a cell to edit it.",
+            "context_menu": [],
+            "default_width": 10,
+            "multiline": False,
+            "height": 5,
+            "action_buttons": {}
+        }
+
+    def appearance(self):
+        return {"bg_color": "lightgreen", "font": "Helvetica"}
@@ -0,0 +1,72 @@
+import datetime
+import decimal
+import enum
+
+from dictedit2.renderers.value_renderer import ValueRendererCustom
+
+
+class TypedValueRendererCustom(ValueRendererCustom):
+    """Value renderer that shows and parses one specific type instead of falling back to strings."""
+    parses_values = True
+
+    def render(self, item):
+        self.value_type = type(item)
+        super().render(item)
+
+    def get_metadata(self):
+        metadata = super().get_metadata()
+        metadata["multiline"] = False
+        return metadata
+
+
+class DatetimeRendererCustom(TypedValueRendererCustom):
+    """Dates, times and datetimes in ISO 8601 format."""
+    def format_value(self, item):
+        return item.isoformat()
+
+    def parse_value(self, text):
+        return self.value_type.fromisoformat(text.strip())
+
+
+class DecimalRendererCustom(TypedValueRendererCustom):
+    def parse_value(self, text):
+        try:
+            return decimal.Decimal(text.strip())
+        except decimal.InvalidOperation:
+            raise ValueError(f"'{text}' is not a decimal number.") from None
+
+
+class BytesRendererCustom(TypedValueRendererCustom):
+    """Bytes as space-separated hex pairs."""
+    def format_value(self, item):
+        return item.hex(" ")
+
+    def parse_value(self, text):
+        return self.value_type(bytes.fromhex(text))
+
+
+class EnumRendererCustom(TypedValueRendererCustom):
+    """Enum members by name."""
+    def format_value(self, item):
+        return item.name
+
+    def parse_value(self, text):
+        try:
+            return self.value_type[text.strip()]
+        except KeyError:
+            names = ", ".join(self.value_type.__members__)
+            raise ValueError(f"'{text}' is not one of {names}.") from None
+
+    def get_metadata(self):
+        metadata = super().get_metadata()
+        metadata["help_text"] = ", ".join(self.value_type.__members__)
+        return metadata
+
+
+def register_typed_renderers(registry):
+    registry.register(datetime.date, DatetimeRendererCustom)
+    registry.register(datetime.time, DatetimeRendererCustom)
+    registry.register(decimal.Decimal, DecimalRendererCustom)
+    registry.register(bytes, BytesRendererCustom)
+    registry.register(bytearray, BytesRendererCustom)
+    registry.register(enum.Enum, EnumRendererCustom)
@@ -0,0 +1,46 @@
+import logging
+import tkinter as tk
+
+logger = logging.getLogger(__name__)
+
+
+class ValueEditorWindow(tk.Toplevel):
+    """Separate window for editing one large value.
+
+    The full text is loaded into a Text widget only when the window opens, so the tree
+    itself never holds more than a preview. `on_save(text)` runs on Save or Ctrl+S.
+    """
+    def __init__(self, master, title, text, on_save):
+        super().__init__(master)
+        self.title(title)
+        self.on_save = on_save
+
+        self.text = tk.Text(self, wrap=tk.NONE, undo=True, width=100, height=30)
+        y_scrollbar = tk.Scrollbar(self, orient=tk.VERTICAL, command=self.text.yview)
+        x_scrollbar = tk.Scrollbar(self, orient=tk.HORIZONTAL, command=self.text.xview)
+        self.text.configure(yscrollcommand=y_scrollbar.set, xscrollcommand=x_scrollbar.set)
+        self.text.insert("1.0", text)
+        self.text.edit_reset()
+
+        buttons = tk.Frame(self)
+        tk.Button(buttons, text="Save", command=self.save).pack(side=tk.LEFT, padx=5, pady=5)
+        tk.Button(buttons, text="Cancel", command=self.destroy).pack(side=tk.LEFT, padx=5, pady=5)
+
+        self.text.grid(row=0, column=0, sticky="nsew")
+        y_scrollbar.grid(row=0, column=1, sticky="ns")
+        x_scrollbar.grid(row=1, column=0, sticky="ew")
+        buttons.grid(row=2, column=0, columnspan=2, sticky="w")
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        self.bind("<Control-s>", lambda e: self.save())
+        self.bind("<Escape>", lambda e: self.destroy())
+        self.text.focus_set()
+
+    def save(self):
+        try:
+            self.on_save(self.text.get("1.0", "end-1c"))
+        except ValueError as e:
+            logger.error(f"Validation failed: {e}")
+            return
+        self.destroy()
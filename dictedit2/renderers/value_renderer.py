@@ -1,21 +1,42 @@
 import tkinter as tk
-from .base import CustomDataTypeRenderer
+from dictedit2.renderers.base import CustomDataTypeRenderer
+from dictedit2.render_tree import is_large_text, preview
+from dictedit2.renderers.value_editor import ValueEditorWindow
 
 class ValueRendererCustom(CustomDataTypeRenderer):
     def render(self, item):
         frame = self.create_frame(bg_color="lightyellow")
 
+        text = self.format_value(item)
+        if is_large_text(text):
+            self.render_preview(frame, text)
+            return
+
         metadata = self.get_metadata()
         multiline = metadata.get("multiline", False)
 
         if multiline:
-            entry = tk.Text(frame, wrap=tk.WORD)
+            entry = self.gui_utils.create_text(frame, wrap=tk.WORD)
         else:
-            entry = tk.Entry(frame)
+            entry = self.gui_utils.create_entry(frame)
 
         self.render_with_validation(item, entry)
         entry.grid(sticky="ew", row=1, column=0, columnspan=2)
 
+    def render_preview(self, frame, text):
+        """Show a short preview of a large value; the full text is only loaded by the edit window."""
+        label = self.gui_utils.create_label(frame, text=preview(text), bg_color=self.appearance()["bg_color"])
+        label.grid(sticky="w", row=1, column=0)
+        if not self.readonly:
+            button = self.gui_utils.create_button(frame, text="Edit\u2026", command=self.open_editor)
+            button.grid(row=1, column=1, padx=5)
+
+    def open_editor(self):
+        path = self.current_path()
+        text = self.format_value(self.editor.get_data_at_path(path))
+        # Not a child of the frame, which is recycled whenever this node is re-rendered
+        ValueEditorWindow(self.frame.winfo_toplevel(), f"Edit {'/'.join(map(str, path))}", text, self.commit_text)
+
     def update_value(self, entry):
         new_value = entry.get()
         self.editor.update_value(self.path, new_value)
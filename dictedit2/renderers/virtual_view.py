@@ -0,0 +1,256 @@
+import logging
+import tkinter as tk
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from tkinter import Scrollbar, Canvas
+
+from dictedit2.render_tree import CONTAINER_NAMES, build_render_tree, flatten, is_large_text, preview, summarize
+from dictedit2.renderers.value_editor import ValueEditorWindow
+
+logger = logging.getLogger(__name__)
+
+ROW_HEIGHTS = {"dict": 30, "list": 30, "value": 28}
+INDENT_WIDTH = 20
+OVERSCAN = 10
+
+
+def flatten_tree(data, is_expanded=None):
+    """Rows of the flat view: the render tree of `data` in pre-order.
+
+    Children of containers for which `is_expanded(path)` is false are skipped.
+    """
+    return flatten(build_render_tree(data, is_expanded))
+
+
+def row_offsets(rows):
+    """Top y coordinate of every row, followed by the total height."""
+    return list(accumulate((ROW_HEIGHTS[row.kind] for row in rows), initial=0))
+
+
+class VirtualRow:
+    """A recyclable set of widgets that displays whichever row it is bound to."""
+    def __init__(self, view):
+        self.view = view
+        self.row = None
+        self.bound_text = None
+
+        self.frame = tk.Frame(view.canvas, bd=1, relief=tk.GROOVE)
+        self.frame.columnconfigure(3, weight=1)
+        self.indent = tk.Frame(self.frame, width=0, height=1)
+        self.indent.grid(row=0, column=0)
+        self.toggle_button = tk.Button(self.frame, command=self._on_toggle)
+        self.key_label = tk.Label(self.frame, anchor="w")
+        self.key_label.grid(row=0, column=2, sticky="w", padx=2)
+        self.entry = tk.Entry(self.frame)
+        self.summary = tk.Label(self.frame, anchor="w", font=("Arial", 10, "bold"))
+        self.remove_button = tk.Button(self.frame, text="-", command=self._on_remove)
+        self.add_button = tk.Button(self.frame, text="+", command=self._on_add)
+
+        self.entry.bind("<FocusOut>", lambda e: self.commit())
+        self.entry.bind("<Return>", lambda e: self.commit())
+        self.entry.bind("<Double-Button-1>", lambda e: self._open_editor())
+
+        self.item = view.canvas.create_window(0, 0, window=self.frame, anchor="nw", state="hidden")
+
+    def bind(self, row, y, width):
+        if self.row is not None and self.row.path != row.path:
+            self._commit_later()
+        self.row = row
+        editor = self.view.editor
+        item = editor.get_data_at_path(row.path)
+
+        self.indent.configure(width=row.depth * INDENT_WIDTH)
+        self.key_label.configure(text="" if row.key is None else row.label)
+
+        if row.kind == "value":
+            self.toggle_button.grid_remove()
+            self.summary.grid_remove()
+            self.add_button.grid_remove()
+            text = str(item)
+            self.entry.configure(state="normal")
+            self.entry.delete(0, tk.END)
+            if is_large_text(text):
+                # Large values show a read-only preview; double-click edits them in a window
+                self.bound_text = None
+                self.entry.insert(0, preview(text))
+                self.entry.configure(state="readonly")
+            else:
+                self.bound_text = text
+                self.entry.insert(0, text)
+            self.entry.grid(row=0, column=3, sticky="ew")
+        else:
+            self.entry.grid_remove()
+            self.bound_text = None
+            expanded = editor.is_expanded(row.path)
+            self.toggle_button.configure(text="\u25be" if expanded else "\u25b8")
+            self.toggle_button.grid(row=0, column=1)
+            name = CONTAINER_NAMES[row.kind]
+            self.summary.configure(text=f"{name} ({summarize(item)})")
+            self.summary.grid(row=0, column=3, sticky="ew")
+            self.add_button.grid(row=0, column=5, padx=2)
+
+        bg_color = {"dict": "lightblue", "list": "lightgreen", "value": "lightyellow"}[row.kind]
+        for widget in (self.frame, self.indent, self.key_label, self.summary):
+            widget.configure(bg=bg_color)
+
+        self.show_issues()
+
+        if row.path:
+            self.remove_button.grid(row=0, column=4, padx=2)
+        else:
+            self.remove_button.grid_remove()
+
+        canvas = self.view.canvas
+        canvas.coords(self.item, 0, y)
+        canvas.itemconfigure(self.item, width=width, height=ROW_HEIGHTS[row.kind], state="normal")
+
+    def show_issues(self):
+        messages = self.view.editor.issues_at(self.row.path) if self.view.editor.issues else None
+        self.frame.configure(highlightbackground="red", highlightcolor="red", highlightthickness=2 if messages else 0)
+
+    def hide(self):
+        self._commit_later()
+        self.row = None
+        self.view.canvas.itemconfigure(self.item, state="hidden")
+
+    def commit(self):
+        if self.row is None or self.row.kind != "value" or self.bound_text is None:
+            return
+        text = self.entry.get()
+        if text != self.bound_text:
+            self.bound_text = text
+            self._store(self.row.node_id, self.row.path, text)
+
+    def _current_path(self, node_id, path):
+        """Path now of the node that was at `path`; edits stored later must follow it if it moved."""
+        if node_id is None:
+            return path
+        try:
+            return self.view.editor.path_of(node_id)
+        except KeyError:
+            raise ValueError(f"{'/'.join(map(str, path))} was removed.") from None
+
+    def _store(self, node_id, path, text):
+        try:
+            self.view.editor.update_value(self._current_path(node_id, path), text)
+        except ValueError as e:
+            logger.error(f"Validation failed: {e}")
+
+    def _commit_later(self):
+        # Keep text typed into a row that is being recycled, without re-entering the refresh
+        if self.row is not None and self.bound_text is not None and self.entry.get() != self.bound_text:
+            self.view.canvas.after_idle(self._store, self.row.node_id, self.row.path, self.entry.get())
+            self.bound_text = self.entry.get()
+
+    def _open_editor(self):
+        if self.row is None or self.row.kind != "value" or self.bound_text is not None:
+            return
+        editor = self.view.editor
+        node_id, path = self.row.node_id, self.row.path
+        text = str(editor.get_data_at_path(path))
+        ValueEditorWindow(self.view.canvas.winfo_toplevel(), f"Edit {'/'.join(map(str, path))}", text,
+                          lambda new_text: editor.update_value(self._current_path(node_id, path), new_text))
+
+    def _on_toggle(self):
+        self.view.editor.toggle_expanded(self.row.path)
+
+    def _on_remove(self):
+        path = self.row.path
+        action = "remove_item" if isinstance(path[-1], int) else "remove_key"
+        self.view.editor.handle_action(path, action)
+
+    def _on_add(self):
+        editor = self.view.editor
+        path = self.row.path
+        if self.row.kind == "dict":
+            editor.add_key(path)
+        else:
+            editor.handle_action(path + (len(editor.get_data_at_path(path)),), "add_item")
+
+
+class VirtualTreeView:
+    """Scrollable view that only materializes widgets for the rows inside the viewport."""
+    def __init__(self, master, editor, width, height):
+        self.editor = editor
+        self.rows = []
+        self.offsets = [0]
+        self._active = {}
+        self._free = []
+        self._refresh_pending = False
+
+        self.canvas = Canvas(master, width=width, height=height)
+        self.scrollbar = Scrollbar(master, orient=tk.VERTICAL, command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self._on_yscroll)
+
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.canvas.bind("<Configure>", lambda e: self.schedule_refresh())
+        self.canvas.bind_all("<MouseWheel>", self._on_mouse_scroll)
+
+    @property
+    def widget_count(self):
+        return len(self._active) + len(self._free)
+
+    def set_rows(self, rows):
+        """Replace the flattened rows; every materialized row is rebound on the next refresh."""
+        self.rows = rows
+        self.offsets = row_offsets(rows)
+        for index in list(self._active):
+            self._release(index)
+        self.canvas.configure(scrollregion=(0, 0, 0, self.offsets[-1]))
+        self.refresh()
+
+    def scroll_to(self, path):
+        """Scroll so that the row of `path` is at the top of the viewport, if it has a row."""
+        for position, row in enumerate(self.rows):
+            if row.path == path:
+                self.canvas.yview_moveto(self.offsets[position] / max(1, self.offsets[-1]))
+                self.refresh()
+                return True
+        return False
+
+    def visible_range(self):
+        top = self.canvas.canvasy(0)
+        bottom = top + self.canvas.winfo_height()
+        first = max(0, bisect_right(self.offsets, top) - 1 - OVERSCAN)
+        last = min(len(self.rows), bisect_left(self.offsets, bottom) + OVERSCAN)
+        return first, last
+
+    def refresh(self, rebind=False):
+        self._refresh_pending = False
+        first, last = self.visible_range()
+        for index in list(self._active):
+            if not first <= index < last:
+                self._release(index)
+
+        width = self.canvas.winfo_width()
+        for index in range(first, last):
+            widget = self._active.get(index)
+            if widget is None:
+                widget = self._free.pop() if self._free else VirtualRow(self)
+                self._active[index] = widget
+            elif not rebind:
+                continue
+            widget.bind(self.rows[index], self.offsets[index], width)
+
+    def refresh_markers(self):
+        for widget in self._active.values():
+            widget.show_issues()
+
+    def schedule_refresh(self):
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            self.canvas.after_idle(self.refresh)
+
+    def _release(self, index):
+        widget = self._active.pop(index)
+        widget.hide()
+        self._free.append(widget)
+
+    def _on_yscroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.schedule_refresh()
+
+    def _on_mouse_scroll(self, event):
+        self.canvas.yview_scroll(-1 * (event.delta // 120), "units")
@@ -0,0 +1,528 @@
+import json
+import logging
+import math
+import re
+import sys
+import time
+
+from dictedit2.json_io import BackgroundTask, snapshot
+from dictedit2.lazy_json import Unloaded
+
+logger = logging.getLogger(__name__)
+
+# Keywords that describe a schema without constraining values
+ANNOTATIONS = {"$schema", "$id", "$comment", "$defs", "definitions", "title", "description", "default", "examples"}
+# Preference when text could be read as several of a schema's types; strings take anything, so come last
+TYPE_ORDER = ("null", "integer", "number", "boolean", "object", "array", "string")
+NULL_WORDS = ("", "null", "None")
+
+
+def json_type(value):
+    """JSON Schema type name of a Python value; other types go by their class name."""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "integer"
+    if isinstance(value, float) or _is_decimal(value):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, list):
+        return "array"
+    if isinstance(value, dict):
+        return "object"
+    return type(value).__name__
+
+
+def _is_decimal(value):
+    # Not imported here: only documents holding Decimals have loaded the module
+    decimal = sys.modules.get("decimal")
+    return decimal is not None and isinstance(value, decimal.Decimal)
+
+
+def has_type(value, name):
+    kind = json_type(value)
+    if kind == name:
+        return True
+    if name == "number":
+        return kind == "integer"
+    # 1.0 is an integer in JSON Schema
+    return name == "integer" and kind == "number" and math.isfinite(value) and value == int(value)
+
+
+def parse_bool(text):
+    word = text.strip().lower()
+    if word in ("true", "yes", "on", "1"):
+        return True
+    if word in ("false", "no", "off", "0"):
+        return False
+    raise ValueError(f"'{text}' is not true or false.")
+
+
+def parse_scalar(text):
+    """Value of text typed into a field that has no type yet (e.g. a None placeholder).
+
+    JSON literals become null, booleans and numbers (as does the "None" a placeholder
+    shows); anything else stays text.
+    """
+    word = text.strip()
+    if word in NULL_WORDS:
+        return None
+    try:
+        return json.loads(word)
+    except ValueError:
+        return text
+
+
+def parse_as(text, name):
+    """`text` read as a value of the JSON type `name`; raises ValueError if it is not one."""
+    word = text.strip()
+    if name == "string":
+        return text
+    if name == "null":
+        if word in NULL_WORDS:
+            return None
+    elif name == "boolean":
+        return parse_bool(word)
+    elif name == "integer":
+        return int(word)
+    elif name == "number":
+        try:
+            return int(word)
+        except ValueError:
+            number = float(word)
+        if math.isfinite(number):
+            return number
+    elif name in ("object", "array"):
+        value = json.loads(word)
+        if has_type(value, name):
+            return value
+    raise ValueError(f"'{text}' is not a valid {name}.")
+
+
+def _equal(a, b):
+    # True == 1 in Python, but not in JSON
+    return a == b and isinstance(a, bool) == isinstance(b, bool)
+
+
+def _not_multiple(value, limit):
+    if isinstance(value, int) and isinstance(limit, int):
+        return value % limit != 0
+    # Float remainders are inexact: 0.3 % 0.1 is 0.09999999999999998
+    try:
+        quotient = value / limit
+    except OverflowError:
+        return False
+    return math.isfinite(quotient) and not math.isclose(quotient, round(quotient), rel_tol=1e-9)
+
+
+# What the size keywords count in
+KINDS = {"characters": str, "items": list, "members": dict}
+
+
+def _compile_checks(schema):
+    """Functions of one value that return a problem message, or None if it satisfies `schema`.
+
+    Only the value itself is checked; members are checked against their own rules.
+    """
+    checks = []
+
+    types = schema.get("type")
+    if types is not None:
+        types = (types,) if isinstance(types, str) else tuple(types)
+        expected = " or ".join(types)
+
+        def check_type(value):
+            if not any(has_type(value, name) for name in types):
+                return f"Expected {expected}, got {json_type(value)}."
+        checks.append(check_type)
+
+    if "const" in schema:
+        const = schema["const"]
+        checks.append(lambda value: None if _equal(value, const) else f"Must be {json.dumps(const)}.")
+
+    if "enum" in schema:
+        members = schema["enum"]
+        names = ", ".join(json.dumps(member) for member in members)
+        checks.append(lambda value: None if any(_equal(value, m) for m in members) else f"Must be one of {names}.")
+
+    def number_check(keyword, fails, text):
+        if keyword in schema:
+            limit = schema[keyword]
+            checks.append(lambda value: f"Must be {text} {limit}." if json_type(value) in ("integer", "number")
+                          and fails(value, limit) else None)
+
+    number_check("minimum", lambda value, limit: value < limit, "at least")
+    number_check("maximum", lambda value, limit: value > limit, "at most")
+    number_check("exclusiveMinimum", lambda value, limit: value <= limit, "greater than")
+    number_check("exclusiveMaximum", lambda value, limit: value >= limit, "less than")
+    number_check("multipleOf", _not_multiple, "a multiple of")
+
+    def size_check(keyword, kind, fails, text):
+        if keyword in schema:
+            limit = schema[keyword]
+            checks.append(lambda value: f"Must have {text} {limit} {kind}." if isinstance(value, KINDS[kind])
+                          and fails(len(value), limit) else None)
+
+    size_check("minLength", "characters", lambda size, limit: size < limit, "at least")
+    size_check("maxLength", "characters", lambda size, limit: size > limit, "at most")
+    size_check("minItems", "items", lambda size, limit: size < limit, "at least")
+    size_check("maxItems", "items", lambda size, limit: size > limit, "at most")
+    size_check("minProperties", "members", lambda size, limit: size < limit, "at least")
+    size_check("maxProperties", "members", lambda size, limit: size > limit, "at most")
+
+    if "pattern" in schema:
+        pattern = re.compile(schema["pattern"])
+        checks.append(lambda value: f"Must match {pattern.pattern}." if isinstance(value, str)
+                      and not pattern.search(value) else None)
+
+    if schema.get("uniqueItems"):
+        def check_unique(value):
+            if isinstance(value, list):
+                seen = []
+                for item in value:
+                    if any(_equal(item, other) for other in seen):
+                        return f"Items must be unique; {json.dumps(item, default=str)} repeats."
+                    seen.append(item)
+        checks.append(check_unique)
+
+    if schema.get("required"):
+        required = schema["required"]
+
+        def check_required(value):
+            if isinstance(value, dict):
+                missing = [key for key in required if key not in value]
+                if missing:
+                    return f"Missing {', '.join(missing)}."
+        checks.append(check_required)
+
+    if schema.get("additionalProperties") is False:
+        properties = schema.get("properties", {})
+        patterns = [re.compile(pattern) for pattern in schema.get("patternProperties", {})]
+
+        def check_additional(value):
+            if isinstance(value, dict):
+                extra = [str(key) for key in value if key not in properties
+                         and not any(isinstance(key, str) and p.search(key) for p in patterns)]
+                if extra:
+                    return f"Unexpected {', '.join(extra)}."
+        checks.append(check_additional)
+
+    return checks
+
+
+class Rule:
+    """One schema compiled into a checker of single values, a converter of typed text and child rules."""
+    def __init__(self, schema, compile_schema):
+        self.schema = schema
+        if isinstance(schema, bool):
+            self.checks = [] if schema else [lambda value: "Not allowed here."]
+            schema = {}
+        else:
+            self.checks = _compile_checks(schema)
+        # Nothing below a schema without constraints can fail, so validation skips the subtree
+        self.unconstrained = not self.checks and all(keyword in ANNOTATIONS for keyword in schema)
+        types = schema.get("type")
+        types = (types,) if isinstance(types, str) else types
+        self.types = sorted(types, key=TYPE_ORDER.index) if types else None
+        self.enum = schema.get("enum")
+        self._compile = compile_schema
+        self._properties = schema.get("properties", {})
+        self._pattern_properties = [(re.compile(pattern), sub) for pattern, sub in
+                                    schema.get("patternProperties", {}).items()]
+        self._additional = schema.get("additionalProperties", True)
+        self._items = schema.get("items", True)
+
+    @property
+    def converts(self):
+        """True if the schema says what type text typed for this value should become."""
+        return self.types is not None or self.enum is not None
+
+    def problems(self, value):
+        messages = []
+        for check in self.checks:
+            message = check(value)
+            if message is not None:
+                messages.append(message)
+        return messages
+
+    def child(self, key):
+        """Rule for the member `key` (list items by their int index)."""
+        if isinstance(key, int) and not isinstance(key, bool):
+            return self._compile(self._items)
+        if key in self._properties:
+            return self._compile(self._properties[key])
+        for pattern, sub in self._pattern_properties:
+            if isinstance(key, str) and pattern.search(key):
+                return self._compile(sub)
+        # additionalProperties false is reported on the container, not on each member
+        return self._compile(self._additional if self._additional is not False else True)
+
+    def convert(self, text):
+        """`text` as a value this schema expects; raises ValueError if there is none."""
+        if self.enum is not None:
+            word = text.strip()
+            for member in self.enum:
+                if member == text or (not isinstance(member, str) and word in (json.dumps(member), str(member))):
+                    return member
+            if self.types is None:
+                raise ValueError(f"'{text}' is not one of {', '.join(json.dumps(m) for m in self.enum)}.")
+        for name in self.types:
+            try:
+                return parse_as(text, name)
+            except ValueError:
+                continue
+        raise ValueError(f"'{text}' is not a valid {' or '.join(self.types)}.")
+
+
+class Schema:
+    """A JSON Schema style document compiled into a Rule per path.
+
+    Supported keywords: type, enum, const, the numeric bounds and multipleOf, minLength,
+    maxLength, pattern, items, minItems, maxItems, uniqueItems, properties,
+    patternProperties, additionalProperties, required, min/maxProperties and local $refs.
+    Other keywords are ignored. Each subschema is compiled once, and the rule of a path is
+    cached under its pattern (the path with list indices left out), so every item of a
+    list shares one lookup.
+    """
+    ITEM = None
+
+    def __init__(self, document):
+        self.document = document
+        # id of a subschema -> Rule; the document keeps the ids alive
+        self._compiled = {}
+        # path pattern -> Rule
+        self._rules = {}
+        self.root = self.compile(document)
+        self._rules[()] = self.root
+
+    @classmethod
+    def load(cls, file_path):
+        with open(file_path, encoding="utf-8") as file:
+            return cls(json.load(file))
+
+    def compile(self, schema):
+        rule = self._compiled.get(id(schema))
+        if rule is None:
+            if isinstance(schema, dict) and "$ref" in schema:
+                rule = self.compile(self._resolve_ref(schema["$ref"]))
+            else:
+                rule = Rule(schema, self.compile)
+            self._compiled[id(schema)] = rule
+        return rule
+
+    def _resolve_ref(self, ref):
+        if not ref.startswith("#"):
+            raise ValueError(f"Only local references are supported, not '{ref}'.")
+        target = self.document
+        for segment in ref[1:].split("/")[1:]:
+            target = target[segment.replace("~1", "/").replace("~0", "~")]
+        return target
+
+    def rule(self, path):
+        path = tuple(path)
+        pattern = tuple(self.ITEM if isinstance(key, int) and not isinstance(key, bool) else key for key in path)
+        rule = self._rules.get(pattern)
+        if rule is None:
+            rule = self._rules[pattern] = self.rule(path[:-1]).child(path[-1])
+        return rule
+
+    def validate(self, value, path=(), check_cancelled=None):
+        """Yield `(path, message)` for every problem in `value` (found at `path`), in document order.
+
+        Members that were not loaded yet (out-of-core documents) are skipped.
+        """
+        path = tuple(path)
+        stack = [(value, path, self.rule(path))]
+        visited = 0
+        while stack:
+            value, path, rule = stack.pop()
+            visited += 1
+            if check_cancelled is not None and visited % 1000 == 0:
+                check_cancelled()
+            if rule.unconstrained or isinstance(value, Unloaded):
+                continue
+            for message in rule.problems(value):
+                yield path, message
+            if isinstance(value, dict):
+                members = value.items()
+            elif isinstance(value, list):
+                members = enumerate(value)
+            else:
+                continue
+            # Reversed so the stack visits members in document order
+            stack.extend(reversed([(member, path + (key,), rule.child(key)) for key, member in members]))
+
+    def is_valid(self, value):
+        return next(self.validate(value), None) is None
+
+
+class ValidationTask(BackgroundTask):
+    """Validates a snapshot of a document on a worker thread.
+
+    Problems are published in batches as they are found (see `BackgroundTask.on_partial`),
+    at least every `interval` seconds; the result is the number of problems.
+    """
+    def __init__(self, master, data, schema, batch_size=200, interval=0.1, **kwargs):
+        super().__init__(master, **kwargs)
+        self.data = data
+        self.schema = schema
+        self.batch_size = batch_size
+        self.interval = interval
+
+    def work(self):
+        batch = []
+        found = 0
+        published = time.monotonic()
+        for issue in self.schema.validate(self.data, check_cancelled=self.check_cancelled):
+            batch.append(issue)
+            found += 1
+            if len(batch) >= self.batch_size or time.monotonic() - published >= self.interval:
+                self.publish(batch)
+                batch = []
+                published = time.monotonic()
+        if batch:
+            self.publish(batch)
+        return found
+
+
+class SchemaValidator:
+    """Checks an editor's document against a Schema and marks the rows with problems.
+
+    The whole document is validated in a ValidationTask and the markers appear as problems
+    are found. After that, an edit only re-checks the edited subtree and its container, on
+    the UI thread; edits made while the task runs are re-checked once it is done. While the
+    schema is attached, edited text is converted to the type the schema asks for and values
+    that break it are rejected (see DocumentModel.set_value).
+    """
+    def __init__(self, editor, schema, on_done=None):
+        self.editor = editor
+        self.schema = schema if isinstance(schema, Schema) else Schema(schema)
+        self.on_done = on_done
+        self.task = None
+        # JSON pointers edited while the task runs
+        self._queued = set()
+
+    @property
+    def running(self):
+        return self.task is not None
+
+    def start(self):
+        self.editor.model.schema = self.schema
+        self.editor.model.listeners.append(self.on_patches)
+        self.validate_all()
+        return self
+
+    def stop(self):
+        if self.on_patches in self.editor.model.listeners:
+            self.editor.model.listeners.remove(self.on_patches)
+        if self.editor.model.schema is self.schema:
+            self.editor.model.schema = None
+        self._cancel()
+        self.clear()
+
+    def _cancel(self):
+        self._queued.clear()
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def clear(self, path=None):
+        """Remove the markers in the subtree at `path` (all of them by default); returns their paths."""
+        editor = self.editor
+        paths = []
+        for node_id in list(editor.issues):
+            try:
+                node_path = editor.path_of(node_id)
+            except KeyError:
+                # The node was removed
+                del editor.issues[node_id]
+                continue
+            if path is None or node_path[:len(path)] == path:
+                del editor.issues[node_id]
+                paths.append(node_path)
+        editor.refresh_markers(paths)
+        return paths
+
+    def validate_all(self):
+        """Check the whole document again in the background."""
+        self._cancel()
+        self.clear()
+        self.task = ValidationTask(self.editor.master, snapshot(self.editor.data), self.schema,
+                                   on_partial=self._on_found, on_done=self._on_done, on_error=self._on_failed,
+                                   on_cancel=self._on_failed)
+        self.task.start()
+
+    def _on_found(self, issues):
+        editor = self.editor
+        paths = []
+        for path, message in issues:
+            try:
+                node_id = editor.index.id_at(path)
+            except KeyError:
+                continue
+            editor.issues.setdefault(node_id, []).append(message)
+            paths.append(path)
+        editor.refresh_markers(paths)
+
+    def _on_done(self, found):
+        self.task = None
+        logger.info(f"Schema validation found {found} problem(s)")
+        self._check_queued()
+        if self.on_done:
+            self.on_done(found)
+
+    def _on_failed(self, error=None):
+        self.task = None
+        self._queued.clear()
+        if error is not None:
+            logger.error(f"Schema validation failed: {error}")
+
+    def on_patches(self, patches):
+        if any(patch["path"] == "" for patch in patches):
+            self.validate_all()
+            return
+        if self.task is not None:
+            # Problems still arriving from the snapshot may point at nodes that changed or moved,
+            # so the edited containers are checked again when the task is done
+            for patch in patches:
+                if patch["op"] in ("add", "remove", "move"):
+                    self._queued.add(patch["path"].rpartition("/")[0])
+                    if "from" in patch:
+                        self._queued.add(patch["from"].rpartition("/")[0])
+                else:
+                    self._queued.add(patch["path"])
+            return
+        for patch in patches:
+            self.check(self.editor.index.existing_path(patch["path"]))
+
+    def _check_queued(self):
+        index = self.editor.index
+        paths = sorted({index.existing_path(pointer) for pointer in self._queued}, key=len)
+        self._queued.clear()
+        checked = []
+        for path in paths:
+            if not any(path[:len(outer)] == outer for outer in checked):
+                self.check(path)
+                checked.append(path)
+
+    def check(self, path):
+        """Validate the subtree at `path` again, and the container holding it."""
+        path = tuple(path)
+        editor = self.editor
+        paths = self.clear(path)
+        issues = list(self.schema.validate(editor.get_data_at_path(path), path))
+        if path:
+            parent = path[:-1]
+            node_id = editor.index.id_at(parent)
+            paths.append(parent)
+            editor.issues.pop(node_id, None)
+            problems = self.schema.rule(parent).problems(editor.get_data_at_path(parent))
+            issues[:0] = [(parent, message) for message in problems]
+        for issue_path, message in issues:
+            editor.issues.setdefault(editor.index.id_at(issue_path), []).append(message)
+            paths.append(issue_path)
+        editor.refresh_markers(paths)
+        return issues
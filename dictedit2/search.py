@@ -0,0 +1,185 @@
+import logging
+import re
+
+from dictedit2.render_tree import node_kind
+
+logger = logging.getLogger(__name__)
+
+
+def scalar_text(value):
+    """Text a scalar is searched by; matches what the value entry displays."""
+    return str(value)
+
+
+class SearchResults:
+    """Matches of one query, as paths in document order plus the ancestors needed to show them."""
+    def __init__(self, query, options, paths, generation):
+        self.query = query
+        self.options = options
+        self.paths = paths
+        self.generation = generation
+        self.matches = set(paths)
+        self.ancestors = {path[:depth] for path in paths for depth in range(len(path))}
+        self.visible = self.matches | self.ancestors
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __iter__(self):
+        return iter(self.paths)
+
+    def __getitem__(self, position):
+        return self.paths[position]
+
+
+class SearchIndex:
+    """Inverted index from the text of dict keys and scalar values to node IDs.
+
+    Queries scan the distinct terms rather than the document, and a query that extends
+    the previous substring query only rescans the terms that matched before. The index is
+    built on the first query and then kept current from the model's change patches.
+    """
+    def __init__(self, model):
+        self.model = model
+        self.built = False
+        # Bumped on every change, so results can tell whether they are stale
+        self.generation = 0
+        self.keys = {}
+        self.values = {}
+        # node ID -> (key term, value term) as currently indexed
+        self._entries = {}
+        self._narrowing = None
+        model.listeners.append(self.on_patches)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def rebuild(self):
+        self.keys = {}
+        self.values = {}
+        self._entries = {}
+        self._index_subtree(())
+        self.built = True
+        logger.debug(f"Search index built with {len(self.keys)} key and {len(self.values)} value terms")
+
+    def on_patches(self, patches):
+        self.generation += 1
+        self._narrowing = None
+        if not self.built:
+            return
+        for patch in patches:
+            if patch["path"] == "":
+                self.rebuild()
+            elif patch["op"] != "remove":
+                # Removed nodes are dropped lazily when a query runs into them
+                self._index_subtree(self.model.index.existing_path(patch["path"]))
+        if len(self._entries) > 2 * len(self.model.index):
+            self.rebuild()
+
+    def reindex(self, path):
+        """Index the subtree at `path` again, e.g. after it was loaded from disk."""
+        self._index_subtree(tuple(path))
+
+    def _index_subtree(self, path):
+        index = self.model.index
+        root = index.node_at(path)
+        stack = [(root, self.model.get(path))]
+        while stack:
+            node, value = stack.pop()
+            parent = node.parent
+            key_term = str(node.key) if parent is not None and isinstance(parent.children, dict) else None
+            value_term = None if node_kind(value) != "value" else scalar_text(value)
+            self._set_entry(node.node_id, key_term, value_term)
+            if isinstance(node.children, dict):
+                stack.extend((child, value[key]) for key, child in node.children.items())
+            elif node.children is not None:
+                stack.extend(zip(node.children, value))
+
+    def _set_entry(self, node_id, key_term, value_term):
+        old = self._entries.get(node_id)
+        if old == (key_term, value_term):
+            return
+        if old is not None:
+            self._discard(node_id, old)
+        self._entries[node_id] = (key_term, value_term)
+        if key_term is not None:
+            self.keys.setdefault(key_term, set()).add(node_id)
+        if value_term is not None:
+            self.values.setdefault(value_term, set()).add(node_id)
+
+    def _discard(self, node_id, entry):
+        for terms, term in ((self.keys, entry[0]), (self.values, entry[1])):
+            ids = terms.get(term)
+            if ids is not None:
+                ids.discard(node_id)
+                if not ids:
+                    del terms[term]
+
+    def search(self, query, regex=False, case_sensitive=False, keys=True, values=True):
+        """Find nodes whose key or scalar value contains `query` (or matches it as a regex).
+
+        Raises re.error for an invalid regular expression.
+        """
+        if not self.built:
+            self.rebuild()
+        options = (regex, case_sensitive, keys, values)
+        matching = self._match_terms(query, options)
+
+        live = self.model.index
+        node_ids = set()
+        stale = set()
+        for terms, term in matching:
+            for node_id in terms.get(term, ()):
+                (node_ids if node_id in live else stale).add(node_id)
+        self._purge(stale)
+        return SearchResults(query, options, self._document_order(node_ids), self.generation)
+
+    def _purge(self, node_ids):
+        for node_id in node_ids:
+            entry = self._entries.pop(node_id, None)
+            if entry is not None:
+                self._discard(node_id, entry)
+
+    def _match_terms(self, query, options):
+        regex, case_sensitive, keys, values = options
+        if not query:
+            return []
+        if regex:
+            pattern = re.compile(query, 0 if case_sensitive else re.IGNORECASE)
+            matches = pattern.search
+        else:
+            needle = query if case_sensitive else query.casefold()
+            matches = (lambda term: needle in term) if case_sensitive else (lambda term: needle in term.casefold())
+
+        narrowing = self._narrowing
+        if not regex and narrowing is not None and narrowing[1] == options and query.startswith(narrowing[0]):
+            candidates = narrowing[2]
+        else:
+            candidates = ([(self.keys, term) for term in self.keys] if keys else []) + \
+                         ([(self.values, term) for term in self.values] if values else [])
+
+        matching = [(terms, term) for terms, term in candidates if matches(term)]
+        self._narrowing = None if regex else (query, options, matching)
+        return matching
+
+    def _document_order(self, node_ids):
+        """Paths of `node_ids`, sorted the way they appear in the document."""
+        index = self.model.index
+        positions = {}
+
+        def sort_key(node_id):
+            node = index.nodes[node_id]
+            key = []
+            while node.parent is not None:
+                parent = node.parent
+                if isinstance(parent.children, dict):
+                    order = positions.get(parent.node_id)
+                    if order is None:
+                        order = positions[parent.node_id] = {k: i for i, k in enumerate(parent.children)}
+                    key.append(order[node.key])
+                else:
+                    key.append(node.key)
+                node = parent
+            return key[::-1]
+
+        return [index.path(node_id) for node_id in sorted(node_ids, key=sort_key)]
@@ -0,0 +1,197 @@
+import hashlib
+import logging
+import marshal
+import os
+import struct
+
+from dictedit2.json_io import CHUNK_SIZE, atomic_file, file_stamp
+from dictedit2.node_index import NodeIndex
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+# Byte length of the header that precedes a snapshot
+HEADER_LENGTH = struct.Struct(">I")
+SNAPSHOT_SUFFIX = ".snapshot"
+VIEW_SUFFIX = ".view"
+
+
+def default_directory():
+    """Per-user cache directory for document snapshots."""
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "dictedit2", "snapshots")
+
+
+def file_digest(file_path, check_cancelled=None):
+    """Content hash of a file, as computed by ImportTask while reading it."""
+    digest = hashlib.blake2b()
+    with open(file_path, "rb") as f:
+        while True:
+            if check_cancelled:
+                check_cancelled()
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SnapshotCache:
+    """Parsed JSON files kept in a fast-loading binary form, so reopening an unchanged file skips parsing.
+
+    An entry belongs to a file path and is used while the file's size and modification
+    time are unchanged; if only the time differs, the content hash decides. Snapshots are
+    written with marshal, which loads plain JSON values about twice as fast as json parses
+    them. The node index is rebuilt from the loaded data rather than stored: that gives the
+    same node IDs as the first import, so the expansion state saved with `save_view` still
+    applies, and is faster than unpickling a million index nodes. Least recently used
+    entries are evicted once the cache holds more than `max_bytes`.
+    """
+    def __init__(self, directory=None, max_bytes=1 << 30):
+        self.directory = directory or default_directory()
+        self.max_bytes = max_bytes
+
+    def entry_path(self, file_path):
+        key = hashlib.sha256(os.path.abspath(file_path).encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.directory, key + SNAPSHOT_SUFFIX)
+
+    def _read_header(self, f, file_path):
+        # marshal.load reads a file object in small pieces, so whole byte strings are decoded instead
+        length, = HEADER_LENGTH.unpack(f.read(HEADER_LENGTH.size))
+        header = marshal.loads(f.read(length))
+        if not isinstance(header, dict) or header.get("version") != CACHE_VERSION \
+                or header.get("path") != os.path.abspath(file_path):
+            return None
+        return header
+
+    def load(self, file_path, check_cancelled=None):
+        """`(data, index, expanded)` for `file_path` if its snapshot is current, else None."""
+        entry = self.entry_path(file_path)
+        try:
+            mtime_ns, size = file_stamp(file_path)
+            with open(entry, "rb") as f:
+                header = self._read_header(f, file_path)
+                if header is None or header["size"] != size:
+                    return None
+                if header["mtime_ns"] != mtime_ns and file_digest(file_path, check_cancelled) != header["digest"]:
+                    return None
+                data = marshal.loads(f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, ValueError, TypeError, KeyError, struct.error) as e:
+            logger.warning(f"Ignoring unreadable snapshot of {file_path}: {e}")
+            return None
+        if check_cancelled:
+            check_cancelled()
+        # Recently used entries are evicted last
+        os.utime(entry)
+        index = NodeIndex(data)
+        expanded = self._read_view(entry, header)
+        logger.info(f"Loaded {file_path} from its snapshot ({len(index)} nodes)")
+        return data, index, expanded
+
+    def store(self, file_path, data, digest, stamp, nodes):
+        """Save the parsed content of `file_path` as it was at `stamp` (see file_stamp).
+
+        `nodes` is the size of its fresh node index. Returns False if it cannot be stored.
+        """
+        mtime_ns, size = stamp
+        entry = self.entry_path(file_path)
+        header = {"version": CACHE_VERSION, "path": os.path.abspath(file_path), "size": size,
+                  "mtime_ns": mtime_ns, "digest": digest, "nodes": nodes}
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            encoded = marshal.dumps(header)
+            with atomic_file(entry, binary=True) as f:
+                f.write(HEADER_LENGTH.pack(len(encoded)))
+                f.write(encoded)
+                marshal.dump(data, f)
+        except (OSError, ValueError) as e:
+            # ValueError: a value marshal cannot write
+            logger.warning(f"Cannot store a snapshot of {file_path}: {e}")
+            return False
+        self._remove(entry[:-len(SNAPSHOT_SUFFIX)] + VIEW_SUFFIX)
+        self.evict()
+        return True
+
+    def save_view(self, file_path, expanded):
+        """Keep the expansion state (by node ID) of a document loaded from `file_path` unchanged."""
+        entry = self.entry_path(file_path)
+        try:
+            with open(entry, "rb") as f:
+                header = self._read_header(f, file_path)
+            if header is None:
+                return False
+            # Nodes added while editing got IDs a later rebuild would give to other nodes
+            view = {"digest": header["digest"],
+                    "expanded": {node_id: state for node_id, state in expanded.items() if node_id < header["nodes"]}}
+            with atomic_file(entry[:-len(SNAPSHOT_SUFFIX)] + VIEW_SUFFIX, binary=True) as f:
+                marshal.dump(view, f)
+        except (OSError, EOFError, ValueError, TypeError, struct.error) as e:
+            logger.warning(f"Cannot save the view of {file_path}: {e}")
+            return False
+        return True
+
+    def _read_view(self, entry, header):
+        try:
+            with open(entry[:-len(SNAPSHOT_SUFFIX)] + VIEW_SUFFIX, "rb") as f:
+                view = marshal.loads(f.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return {}
+        if not isinstance(view, dict) or view.get("digest") != header["digest"]:
+            return {}
+        return view.get("expanded", {})
+
+    def entries(self):
+        """`(path, size, last used)` of every snapshot, least recently used first."""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        entries = []
+        for name in names:
+            if not name.endswith(SNAPSHOT_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            size = stat.st_size
+            try:
+                size += os.path.getsize(path[:-len(SNAPSHOT_SUFFIX)] + VIEW_SUFFIX)
+            except OSError:
+                pass
+            entries.append((path, size, stat.st_mtime_ns))
+        entries.sort(key=lambda entry: entry[2])
+        return entries
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Remove least recently used snapshots until the cache fits in `max_bytes`."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            self._remove(path[:-len(SNAPSHOT_SUFFIX)] + VIEW_SUFFIX)
+            total -= size
+            logger.debug(f"Evicted snapshot {path}")
+
+    def clear(self):
+        for path, _, _ in self.entries():
+            self._remove(path)
+            self._remove(path[:-len(SNAPSHOT_SUFFIX)] + VIEW_SUFFIX)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -8,5 +8,8 @@ setup(
     license='',
     author='Administrator',
     author_email='erik@korper.nl',
-    description='GUI dictionary editor for python'
+    description='GUI dictionary editor for python',
+    entry_points={
+        'console_scripts': ['dictedit2=dictedit2.main:main'],
+    },
 )
\ No newline at end of file
@@ -0,0 +1,70 @@
+import unittest
+from dictedit2.changes import ChangeNotifier, coalesce, json_pointer
+from dictedit2.history import History
+from dictedit2.operations import Insert, Remove, RenameKey, SetValue
+
+
+def replace(path, old, value):
+    return {"op": "replace", "path": path, "old": old, "value": value}
+
+
+class TestPatches(unittest.TestCase):
+    def test_json_pointer_escapes(self):
+        self.assertEqual(json_pointer(("a/b", "m~n", 0)), "/a~1b/m~0n/0")
+        self.assertEqual(json_pointer(()), "")
+
+    def test_operation_patches(self):
+        data = {"a": 1, "b": [1]}
+        cases = [
+            (SetValue(("a",), 2), replace("/a", 1, 2)),
+            (Insert(("b", 1), "x"), {"op": "add", "path": "/b/1", "value": "x"}),
+            (Remove(("b", 0)), {"op": "remove", "path": "/b/0", "old": 1}),
+            (RenameKey(("a",), "c"), {"op": "move", "from": "/a", "path": "/c"}),
+        ]
+        for operation, expected in cases:
+            self.assertEqual(operation.patch(operation.apply(data)), expected)
+
+    def test_undo_entry_patches(self):
+        data = {"a": 1}
+        history = History()
+        history.record([SetValue(("a",), 2).apply(data)])
+        self.assertEqual(history.undo(data).patches(), [replace("/a", 2, 1)])
+
+
+class TestCoalesce(unittest.TestCase):
+    def test_bursts_on_one_path_merge(self):
+        patches = [replace("/a", 1, 2), replace("/a", 2, 3), replace("/b", "x", "y")]
+        self.assertEqual(coalesce(patches), [replace("/a", 1, 3), replace("/b", "x", "y")])
+
+    def test_changes_that_cancel_out_are_dropped(self):
+        self.assertEqual(coalesce([replace("/a", 1, 2), replace("/a", 2, 1)]), [])
+        add = {"op": "add", "path": "/l/0", "value": None}
+        remove = {"op": "remove", "path": "/l/0", "old": None}
+        self.assertEqual(coalesce([add, remove]), [])
+
+    def test_add_then_replace_keeps_final_value(self):
+        add = {"op": "add", "path": "/k", "value": ""}
+        self.assertEqual(coalesce([add, replace("/k", "", "v")]), [{"op": "add", "path": "/k", "value": "v"}])
+
+    def test_non_adjacent_patches_are_kept(self):
+        patches = [replace("/a", 1, 2), replace("/b", 1, 2), replace("/a", 2, 3)]
+        self.assertEqual(coalesce(patches), patches)
+
+
+class TestChangeNotifier(unittest.TestCase):
+    def test_immediate_delivery_without_window(self):
+        received = []
+        notifier = ChangeNotifier(None, received.append, window_ms=0)
+        notifier.push([replace("/a", 1, 2)])
+        notifier.push([])
+        self.assertEqual(received, [[replace("/a", 1, 2)]])
+
+    def test_no_callback_when_nothing_changed(self):
+        received = []
+        notifier = ChangeNotifier(None, received.append, window_ms=0)
+        notifier.push([replace("/a", 1, 2), replace("/a", 2, 1)])
+        self.assertEqual(received, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import copy
+import unittest
+from dictedit2.diff import Change, apply_changes, diff, merge, same_value
+from dictedit2.model import DocumentModel
+
+
+BASE = {"name": "svc", "replicas": 2, "ports": [80, 443], "env": {"A": "1", "B": "2"}}
+
+
+def apply_all(data, changes):
+    model = DocumentModel(copy.deepcopy(data))
+    apply_changes(model, changes)
+    return model.data
+
+
+class TestDiff(unittest.TestCase):
+    def test_dict_and_list_changes(self):
+        new = {"name": "svc", "replicas": 3, "ports": [8080], "env": {"B": "2", "C": "3"}, "tags": []}
+        changes = diff(BASE, new)
+        self.assertEqual({(c.kind, c.path) for c in changes}, {
+            ("replace", ("replicas",)), ("add", ("tags",)), ("remove", ("ports", 1)), ("replace", ("ports", 0)),
+            ("remove", ("env", "A")), ("add", ("env", "C")),
+        })
+        self.assertEqual(apply_all(BASE, changes), new)
+
+    def test_identical_documents_and_types(self):
+        self.assertEqual(diff(BASE, copy.deepcopy(BASE)), [])
+        self.assertEqual(diff({"a": 1}, {"a": True}), [Change("replace", ("a",), old=1, new=True)])
+        self.assertFalse(same_value([1], [1.0]))
+
+    def test_type_change_replaces_container(self):
+        self.assertEqual(diff({"a": [1]}, {"a": {"x": 1}}), [Change("replace", ("a",), old=[1], new={"x": 1})])
+
+    def test_applied_values_are_copies(self):
+        remote = {"env": {"A": "1", "B": "2"}, "extra": {"deep": [1]}}
+        model = DocumentModel({"env": {"A": "1", "B": "2"}})
+        apply_changes(model, diff(model.data, remote))
+        model.data["extra"]["deep"].append(2)
+        self.assertEqual(remote["extra"]["deep"], [1])
+
+
+class TestListMatching(unittest.TestCase):
+    def test_insert_in_middle_is_one_add(self):
+        old = [{"v": 1}, {"v": 2}, {"v": 3}]
+        new = [{"v": 1}, {"v": 9}, {"v": 2}, {"v": 3}]
+        self.assertEqual(diff(old, new), [Change("add", (1,), new={"v": 9})])
+        self.assertEqual(len(diff(old, new, lists="position")), 3)
+
+    def test_items_are_matched_by_id(self):
+        old = [{"id": "a", "n": 1}, {"id": "b", "n": 2}, {"id": "c", "n": 3}]
+        new = [{"id": "b", "n": 20}, {"id": "c", "n": 3}, {"id": "d", "n": 4}]
+        changes = diff(old, new)
+        self.assertEqual({(c.kind, c.old_path, c.new_path) for c in changes}, {
+            ("remove", (0,), (0,)), ("add", (3,), (2,)), ("replace", (1, "n"), (0, "n")),
+        })
+        self.assertEqual(apply_all(old, changes), new)
+
+    def test_single_changes_apply_to_either_side(self):
+        old = {"items": [1, 2, 3, 4], "name": "a"}
+        new = {"items": [1, 3, 4, 5], "name": "b"}
+        for document, source, target in (("old", old, new), ("new", new, old)):
+            model = DocumentModel(copy.deepcopy(source))
+            for _ in range(10):
+                changes = diff(model.data, target) if document == "old" else diff(target, model.data)
+                if not changes:
+                    break
+                model.apply(changes[-1].operation_on(document))
+            self.assertEqual(model.data, target)
+
+    def test_nested_lists_apply_in_order(self):
+        old = {"rows": [[1, 2], [3, 4], [5]], "tags": ["x", "y", "z"]}
+        new = {"rows": [[0], [1, 2], [3, 4, 4], [5]], "tags": ["z", "x"]}
+        self.assertEqual(apply_all(old, diff(old, new)), new)
+
+
+class TestMerge(unittest.TestCase):
+    def test_independent_changes_merge(self):
+        local = copy.deepcopy(BASE)
+        local["env"]["A"] = "local"
+        remote = copy.deepcopy(BASE)
+        remote["replicas"] = 5
+        changes, conflicts = merge(BASE, local, remote)
+        self.assertEqual((changes, conflicts), ([Change("replace", ("replicas",), old=2, new=5)], []))
+
+    def test_overlapping_changes_conflict(self):
+        local = copy.deepcopy(BASE)
+        local["env"]["A"] = "local"
+        remote = copy.deepcopy(BASE)
+        remote["env"] = {"A": "remote"}
+        changes, conflicts = merge(BASE, local, remote)
+        self.assertEqual(changes, [Change("remove", ("env", "B"), old="2")])
+        self.assertEqual([c.path for c in conflicts], [("env", "A")])
+
+    def test_changes_already_made_locally_are_dropped(self):
+        local = copy.deepcopy(BASE)
+        local["replicas"] = 3
+        del local["env"]["A"]
+        remote = copy.deepcopy(local)
+        self.assertEqual(merge(BASE, local, remote), ([], []))
+
+    def test_local_list_resize_protects_positions(self):
+        local = copy.deepcopy(BASE)
+        local["ports"].pop()
+        remote = copy.deepcopy(BASE)
+        remote["ports"][1] = 8443
+        changes, conflicts = merge(BASE, local, remote)
+        self.assertEqual(changes, [])
+        self.assertEqual([c.path for c in conflicts], [("ports", 1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
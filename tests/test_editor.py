@@ -1,5 +1,12 @@
 import unittest
 from dictedit2.editor import DataEditor
+from dictedit2.model import DocumentModel
+from dictedit2.file_watcher import FileWatcher
+from dictedit2.live import LiveUpdater
+from dictedit2.renderers.compare_view import CompareWindow
+from dictedit2.renderers.base import GUIUtils
+from dictedit2.schema import SchemaValidator
+import time
 import tkinter as tk
 
 class TestDataEditor(unittest.TestCase):
@@ -15,5 +22,231 @@ class TestDataEditor(unittest.TestCase):
         self.editor.update_value(("key",), "new_value")
         self.assertEqual(self.editor.data["key"], "new_value")
 
+    def test_update_value_keeps_sibling_widgets(self):
+        self.editor.data["other"] = "value"
+        self.editor.render()
+        sibling = self.editor._renderers[("other",)]
+
+        self.editor.update_value(("key",), "new_value")
+        self.assertIs(self.editor._renderers[("other",)], sibling)
+        self.assertTrue(sibling.frame.winfo_exists())
+
+    def test_nested_containers_start_collapsed(self):
+        self.editor.data["nested"] = {"inner": "value"}
+        self.editor.render()
+        self.assertNotIn(("nested", "inner"), self.editor._renderers)
+
+        self.editor.toggle_expanded(("nested",))
+        self.assertIn(("nested", "inner"), self.editor._renderers)
+
+        self.editor.render()
+        self.assertIn(("nested", "inner"), self.editor._renderers)
+
+    def test_rerender_reuses_pooled_widgets(self):
+        self.editor.render()
+        created = GUIUtils.pool.created
+        self.editor.render()
+        self.assertEqual(GUIUtils.pool.created, created)
+
+    def test_filter_and_jump_to_search_results(self):
+        self.editor.load({"key": "value", "nested": {"inner": "needle"}})
+        results = self.editor.search("needle")
+        self.assertEqual(results.paths, [("nested", "inner")])
+
+        self.editor.jump_to(results[0])
+        self.assertIn(("nested", "inner"), self.editor._renderers)
+
+        self.editor.set_filter(results)
+        self.assertNotIn(("key",), self.editor._renderers)
+        self.editor.set_filter(None)
+        self.assertIn(("key",), self.editor._renderers)
+
+    def test_batch_renders_once_and_rolls_back(self):
+        with self.editor.batch():
+            self.editor.update_value(("key",), "a")
+            self.editor.add_key(())
+            self.assertNotIn(("new_key_1",), self.editor._renderers)
+        self.assertIn(("new_key_1",), self.editor._renderers)
+        self.assertTrue(self.editor.undo())
+        self.assertEqual(self.editor.data, {"key": "value"})
+
+        with self.assertRaises(KeyError):
+            with self.editor.batch():
+                self.editor.update_value(("key",), "b")
+                self.editor.handle_action(("missing",), "remove_key")
+        self.assertEqual(self.editor.data, {"key": "value"})
+
+    def test_table_cell_edit_updates_in_place(self):
+        self.editor.load({"matrix": [[1, 2], [3, 4]]})
+        self.editor.set_expanded(("matrix",), True)
+        table = self.editor._renderers[("matrix",)]
+        self.editor.update_value(("matrix", 1, 0), "7")
+        self.assertIs(self.editor._renderers[("matrix",)], table)
+        self.assertEqual(table.tree.set("1", "0"), "7")
+        self.assertEqual(self.editor.data["matrix"][1][0], 7)
+
+    def test_table_cells_follow_the_column_order(self):
+        self.editor.load({"rows": [{"id": 1, "x": "a"}, {"x": "b", "id": 2}]})
+        self.editor.set_expanded(("rows",), True)
+        table = self.editor._renderers[("rows",)]
+        self.assertEqual([table.tree.heading(column, "text") for column in ("0", "1")], ["id", "x"])
+        self.assertEqual([table.tree.set("1", column) for column in ("0", "1")], ["2", "b"])
+
+    def test_irregular_late_row_falls_back_to_list(self):
+        self.editor.load({"rows": [[1, 2]] * 10 + [[3]]})
+        self.editor.set_expanded(("rows",), True)
+        self.assertIsNone(self.editor._renderers[("rows",)].tree)
+        self.assertIn(("rows", 10), self.editor._renderers)
+
+    def test_large_value_renders_preview(self):
+        self.editor.load({"blob": "A" * 100000})
+        renderer = self.editor._renderers[("blob",)]
+        widgets = renderer.frame.winfo_children()
+        self.assertFalse(any(isinstance(widget, (tk.Text, tk.Entry)) for widget in widgets))
+
+        renderer.commit_text("B" * 5)
+        self.assertEqual(self.editor.data["blob"], "BBBBB")
+
+    def test_profiler_records_renders_per_renderer(self):
+        profiler = self.editor.enable_profiling()
+        self.editor.update_value(("key",), "changed")
+        self.editor.render()
+        self.assertEqual(profiler.render_count, 2)
+        self.assertEqual(profiler.renderers["DictRendererCustom"][0], 1)
+        self.assertIn(("key",), profiler.paths)
+        self.assertGreater(profiler.last["widgets"], 0)
+        self.editor.disable_profiling()
+        self.editor.render()
+        self.assertEqual(profiler.render_count, 2)
+
+    def test_live_updates_render_only_touched_nodes(self):
+        self.editor.load({"a": 1, "b": 2, "c": 3})
+        untouched = self.editor._renderers[("b",)]
+        updater = LiveUpdater(self.editor, fps=60)
+        updater.queue.put(("a",), 10)
+        updater.queue.put(("c",), 20)
+        updater.queue.put(("a",), 11)
+        self.assertEqual(updater.flush(), 2)
+        self.assertEqual(self.editor.data, {"a": 11, "b": 2, "c": 20})
+        self.assertIs(self.editor._renderers[("b",)], untouched)
+        self.assertFalse(self.editor.history.can_undo)
+
+    def test_file_watcher_merges_external_changes(self):
+        self.editor.load({"a": 1, "b": 2, "c": 3})
+        untouched = self.editor._renderers[("b",)]
+        rebased = []
+        watcher = FileWatcher(self.editor, "unused.json", on_rebased=rebased.append)
+        self.editor.update_value(("c",), "30")
+        changes, conflicts = watcher.merge({"a": 10, "b": 2, "c": 4})
+        self.assertEqual(rebased, [{"a": 10, "b": 2, "c": 4}])
+        self.assertEqual(self.editor.data, {"a": 10, "b": 2, "c": 30})
+        self.assertIs(self.editor._renderers[("b",)], untouched)
+        self.assertEqual(list(watcher.conflicts), [("c",)])
+        watcher.accept(("c",))
+        self.assertEqual(self.editor.data["c"], 4)
+        self.assertEqual(watcher.conflicts, {})
+
+    def test_compare_window_applies_one_change(self):
+        self.editor.load({"a": 1, "b": [1, 2, 3]})
+        other = DocumentModel({"a": 2, "b": [1, 3]})
+        rendered = []
+        window = CompareWindow(self.root, self.editor.model, other, on_applied=lambda side, paths: rendered.append(paths))
+        self.assertEqual(len(window.changes), 2)
+        window.tree.selection_set(next(iid for iid, change in window.changes.items() if change.kind == "remove"))
+        window.apply_selected("new")
+        self.assertEqual(other.data, {"a": 2, "b": [1, 2, 3]})
+        window.refresh()
+        self.assertEqual(len(window.changes), 1)
+        window.apply_all("old")
+        self.assertEqual(self.editor.data, other.data)
+        self.assertEqual(len(rendered), 2)
+        window.close()
+
+    def test_schema_validator_marks_rows(self):
+        self.editor.load({"count": "one", "items": [1, "two"]})
+        schema = {"properties": {"count": {"type": "integer"}, "items": {"items": {"type": "integer"}}}}
+        validator = SchemaValidator(self.editor, schema).start()
+        deadline = time.monotonic() + 5
+        while validator.running and time.monotonic() < deadline:
+            self.root.update()
+        self.assertEqual(self.editor.issues_at(("count",)), ["Expected integer, got string."])
+        self.assertEqual(len(self.editor.issues_at(("items", 1))), 1)
+        frame = self.editor._renderers[("count",)].frame
+        self.assertEqual(int(frame.cget("highlightthickness")), 2)
+
+        self.editor.update_value(("count",), "3")
+        self.assertEqual(self.editor.data["count"], 3)
+        self.assertEqual(self.editor.issues_at(("count",)), [])
+        self.editor.handle_action(("items", 0), "remove_item")
+        self.assertEqual(len(self.editor.issues_at(("items", 0))), 1)
+        validator.stop()
+        self.assertEqual(self.editor.issues, {})
+        self.assertIsNone(self.editor.model.schema)
+
+    def test_edits_during_validation_are_checked_afterwards(self):
+        self.editor.load({"count": "one", "items": [1, "two", "three"]})
+        schema = {"properties": {"count": {"type": "integer"}, "items": {"items": {"type": "integer"}}}}
+        validator = SchemaValidator(self.editor, schema).start()
+        task = validator.task
+        self.editor.update_value(("count",), "3")
+        self.editor.handle_action(("items", 0), "remove_item")
+        self.assertIs(validator.task, task)
+        deadline = time.monotonic() + 5
+        while validator.running and time.monotonic() < deadline:
+            self.root.update()
+        self.assertEqual(self.editor.issues_at(("count",)), [])
+        self.assertEqual(len(self.editor.issues_at(("items", 0))), 1)
+        self.assertEqual(len(self.editor.issues_at(("items", 1))), 1)
+        validator.stop()
+
+    def test_bulk_edit_renders_once(self):
+        self.editor.load({"items": [{"status": "open"}, {"status": "open"}], "other": 1})
+        self.editor.set_expanded(("items",), True)
+        other = self.editor._renderers[("other",)]
+        renders = []
+        render = self.editor.render
+        self.editor.render = lambda path=None: (renders.append((path, self.editor.in_batch)), render(path))
+        operations = self.editor.set_all("items[*].status", "closed")
+        self.assertEqual(len(operations), 2)
+        # Calls inside the batch only collect paths
+        self.assertEqual([path for path, in_batch in renders if not in_batch], [("items",)])
+        self.assertIs(self.editor._renderers[("other",)], other)
+        self.assertTrue(self.editor.undo())
+        self.assertEqual(self.editor.select("items[?(@.status == 'open')]"), [("items", 0), ("items", 1)])
+
+    def test_undo_shortcut_leaves_text_fields_and_master_alone(self):
+        self.assertEqual(self.root.bind("<Control-z>"), "")
+        self.editor.update_value(("key",), "a")
+        entry = tk.Entry(self.root)
+        entry.pack()
+        entry.focus_force()
+        self.root.update()
+        self.assertIsNone(self.editor.handle_shortcut(self.editor.undo))
+        self.assertEqual(self.editor.data, {"key": "a"})
+        self.editor.canvas.focus_force()
+        self.root.update()
+        self.assertEqual(self.editor.handle_shortcut(self.editor.undo), "break")
+        self.assertEqual(self.editor.data, {"key": "value"})
+
+    def test_virtual_row_edit_follows_its_node(self):
+        editor = DataEditor(self.root, {"items": ["a", "b"]}, virtual=True)
+        editor.set_expanded(("items",), True)
+        self.root.update()
+        row = next(widget for widget in editor.view._active.values() if widget.row.path == ("items", 1))
+        node_id, path = row.row.node_id, row.row.path
+        editor.handle_action(("items", 0), "add_item")
+        row._store(node_id, path, "changed")
+        self.assertEqual(editor.data["items"][2], "changed")
+        editor.handle_action(("items", 2), "remove_item")
+        row._store(node_id, path, "lost")
+        self.assertNotIn("lost", editor.data["items"])
+
+    def test_destroyed_widgets_leave_registries(self):
+        button = GUIUtils.create_button(self.root, "x", None, "white", tooltip="help")
+        GUIUtils.assign_widget_id(button)
+        button.destroy()
+        self.assertNotIn(button.widget_id, GUIUtils.widget_ids)
+        self.assertNotIn(button.widget_id, GUIUtils.widget_tooltips)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
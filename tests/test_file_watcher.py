@@ -0,0 +1,28 @@
+import json
+import os
+import tempfile
+import unittest
+from dictedit2.file_watcher import ReloadTask
+
+
+class TestReloadTask(unittest.TestCase):
+    def test_unchanged_content_is_not_parsed(self):
+        fd, path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"a": [1, 2]}, f)
+        try:
+            digest, data = ReloadTask(None, path).work()
+            self.assertEqual(data, {"a": [1, 2]})
+            self.assertEqual(ReloadTask(None, path, digest).work(), (digest, None))
+
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"a": [1, 3]}, f)
+            new_digest, data = ReloadTask(None, path, digest).work()
+            self.assertNotEqual(new_digest, digest)
+            self.assertEqual(data, {"a": [1, 3]})
+        finally:
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+from dictedit2.history import History
+from dictedit2.node_index import NodeIndex
+from dictedit2.operations import Insert, Remove, RenameKey, ReplaceContents, SetValue, common_path
+
+
+class TestOperations(unittest.TestCase):
+    def setUp(self):
+        self.data = {"a": 1, "b": [1, 2, 3], "c": {"d": "x"}}
+        self.index = NodeIndex(self.data)
+
+    def assert_index_consistent(self):
+        fresh = NodeIndex(self.data)
+        self.assertEqual(len(self.index), len(fresh))
+        for node_id in self.index.nodes:
+            path = self.index.path(node_id)
+            self.assertEqual(self.index.value(node_id), fresh.value(fresh.id_at(path)))
+
+    def test_inverses_restore_document(self):
+        original = {"a": 1, "b": [1, 2, 3], "c": {"d": "x"}}
+        operations = [
+            SetValue(("a",), 2),
+            Insert(("b", 1), "new"),
+            Remove(("b", 0)),
+            Remove(("a",)),
+            RenameKey(("c", "d"), "e"),
+            Insert(("c", "f"), [1]),
+            ReplaceContents(("b",), [9]),
+        ]
+        for operation in operations:
+            inverse = operation.apply(self.data, self.index)
+            self.assert_index_consistent()
+            inverse.apply(self.data, self.index)
+            self.assertEqual(self.data, original)
+            self.assertEqual(list(self.data), list(original))
+            self.assert_index_consistent()
+
+    def test_rename_inverse_restores_key_order(self):
+        inverse = RenameKey(("a",), "z").apply(self.data, self.index)
+        self.assertEqual(list(self.data), ["b", "c", "z"])
+        inverse.apply(self.data, self.index)
+        self.assertEqual(list(self.data), ["a", "b", "c"])
+        self.assertEqual([child.key for child in self.index.root.children.values()], ["a", "b", "c"])
+
+    def test_common_path(self):
+        self.assertEqual(common_path([("a", 1, "b"), ("a", 1), ("a", 2)]), ("a",))
+        self.assertEqual(common_path([]), ())
+
+
+class TestHistory(unittest.TestCase):
+    def test_undo_redo(self):
+        data = {"items": [1, 2]}
+        history = History()
+        for operation in [SetValue(("items", 0), 10), Insert(("items", 2), 3)]:
+            history.record([operation.apply(data)])
+
+        self.assertEqual(history.undo(data).render_path, ("items",))
+        self.assertEqual(data, {"items": [10, 2]})
+        history.undo(data)
+        self.assertEqual(data, {"items": [1, 2]})
+        self.assertFalse(history.can_undo)
+
+        history.redo(data)
+        history.redo(data)
+        self.assertEqual(data, {"items": [10, 2, 3]})
+        self.assertIsNone(history.redo(data))
+
+    def test_compound_entry_replays_in_order(self):
+        data = [1]
+        inverses = [Insert((1,), 2).apply(data), SetValue((1,), 3).apply(data)]
+        history = History()
+        history.record(inverses)
+
+        history.undo(data)
+        self.assertEqual(data, [1])
+        history.redo(data)
+        self.assertEqual(data, [1, 3])
+
+    def test_new_edit_clears_redo_and_limit_applies(self):
+        data = [0]
+        history = History(limit=2)
+        for value in range(1, 4):
+            history.record([SetValue((0,), value).apply(data)])
+        self.assertEqual(len(history.undo_stack), 2)
+
+        history.undo(data)
+        history.record([SetValue((0,), 5).apply(data)])
+        self.assertFalse(history.can_redo)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import json
+import os
+import tempfile
+import unittest
+from dictedit2.journal import Autosave, Journal, journal_path, read_journal, recover
+from dictedit2.model import DocumentModel
+from dictedit2.operations import apply_patch
+
+
+DATA = {"name": "Example", "items": [{"id": 1}, {"id": 2}], "settings": {"a": 1, "b": 2, "c": 3}}
+
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(DATA, f)
+        self.model = DocumentModel(json.loads(json.dumps(DATA)))
+        self.autosave = Autosave(None, self.model, self.path, sync_ms=0).start()
+
+    def tearDown(self):
+        self.autosave.stop()
+        for path in (self.path, journal_path(self.path)):
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def recovered(self):
+        return recover(self.path, json.loads(json.dumps(DATA)))[0]
+
+    def test_replay_reproduces_edits(self):
+        self.model.set_value(("name",), "Renamed")
+        self.model.insert_item(("items", 1), {"id": 9})
+        self.model.rename_key(("settings", "a"), "z")
+        self.model.remove(("settings", "b"))
+        self.model.undo()
+        self.model.update(("items", 0), lambda item: item.update(tag="x"))
+        with self.model.transaction():
+            self.model.add_key((), "extra", [1])
+            self.model.remove(("items", 2))
+
+        self.assertEqual(self.recovered(), self.model.data)
+        self.assertEqual(list(self.recovered()["settings"]), ["b", "c", "z"])
+        self.assertEqual(self.autosave.journal.entries, 7)
+
+    def test_undo_restores_key_order_on_replay(self):
+        self.model.rename_key(("settings", "a"), "z")
+        self.model.undo()
+        self.assertEqual(list(self.recovered()["settings"]), ["a", "b", "c"])
+
+    def test_later_edits_do_not_change_journaled_values(self):
+        self.model.set_value(("items", 0), {"id": 5}, convert=False)
+        self.model.update(("items", 0), lambda item: item.update(id=6))
+        self.assertEqual(self.recovered()["items"][0], {"id": 6})
+        entries = read_journal(self.path)
+        self.assertEqual(entries[0][0]["value"], {"id": 5})
+
+    def test_torn_last_line_is_ignored(self):
+        self.model.set_value(("name",), "First")
+        with open(journal_path(self.path), "a", encoding="utf-8") as f:
+            f.write('[{"op":"replace","path":"/na')
+        self.assertEqual(self.recovered()["name"], "First")
+
+    def test_journal_of_another_file_version_is_ignored(self):
+        self.model.set_value(("name",), "Changed")
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n")
+        self.assertIsNone(read_journal(self.path))
+
+    def test_rebase_after_external_rewrite_keeps_local_edits(self):
+        self.model.set_value(("name",), "Local")
+        self.model.remove(("items", 0))
+        external = json.loads(json.dumps(DATA))
+        external["settings"]["a"] = 10
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(external, f)
+        self.assertIsNone(read_journal(self.path))
+
+        self.autosave.rebase(json.loads(json.dumps(external)))
+        self.model.set_value(("settings", "c"), 30)
+        recovered, count = recover(self.path, external)
+        self.assertEqual(count, 2)
+        self.assertEqual(recovered, self.model.data)
+
+    def test_resume_and_restart(self):
+        self.model.set_value(("name",), "One")
+        self.autosave.stop()
+        journal = Journal(self.path).open(resume=True)
+        self.assertEqual(journal.entries, 1)
+        journal.restart(['[{"op":"remove","path":"/items/0"}]'])
+        journal.close()
+        self.assertEqual(read_journal(self.path), [[{"op": "remove", "path": "/items/0"}]])
+
+    def test_root_edit_keeps_journaling(self):
+        self.model.update((), lambda data: data.update(extra=1))
+        self.model.set_value(("name",), "After")
+        self.assertTrue(self.autosave.active)
+        self.assertEqual(self.recovered(), self.model.data)
+
+    def test_loading_another_document_stops_journaling(self):
+        self.model.load({"other": True})
+        self.assertFalse(self.autosave.active)
+        self.assertEqual(read_journal(self.path), [])
+
+    def test_finish_writes_document_and_removes_journal(self):
+        self.model.set_value(("name",), "Saved")
+        self.autosave.finish()
+        self.assertFalse(os.path.exists(journal_path(self.path)))
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["name"], "Saved")
+
+
+class TestApplyPatch(unittest.TestCase):
+    def test_root_replace_and_errors(self):
+        self.assertEqual(apply_patch({"a": 1}, {"op": "replace", "path": "", "value": [1]}), [1])
+        with self.assertRaises(KeyError):
+            apply_patch({"a": 1}, {"op": "remove", "path": "/b"})
+        with self.assertRaises(ValueError):
+            apply_patch({"a": 1}, {"op": "copy", "path": "/a"})
+
+    def test_escaped_keys(self):
+        data = apply_patch({"a/b": {"~": 1}}, {"op": "replace", "path": "/a~1b/~0", "value": 2})
+        self.assertEqual(data, {"a/b": {"~": 2}})
+
+
+if __name__ == "__main__":
+    unittest.main()
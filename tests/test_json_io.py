@@ -0,0 +1,128 @@
+import json
+import os
+import tempfile
+import unittest
+from dictedit2.json_io import (
+    ExportTask, ImportTask, TaskCancelled, decode_document, iter_json_chunks, iter_members, looks_pretty, snapshot,
+    write_json_atomic
+)
+
+
+class TestDecodeDocument(unittest.TestCase):
+    def test_matches_json_loads(self):
+        for text in ['{"a": [1, 2, {"b": null}], "c": "x"}', ' [1, "two", 3.5] ', '"scalar"', '{}', '[ ]']:
+            self.assertEqual(decode_document(text), json.loads(text))
+
+    def test_members_report_offsets(self):
+        text = '{"a": 1, "b": [2]}'
+        members = list(iter_members(text))
+        self.assertEqual([(key, value) for key, value, _ in members], [("a", 1), ("b", [2])])
+        self.assertEqual(members[-1][2], len(text) - 1)
+
+    def test_invalid_document_raises(self):
+        with self.assertRaises(json.JSONDecodeError):
+            decode_document('{"a": 1 "b": 2}')
+
+    def test_trailing_data_raises(self):
+        for text in ['{"a":1} junk', '[1,2]]', '5 6', '{} {}']:
+            with self.subTest(text=text), self.assertRaisesRegex(json.JSONDecodeError, "Extra data"):
+                decode_document(text)
+
+    def test_cancellation_is_checked_between_members(self):
+        def check_cancelled():
+            raise TaskCancelled()
+
+        with self.assertRaises(TaskCancelled):
+            decode_document('[1, 2, 3]', check_cancelled)
+
+
+class TestExport(unittest.TestCase):
+    DATA = {"name": "Example", 1: None, "items": [{"id": 1, "tags": []}, "line\nbreak"], "empty": {}}
+
+    def test_chunks_match_json_dumps(self):
+        for data in [self.DATA, [1, [2, [3]]], [], {}, "scalar"]:
+            self.assertEqual("".join(iter_json_chunks(data)), json.dumps(data, indent=4))
+            self.assertEqual("".join(iter_json_chunks(data, pretty=False)), json.dumps(data, separators=(",", ":")))
+
+    def test_snapshot_is_independent(self):
+        data = {"a": [1, {"b": 2}]}
+        copy = snapshot(data)
+        data["a"][1]["b"] = 3
+        self.assertEqual(copy, {"a": [1, {"b": 2}]})
+
+    def test_export_task_writes_snapshot(self):
+        data = {"a": [1, 2]}
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "out.json")
+            task = ExportTask(None, data, file_path, pretty=False)
+            data["a"].append(3)
+            self.assertEqual(task.work(), file_path)
+            with open(file_path) as f:
+                self.assertEqual(json.load(f), {"a": [1, 2]})
+
+    def test_failed_write_leaves_target_untouched(self):
+        def check_cancelled():
+            raise TaskCancelled()
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "out.json")
+            with open(file_path, "w") as f:
+                f.write("original")
+            with self.assertRaises(TaskCancelled):
+                write_json_atomic([1, 2, 3], file_path, check_cancelled=check_cancelled)
+            with open(file_path) as f:
+                self.assertEqual(f.read(), "original")
+            self.assertEqual(os.listdir(directory), ["out.json"])
+
+    def test_layout_detection(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "data.json")
+            for text, pretty in (('{"a":[1,2]}\n', False), ('{\n    "a": 1\n}', True)):
+                with open(file_path, "w") as f:
+                    f.write(text)
+                self.assertIs(looks_pretty(file_path), pretty)
+
+    @unittest.skipIf(os.name == "nt", "POSIX permissions")
+    def test_replaced_file_keeps_its_permissions(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "out.json")
+            with open(file_path, "w") as f:
+                f.write("[]")
+            os.chmod(file_path, 0o644)
+            write_json_atomic([1], file_path)
+            self.assertEqual(os.stat(file_path).st_mode & 0o777, 0o644)
+
+            new_path = os.path.join(directory, "new.json")
+            write_json_atomic([1], new_path)
+            umask = os.umask(0)
+            os.umask(umask)
+            self.assertEqual(os.stat(new_path).st_mode & 0o777, 0o666 & ~umask)
+
+
+class TestImportTask(unittest.TestCase):
+    def test_work_returns_data_and_index(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "data.json")
+            with open(file_path, "w", encoding="utf-8") as f:
+                json.dump({"items": [{"id": 1}], "name": "café"}, f)
+
+            task = ImportTask(None, file_path)
+            data, index = task.work()
+
+        self.assertEqual(data, {"items": [{"id": 1}], "name": "café"})
+        self.assertEqual(index.value(index.id_at(("items", 0, "id"))), 1)
+
+    def test_work_stops_when_cancelled(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "data.json")
+            with open(file_path, "w") as f:
+                f.write("[1, 2]")
+
+            task = ImportTask(None, file_path)
+            task.cancel()
+            with self.assertRaises(TaskCancelled):
+                task.work()
+
+
+if __name__ == "__main__":
+    unittest.main()
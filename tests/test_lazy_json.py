@@ -0,0 +1,131 @@
+import json
+import os
+import tempfile
+import unittest
+from dictedit2.lazy_json import LazyDocument, OffsetIndex, Unloaded
+from dictedit2.model import DocumentModel
+from dictedit2.render_tree import flatten
+
+
+SOURCE = """{
+  "name": "dump",
+  "tricky": "braces { [ \\" inside",
+  "items": [ {"id": 1, "tags": ["a", "b"]}, {"id": 2, "tags": []} ],
+  "settings": {"depth": {"x": null, "y": true}, "n": -1.5e3}
+}
+"""
+
+
+class TestLazyDocument(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(SOURCE)
+        self.document = LazyDocument(self.path)
+        self.model = DocumentModel(self.document.root)
+        self.document.attach(self.model)
+
+    def tearDown(self):
+        self.document.close()
+        os.unlink(self.path)
+
+    def saved(self):
+        out = self.path + ".out"
+        self.document.save(out)
+        with open(out, encoding="utf-8") as f:
+            text = f.read()
+        os.unlink(out)
+        return text
+
+    def test_offset_index_skips_strings(self):
+        index = OffsetIndex(SOURCE.encode())
+        self.assertEqual(len(index), 8)
+        start = SOURCE.index('{"id": 1')
+        self.assertEqual(SOURCE[start:index.end_of(start)], '{"id": 1, "tags": ["a", "b"]}')
+
+    def test_only_root_members_are_parsed(self):
+        data = self.model.data
+        self.assertEqual(data["tricky"], 'braces { [ " inside')
+        self.assertIsInstance(data["items"], Unloaded)
+        self.assertEqual(data["items"].kind, "list")
+
+    def test_expanding_materializes_and_keeps_node_id(self):
+        node_id = self.model.index.id_at(("settings",))
+        self.model.set_expanded(("settings",), True)
+        rows = flatten(self.model.render_tree())
+        self.assertIn(("settings", "n"), [row.path for row in rows])
+        self.assertEqual(self.model.data["settings"]["n"], -1500.0)
+        self.assertEqual(self.model.index.id_at(("settings",)), node_id)
+        self.assertIsInstance(self.model.data["settings"]["depth"], Unloaded)
+
+    def test_queries_parse_the_containers_they_reach(self):
+        self.assertEqual(self.model.select("items[*].id"), [("items", 0, "id"), ("items", 1, "id")])
+        self.assertIsInstance(self.model.data["settings"], Unloaded)
+        self.model.set_all("items[*].tags", [])
+        self.assertIn('"tags": []', self.saved())
+
+    def test_unchanged_document_is_copied_verbatim(self):
+        self.model.materialize(("items",))
+        self.assertEqual(self.saved(), SOURCE)
+
+    def test_save_splices_modified_containers(self):
+        self.model.materialize(("items",))
+        self.model.materialize(("items", 1))
+        self.model.set_value(("items", 1, "id"), 3)
+        self.model.add_key((), "extra", [1])
+        text = self.saved()
+
+        expected = json.loads(SOURCE)
+        expected["items"][1]["id"] = 3
+        expected["extra_1"] = [1]
+        self.assertEqual(json.loads(text), expected)
+        # Untouched containers keep their original bytes
+        self.assertIn('"settings": {"depth": {"x": null, "y": true}, "n": -1.5e3}', text)
+        self.assertIn('{"id": 1, "tags": ["a", "b"]}', text)
+
+    def test_undo_restores_original_content(self):
+        self.model.remove(("settings",))
+        self.model.undo()
+        self.assertEqual(json.loads(self.saved()), json.loads(SOURCE))
+
+    def test_transaction_edits_are_saved(self):
+        self.model.materialize(("items",))
+        self.model.materialize(("items", 1))
+        self.model.materialize(("settings",))
+        self.model.materialize(("settings", "depth"))
+        with self.model.transaction():
+            self.model.set_value(("items", 1, "id"), 99)
+            self.model.remove(("items", 0))
+        with self.model.transaction():
+            self.model.set_value(("settings", "depth", "y"), False)
+            self.model.rename_key(("settings",), "options")
+
+        expected = json.loads(SOURCE)
+        del expected["items"][0]
+        expected["items"][0]["id"] = 99
+        expected["settings"]["depth"]["y"] = False
+        expected["options"] = expected.pop("settings")
+        self.assertEqual(json.loads(self.saved()), expected)
+
+    def test_root_edit_keeps_backend_and_other_listeners(self):
+        patches = []
+        self.model.listeners.append(patches.extend)
+        self.model.update((), lambda data: data.update(extra=3))
+        self.assertIs(self.model.backend, self.document)
+        self.assertEqual(len(patches), 1)
+        self.assertEqual(json.loads(self.saved())["extra"], 3)
+
+        self.model.load({"other": 1})
+        self.assertIsNone(self.model.backend)
+        self.assertEqual(patches[-1]["op"], "load")
+
+    def test_invalid_file(self):
+        for text in ('{"a": [1, 2}', '{"a": "x}'):
+            with open(self.path, "w") as f:
+                f.write(text)
+            with self.assertRaises(ValueError):
+                LazyDocument(self.path).close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import threading
+import unittest
+from dictedit2.live import UpdateQueue, apply_updates
+from dictedit2.model import DocumentModel
+
+
+class TestUpdateQueue(unittest.TestCase):
+    def test_keeps_latest_value_per_path(self):
+        queue = UpdateQueue()
+        queue.put(("a",), 1)
+        queue.put(["b", 0], 2)
+        queue.put(("a",), 3)
+        self.assertEqual(queue.drain(), [(("b", 0), 2), (("a",), 3)])
+        self.assertEqual((queue.received, queue.coalesced, len(queue)), (3, 1, 0))
+
+    def test_concurrent_producers(self):
+        queue = UpdateQueue()
+
+        def produce(sensor):
+            for value in range(1000):
+                queue.put(("sensors", sensor), value)
+
+        threads = [threading.Thread(target=produce, args=(sensor,)) for sensor in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(queue.drain()), [(("sensors", sensor), 999) for sensor in range(4)])
+        self.assertEqual(queue.received, 4000)
+
+
+class TestApplyUpdates(unittest.TestCase):
+    def setUp(self):
+        self.model = DocumentModel({"name": "x", "sensors": [0, 0], "meta": {"unit": "C"}})
+        self.notifications = []
+        self.model.listeners.append(self.notifications.append)
+
+    def test_one_notification_and_no_undo_entry(self):
+        self.model.set_value(("name",), "y")
+        changed = apply_updates(self.model, [(("sensors", 1), 5.5), (("meta", "rate"), 10), (("name",), "y")])
+        self.assertEqual(changed, [("sensors", 1), ("meta",)])
+        self.assertEqual(self.model.data["sensors"], [0, 5.5])
+        self.assertEqual(self.model.data["meta"], {"unit": "C", "rate": 10})
+        self.assertEqual(len(self.notifications), 2)
+        self.assertEqual(len(self.model.history.undo_stack), 1)
+
+    def test_invalid_paths_are_skipped(self):
+        with self.assertLogs("dictedit2.live", level="WARNING"):
+            changed = apply_updates(self.model, [(("missing", "x"), 1), (("sensors", 2), 1), ((), {}), (("sensors", 0), 1)])
+        self.assertEqual(changed, [("sensors", 0)])
+
+    def test_undoable_updates(self):
+        apply_updates(self.model, [(("sensors", 0), 1), (("sensors", 1), 2)], undoable=True)
+        self.model.undo()
+        self.assertEqual(self.model.data["sensors"], [0, 0])
+
+
+if __name__ == "__main__":
+    unittest.main()
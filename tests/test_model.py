@@ -0,0 +1,146 @@
+import unittest
+from dictedit2.model import DocumentModel
+
+
+class TestDocumentModel(unittest.TestCase):
+    def setUp(self):
+        self.model = DocumentModel({"name": "x", "count": 1, "items": [{"id": 1}]})
+        self.patches = []
+        self.model.listeners.append(self.patches.extend)
+
+    def test_set_value_converts_to_current_type(self):
+        operation = self.model.set_value(("count",), "5")
+        self.assertEqual(self.model.data["count"], 5)
+        self.assertEqual(operation.render_path, ("count",))
+        self.assertEqual(self.patches, [{"op": "replace", "path": "/count", "old": 1, "value": 5}])
+
+    def test_unchanged_value_is_not_applied(self):
+        self.assertIsNone(self.model.set_value(("count",), "1"))
+        self.assertEqual(self.patches, [])
+        self.assertFalse(self.model.history.can_undo)
+
+    def test_structural_edits_and_undo(self):
+        self.model.add_key(())
+        self.model.insert_item(("items", 0), None)
+        self.model.rename_key(("name",), "title")
+        self.model.remove(("count",))
+        self.assertEqual(self.model.data, {"items": [None, {"id": 1}], "new_key_1": "", "title": "x"})
+
+        while self.model.undo():
+            pass
+        self.assertEqual(self.model.data, {"name": "x", "count": 1, "items": [{"id": 1}]})
+
+    def test_rename_to_existing_key_is_rejected(self):
+        self.assertIsNone(self.model.rename_key(("name",), "count"))
+        self.assertEqual(self.model.data["name"], "x")
+
+    def test_update_records_undoable_contents_swap(self):
+        operation = self.model.update(("items",), lambda items: items.append(2))
+        self.assertEqual(operation.render_path, ("items",))
+        self.model.undo()
+        self.assertEqual(self.model.data["items"], [{"id": 1}])
+
+    def test_expansion_state_follows_node_ids(self):
+        self.model.data["items"].append({"id": 2})
+        self.model.index.on_insert(("items",), 1, self.model.data["items"][1])
+        self.model.set_expanded(("items", 1), True)
+        self.model.insert_item(("items", 0), None)
+        self.assertTrue(self.model.is_expanded(("items", 2)))
+        self.assertFalse(self.model.is_expanded(("items", 1)))
+
+    def test_transaction_is_one_undo_step_and_one_notification(self):
+        calls = []
+        self.model.listeners.append(calls.append)
+        with self.model.transaction("bulk"):
+            self.model.set_value(("name",), "y")
+            self.model.add_key(())
+            with self.model.transaction():
+                self.model.remove(("items", 0))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([patch["op"] for patch in calls[0]], ["replace", "add", "remove"])
+        self.assertEqual(self.model.history.undo_stack[-1].label, "bulk")
+        self.model.undo()
+        self.assertEqual(self.model.data, {"name": "x", "count": 1, "items": [{"id": 1}]})
+
+    def test_failed_transaction_rolls_back(self):
+        original = {"name": "x", "count": 1, "items": [{"id": 1}]}
+        with self.assertRaises(KeyError):
+            with self.model.transaction():
+                self.model.remove(("items", 0))
+                self.model.update(("items",), lambda items: items.append(2))
+                self.model.rename_key(("name",), "count")
+
+        self.assertEqual(self.model.data, original)
+        self.assertEqual(self.patches, [])
+        self.assertFalse(self.model.history.can_undo)
+        self.assertEqual(self.model.search("id").paths, [("items", 0, "id")])
+
+    def test_failed_update_leaves_container_unchanged(self):
+        def half_edit(items):
+            items.append(2)
+            raise ValueError("bad")
+
+        with self.assertRaises(ValueError):
+            self.model.update(("items",), half_edit)
+        self.assertEqual(self.model.data["items"], [{"id": 1}])
+
+    def test_bulk_set_is_one_undo_step(self):
+        self.model.load({"items": [{"status": "open"}, {"status": "done"}, {"status": "open"}]})
+        self.patches.clear()
+        operations = self.model.set_all("items[*].status", "closed")
+        self.assertEqual(len(operations), 3)
+        self.assertEqual([item["status"] for item in self.model.data["items"]], ["closed"] * 3)
+        self.assertEqual(len(self.patches), 3)
+        self.assertEqual(self.model.history.undo_stack[-1].label, "set all")
+        self.model.undo()
+        self.assertEqual(self.model.data["items"][1], {"status": "done"})
+
+    def test_bulk_set_copies_container_values(self):
+        self.model.set_all("items[*].id", {"nested": []})
+        self.model.insert_item(("items", 1), {"id": 2})
+        self.model.set_all("items[*].id", {"nested": []})
+        first, second = (item["id"] for item in self.model.data["items"])
+        self.assertIsNot(first, second)
+
+    def test_bulk_delete_rename_and_transform(self):
+        self.model.load({"items": [{"id": i, "tmp": i} for i in range(5)], "tmp": 0})
+        self.model.delete_all("items[?(@.id >= 3)]")
+        self.assertEqual([item["id"] for item in self.model.data["items"]], [0, 1, 2])
+        self.model.delete_all("..tmp")
+        self.assertEqual(self.model.data, {"items": [{"id": 0}, {"id": 1}, {"id": 2}]})
+        self.model.rename_all("items[*].id", lambda key: key.upper())
+        self.model.transform_all("items[*].ID", lambda value: value * 10)
+        self.assertEqual(self.model.data, {"items": [{"ID": 0}, {"ID": 10}, {"ID": 20}]})
+        self.assertEqual(len(self.model.history.undo_stack), 4)
+
+    def test_bulk_edit_of_mixed_dict_keys(self):
+        self.model.load({1: "a", "b": "c", "items": [[0, 1], [2]]})
+        self.model.set_all("$.*", "x")
+        self.assertEqual(self.model.data, {1: "x", "b": "x", "items": "x"})
+        self.model.load({1: "a", "b": "c", "items": [0, 1, 2]})
+        self.model.delete_all("items[2,0]")
+        self.assertEqual(self.model.data["items"], [1])
+        self.model.delete_all("$.*")
+        self.assertEqual(self.model.data, {})
+
+    def test_failed_bulk_edit_rolls_back(self):
+        self.model.insert_item(("items", 1), {"id": 2, "key": 0})
+        with self.assertRaises(KeyError):
+            self.model.rename_all("items[*].id", "key")
+        with self.assertRaises(ValueError):
+            self.model.rename_all("items[*]", "key")
+        with self.assertRaises(ValueError):
+            self.model.delete_all("$")
+        self.assertEqual(self.model.data["items"], [{"id": 1}, {"id": 2, "key": 0}])
+        self.assertEqual(len(self.model.history.undo_stack), 1)
+
+    def test_load_resets_history_and_notifies(self):
+        self.model.set_value(("name",), "y")
+        self.model.load([1, 2])
+        self.assertFalse(self.model.history.can_undo)
+        self.assertEqual(self.patches[-1]["path"], "")
+
+
+if __name__ == "__main__":
+    unittest.main()
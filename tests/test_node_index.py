@@ -0,0 +1,69 @@
+import unittest
+from dictedit2.node_index import NodeIndex
+
+
+class TestNodeIndex(unittest.TestCase):
+    def setUp(self):
+        self.data = {"items": [{"id": 1}, {"id": 2}], "name": "x"}
+        self.index = NodeIndex(self.data)
+
+    def test_lookup(self):
+        node_id = self.index.id_at(("items", 1, "id"))
+        self.assertEqual(self.index.path(node_id), ("items", 1, "id"))
+        self.assertEqual(self.index.value(node_id), 2)
+        self.assertEqual(len(self.index), 7)
+
+    def test_missing_path_raises_key_error(self):
+        with self.assertRaises(KeyError):
+            self.index.id_at(("items", 5))
+
+    def test_insert_keeps_ids_of_shifted_items(self):
+        second = self.index.id_at(("items", 1))
+        self.data["items"].insert(0, {"id": 0})
+        new_id = self.index.on_insert(("items",), 0, self.data["items"][0])
+
+        self.assertEqual(self.index.path(second), ("items", 2))
+        self.assertEqual(self.index.value(second), {"id": 2})
+        self.assertEqual(self.index.path(new_id), ("items", 0))
+
+    def test_remove_drops_subtree(self):
+        first_id = self.index.id_at(("items", 0, "id"))
+        second = self.index.id_at(("items", 1))
+        self.data["items"].pop(0)
+        self.index.on_remove(("items",), 0)
+
+        self.assertNotIn(first_id, self.index)
+        self.assertEqual(self.index.path(second), ("items", 0))
+        self.assertEqual(len(self.index), 5)
+
+    def test_rename_keeps_id(self):
+        node_id = self.index.id_at(("name",))
+        self.data["title"] = self.data.pop("name")
+        self.index.on_rename((), "name", "title")
+        self.assertEqual(self.index.path(node_id), ("title",))
+        self.assertEqual(self.index.value(node_id), "x")
+
+    def test_set_scalar_keeps_id_and_container_reindexes(self):
+        node_id = self.index.id_at(("name",))
+        self.data["name"] = "y"
+        self.assertEqual(self.index.on_set((), "name", "y"), node_id)
+
+        self.data["name"] = {"nested": True}
+        new_id = self.index.on_set((), "name", self.data["name"])
+        self.assertNotEqual(new_id, node_id)
+        self.assertEqual(self.index.value(self.index.id_at(("name", "nested"))), True)
+
+    def test_replace_reuses_unchanged_children(self):
+        items_id = self.index.id_at(("items",))
+        name_id = self.index.id_at(("name",))
+        self.data["extra"] = [1]
+        del self.data["name"]
+        self.index.on_replace(())
+
+        self.assertEqual(self.index.id_at(("items",)), items_id)
+        self.assertNotIn(name_id, self.index)
+        self.assertEqual(self.index.value(self.index.id_at(("extra", 0))), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import json
+import os
+import tempfile
+import unittest
+from dictedit2.profiling import NULL_PROFILER, RenderProfiler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRenderProfiler(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.widgets = 0
+        self.profiler = RenderProfiler(lambda: self.widgets, clock=self.clock)
+
+    def render_tree(self):
+        """A dict at the root with one list child; each node spends time and creates widgets."""
+        profiler = self.profiler
+        with profiler.render(None):
+            with profiler.node(()):
+                with profiler.phase("dispatch"):
+                    self.clock.now += 1
+                profiler.label(type("DictRendererCustom", (), {})())
+                self.clock.now += 10
+                self.widgets += 3
+                with profiler.node(("items",)):
+                    profiler.label(type("ListRendererCustom", (), {})())
+                    self.clock.now += 4
+                    self.widgets += 2
+            with profiler.phase("layout"):
+                self.clock.now += 5
+
+    def test_self_costs_exclude_children_and_phases(self):
+        self.render_tree()
+        self.assertEqual(self.profiler.paths[()], [1, 10.0, 3])
+        self.assertEqual(self.profiler.paths[("items",)], [1, 4.0, 2])
+        last = self.profiler.last
+        self.assertEqual(last["seconds"], 20)
+        self.assertEqual(last["build"] + last["dispatch"] + last["layout"], 20)
+        self.assertEqual((last["nodes"], last["path"]), (2, None))
+        self.assertEqual(self.profiler.top_paths(1)[0][0], ())
+
+    def test_folded_stacks(self):
+        self.render_tree()
+        self.assertEqual(self.profiler.folded_stacks(), [
+            "DictRendererCustom / 10000000",
+            "DictRendererCustom /;ListRendererCustom /items 4000000",
+        ])
+
+    def test_json_export(self):
+        self.render_tree()
+        self.render_tree()
+        fd, path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        try:
+            self.profiler.export_json(path)
+            with open(path, encoding="utf-8") as f:
+                exported = json.load(f)
+        finally:
+            os.unlink(path)
+        self.assertEqual(exported["renders"], 2)
+        self.assertEqual(exported["renderers"]["ListRendererCustom"]["widgets"], 4)
+        self.assertEqual(exported["paths"][0]["path"], "")
+        self.assertEqual(len(exported["recent"]), 2)
+
+    def test_paths_are_bounded(self):
+        profiler = RenderProfiler(clock=self.clock, max_paths=4)
+        with profiler.render(None):
+            for position in range(10):
+                with profiler.node((position,)):
+                    self.clock.now += position
+        self.assertLessEqual(len(profiler.paths), 4)
+        self.assertLessEqual(len(profiler.stacks), 4)
+        self.assertIn((9,), profiler.paths)
+        self.assertIn((8,), profiler.paths)
+
+    def test_reset_and_null_profiler(self):
+        self.render_tree()
+        self.profiler.reset()
+        self.assertEqual((self.profiler.render_count, self.profiler.paths), (0, {}))
+        with NULL_PROFILER.render(None), NULL_PROFILER.node(()), NULL_PROFILER.phase("model"):
+            NULL_PROFILER.label(object())
+        self.assertFalse(NULL_PROFILER.enabled)
+
+
+if __name__ == "__main__":
+    unittest.main()
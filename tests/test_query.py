@@ -0,0 +1,62 @@
+import unittest
+from dictedit2.query import compile_query
+
+DATA = {
+    "items": [
+        {"id": 1, "name": "a", "details": {"status": "open", "tags": ["x"]}},
+        {"id": 2, "name": "b", "details": {"status": "done", "tags": []}},
+        {"id": 3, "name": "c", "details": {"status": "open"}, "flag": True},
+    ],
+    "meta": {"name": "m", "first name": "f", "count": 1},
+}
+
+
+def paths(query, data=DATA):
+    return compile_query(query).paths(data)
+
+
+class TestQuery(unittest.TestCase):
+    def test_member_access(self):
+        self.assertEqual(paths("$"), [()])
+        self.assertEqual(paths("$.meta.name"), [("meta", "name")])
+        self.assertEqual(paths("meta.name"), [("meta", "name")])
+        self.assertEqual(paths("$['meta']['first name']"), [("meta", "first name")])
+        self.assertEqual(paths('$["meta"].count'), [("meta", "count")])
+        self.assertEqual(paths("meta.missing"), [])
+
+    def test_wildcards_indices_and_slices(self):
+        self.assertEqual(paths("items[*].details.status"),
+                         [("items", 0, "details", "status"), ("items", 1, "details", "status"),
+                          ("items", 2, "details", "status")])
+        self.assertEqual(paths("meta.*"), [("meta", "name"), ("meta", "first name"), ("meta", "count")])
+        self.assertEqual(paths("items[-1].id"), [("items", 2, "id")])
+        self.assertEqual(paths("items[5]"), [])
+        self.assertEqual(paths("items[::2].id"), [("items", 0, "id"), ("items", 2, "id")])
+        self.assertEqual(paths("items[2,0].id"), [("items", 2, "id"), ("items", 0, "id")])
+
+    def test_recursive_descent(self):
+        self.assertEqual(paths("$..name"), [("items", 0, "name"), ("items", 1, "name"), ("items", 2, "name"),
+                                            ("meta", "name")])
+        self.assertEqual(paths("..tags[0]"), [("items", 0, "details", "tags", 0)])
+        self.assertEqual(len(paths("$..*")), 24)
+
+    def test_filters(self):
+        self.assertEqual(paths("items[?(@.details.status == 'open')].id"), [("items", 0, "id"), ("items", 2, "id")])
+        self.assertEqual(paths("items[?(@.id > 1)].name"), [("items", 1, "name"), ("items", 2, "name")])
+        self.assertEqual(paths("items[?(@.flag)]"), [("items", 2)])
+        self.assertEqual(paths("items[?(@.details.tags[0] == \"x\")]"), [("items", 0)])
+        # true is not 1, and values of different types never order
+        self.assertEqual(paths("items[?(@.id == true)]"), [])
+        self.assertEqual(paths("items[?(@.name < 3)]"), [])
+
+    def test_invalid_queries_raise_value_error(self):
+        for query in ("items[", "items..", "items[x]", "items[?(@.id == )]", "items[1:2:0]", "items]"):
+            with self.subTest(query=query), self.assertRaises(ValueError):
+                compile_query(query)
+
+    def test_compiled_queries_are_cached(self):
+        self.assertIs(compile_query("items[*].id"), compile_query("items[*].id"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+from dictedit2.model import DocumentModel
+from dictedit2.render_tree import (
+    LARGE_TEXT_CHARS, TABLE_SAMPLE_ROWS, build_render_tree, flatten, is_large_text, looks_like_table, preview, table_columns
+)
+
+
+class TestRenderTree(unittest.TestCase):
+    def test_plan_describes_nodes_and_actions(self):
+        root = build_render_tree({"a": [1], "b": "x"})
+        self.assertEqual(root.label, "Dictionary Item")
+        self.assertEqual(root.value, "2 keys")
+        self.assertEqual(root.actions, ("toggle", "add_key"))
+
+        a, b = root.children
+        self.assertEqual((a.kind, a.value, a.actions), ("list", "1 item", ("toggle", "add_item", "rename_key", "remove_key")))
+        self.assertEqual((b.label, b.value, b.actions), ("b", "x", ("edit", "rename_key", "remove_key")))
+        self.assertEqual(a.children[0].actions, ("edit", "insert_before", "remove_item"))
+
+    def test_collapsed_containers_are_not_visited(self):
+        model = DocumentModel({"big": list(range(1000)), "small": {"k": 1}}, expand_depth=1)
+        rows = flatten(model.render_tree())
+        self.assertEqual([row.path for row in rows], [(), ("big",), ("small",)])
+        self.assertFalse(rows[1].expanded)
+
+    def test_nodes_carry_stable_ids(self):
+        model = DocumentModel({"a": {"b": 1}}, expand_depth=3)
+        subtree = model.render_tree(("a",))
+        self.assertEqual(subtree.children[0].node_id, model.index.id_at(("a", "b")))
+        self.assertEqual(subtree.actions, ("toggle", "add_key", "rename_key", "remove_key"))
+
+
+class TestTableColumns(unittest.TestCase):
+    def test_rectangular_lists(self):
+        self.assertEqual(table_columns([[1, 2, 3], [4, 5, 6]]), [0, 1, 2])
+        self.assertIsNone(table_columns([[1, 2], [3]]))
+        self.assertIsNone(table_columns([[1, [2]], [3, 4]]))
+        self.assertIsNone(table_columns([[1, 2]]))
+
+    def test_records_with_shared_keys(self):
+        self.assertEqual(table_columns([{"id": 1, "x": "a"}, {"x": "b", "id": 2}]), ["id", "x"])
+        self.assertIsNone(table_columns([{"id": 1}, {"id": 2, "x": "b"}]))
+        self.assertIsNone(table_columns([{"id": 1}, [2]]))
+        self.assertIsNone(table_columns([1, 2, 3]))
+
+    def test_renderer_check_only_samples_rows(self):
+        rows = [[1, 2]] * TABLE_SAMPLE_ROWS + [[1]]
+        self.assertTrue(looks_like_table(rows))
+        self.assertIsNone(table_columns(rows))
+        self.assertFalse(looks_like_table([[1, 2], [3]]))
+        self.assertFalse(looks_like_table("ab"))
+
+
+class TestPreview(unittest.TestCase):
+    def test_large_text_detection(self):
+        self.assertFalse(is_large_text("short\nvalue"))
+        self.assertTrue(is_large_text("x" * (LARGE_TEXT_CHARS + 1)))
+        self.assertTrue(is_large_text("line\n" * 30))
+
+    def test_preview_is_bounded(self):
+        text = "first line\n" + "y" * 10 ** 6
+        self.assertEqual(preview(text), f"first line\u2026 ({len(text):,} characters)")
+        self.assertLess(len(preview("z" * 10 ** 6)), 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
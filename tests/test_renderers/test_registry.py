@@ -0,0 +1,105 @@
+import datetime
+import decimal
+import enum
+import unittest
+from dictedit2.renderers.base import RendererFactory, RendererRegistry
+from dictedit2.renderers.dict_renderer import DictRendererCustom
+from dictedit2.renderers.list_renderer import ListRendererCustom
+from dictedit2.renderers.table_renderer import TableRendererCustom, blank_like
+from dictedit2.renderers.typed_value_renderer import (
+    BytesRendererCustom, DatetimeRendererCustom, DecimalRendererCustom, EnumRendererCustom
+)
+from dictedit2.renderers.value_renderer import ValueRendererCustom
+
+
+class Color(enum.IntEnum):
+    RED = 1
+    GREEN = 2
+
+
+class TestRendererRegistry(unittest.TestCase):
+    def test_lookup_follows_mro_and_is_cached(self):
+        registry = RendererRegistry()
+        registry.register(object, ValueRendererCustom)
+        registry.register(dict, DictRendererCustom)
+
+        class Config(dict):
+            pass
+
+        self.assertIs(registry.lookup(Config), DictRendererCustom)
+        self.assertIn(Config, registry._cache)
+
+        registry.register(Config, ValueRendererCustom)
+        self.assertIs(registry.lookup(Config), ValueRendererCustom)
+        registry.unregister(Config)
+        self.assertIs(registry.lookup(Config), DictRendererCustom)
+
+    def test_missing_renderer(self):
+        with self.assertRaises(LookupError):
+            RendererRegistry().lookup(int)
+
+    def test_register_as_decorator(self):
+        registry = RendererRegistry()
+
+        @registry.register(complex)
+        class ComplexRenderer(ValueRendererCustom):
+            pass
+
+        self.assertIs(registry.lookup(complex), ComplexRenderer)
+
+    def test_builtin_renderers(self):
+        lookup = RendererFactory.registry.lookup
+        self.assertIs(lookup(dict), DictRendererCustom)
+        self.assertIs(lookup(bool), ValueRendererCustom)
+        self.assertIs(lookup(datetime.datetime), DatetimeRendererCustom)
+        self.assertIs(lookup(decimal.Decimal), DecimalRendererCustom)
+        self.assertIs(lookup(bytes), BytesRendererCustom)
+        self.assertIs(lookup(Color), EnumRendererCustom)
+
+    def test_conditional_entries(self):
+        registry = RendererFactory.registry
+        self.assertIs(registry.renderer_for([[1, 2], [3, 4]]), TableRendererCustom)
+        self.assertIs(registry.renderer_for([{"id": 1}, {"id": 2}]), TableRendererCustom)
+        self.assertIs(registry.renderer_for([1, [2]]), ListRendererCustom)
+        self.assertIs(registry.lookup(list), ListRendererCustom)
+
+    def test_blank_row(self):
+        self.assertEqual(blank_like({"id": 3, "name": "x", "ok": True, "none": None}),
+                         {"id": 0, "name": "", "ok": False, "none": None})
+        self.assertEqual(blank_like([1.5, 2]), [0.0, 0])
+
+    def test_factory_shares_gui_utils(self):
+        first = RendererFactory.get_renderer(None, {}, None, ())
+        second = RendererFactory.get_renderer(None, 1, None, ("a",))
+        self.assertIs(first.gui_utils, second.gui_utils)
+
+
+class TestTypedValueRenderers(unittest.TestCase):
+    def renderer(self, renderer_class, item):
+        renderer = renderer_class(None, None, (), RendererFactory.gui_utils)
+        renderer.value_type = type(item)
+        return renderer
+
+    def test_round_trips(self):
+        cases = [
+            (DatetimeRendererCustom, datetime.datetime(2024, 5, 1, 12, 30)),
+            (DatetimeRendererCustom, datetime.date(2024, 5, 1)),
+            (DecimalRendererCustom, decimal.Decimal("1.10")),
+            (BytesRendererCustom, b"\x00\xff"),
+            (EnumRendererCustom, Color.GREEN),
+        ]
+        for renderer_class, item in cases:
+            renderer = self.renderer(renderer_class, item)
+            parsed = renderer.parse_value(renderer.format_value(item))
+            self.assertEqual(parsed, item)
+            self.assertIs(type(parsed), type(item))
+
+    def test_invalid_text_raises_value_error(self):
+        for renderer_class, item in [(DecimalRendererCustom, decimal.Decimal(1)), (EnumRendererCustom, Color.RED),
+                                     (DatetimeRendererCustom, datetime.date.today()), (BytesRendererCustom, b"")]:
+            with self.assertRaises(ValueError):
+                self.renderer(renderer_class, item).parse_value("not valid")
+
+
+if __name__ == "__main__":
+    unittest.main()
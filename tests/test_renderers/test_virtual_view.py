@@ -0,0 +1,34 @@
+import unittest
+from dictedit2.renderers.virtual_view import flatten_tree, row_offsets, ROW_HEIGHTS
+
+
+class TestFlattenTree(unittest.TestCase):
+    def test_rows_are_depth_first(self):
+        rows = flatten_tree({"a": [1, {"b": 2}], "c": "x"})
+        self.assertEqual(
+            [row.path for row in rows],
+            [(), ("a",), ("a", 0), ("a", 1), ("a", 1, "b"), ("c",)]
+        )
+        self.assertEqual([row.kind for row in rows], ["dict", "list", "value", "dict", "value", "value"])
+        self.assertEqual(rows[4].depth, 3)
+        self.assertEqual(rows[4].key, "b")
+
+    def test_deep_nesting_does_not_recurse(self):
+        data = []
+        for _ in range(5000):
+            data = [data]
+        self.assertEqual(len(flatten_tree(data)), 5001)
+
+    def test_collapsed_containers_hide_children(self):
+        data = {"a": [1, 2], "b": {"c": 3}}
+        rows = flatten_tree(data, lambda path: path != ("a",))
+        self.assertEqual([row.path for row in rows], [(), ("a",), ("b",), ("b", "c")])
+
+    def test_row_offsets(self):
+        rows = flatten_tree({"a": 1})
+        offsets = row_offsets(rows)
+        self.assertEqual(offsets, [0, ROW_HEIGHTS["dict"], ROW_HEIGHTS["dict"] + ROW_HEIGHTS["value"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
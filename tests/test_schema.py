@@ -0,0 +1,115 @@
+import unittest
+from dictedit2.model import DocumentModel, TypeConverter
+from dictedit2.schema import Schema, ValidationTask, parse_scalar
+
+SCHEMA = {
+    "type": "object",
+    "required": ["name", "items"],
+    "additionalProperties": False,
+    "properties": {
+        "name": {"type": "string", "minLength": 1},
+        "enabled": {"type": "boolean"},
+        "ratio": {"type": ["number", "null"], "minimum": 0, "maximum": 1},
+        "items": {"type": "array", "items": {"$ref": "#/$defs/item"}},
+    },
+    "patternProperties": {"^x-": True},
+    "$defs": {
+        "item": {
+            "type": "object",
+            "required": ["id"],
+            "properties": {"id": {"type": "integer"}, "kind": {"enum": ["a", "b", None]}},
+        },
+    },
+}
+
+
+class TestSchema(unittest.TestCase):
+    def setUp(self):
+        self.schema = Schema(SCHEMA)
+
+    def test_valid_document(self):
+        data = {"name": "x", "enabled": True, "ratio": None, "items": [{"id": 1, "kind": "a"}], "x-note": [1]}
+        self.assertEqual(list(self.schema.validate(data)), [])
+
+    def test_problems_are_reported_in_document_order(self):
+        data = {"name": "", "ratio": 2, "items": [{"id": 1.5}, {"kind": "c"}], "extra": 1}
+        self.assertEqual(list(self.schema.validate(data)), [
+            ((), "Unexpected extra."),
+            (("name",), "Must have at least 1 characters."),
+            (("ratio",), "Must be at most 1."),
+            (("items", 0, "id"), "Expected integer, got number."),
+            (("items", 1), "Missing id."),
+            (("items", 1, "kind"), 'Must be one of "a", "b", null.'),
+        ])
+
+    def test_multiple_of_decimal_step(self):
+        schema = Schema({"multipleOf": 0.1})
+        for value in (0.3, 1.1, 0, 7):
+            self.assertEqual(list(schema.validate(value)), [], value)
+        self.assertEqual(list(schema.validate(0.25)), [((), "Must be a multiple of 0.1.")])
+        self.assertEqual(list(Schema({"multipleOf": 3}).validate(10)), [((), "Must be a multiple of 3.")])
+
+    def test_rules_are_shared_by_list_items(self):
+        first = self.schema.rule(("items", 0, "id"))
+        self.assertIs(self.schema.rule(("items", 7, "id")), first)
+        self.assertIs(self.schema.rule(("items", 3)), self.schema.rule(("items", 0)))
+        self.assertTrue(self.schema.rule(("x-note",)).unconstrained)
+
+    def test_convert_follows_schema_types(self):
+        self.assertIs(self.schema.rule(("enabled",)).convert("false"), False)
+        self.assertEqual(self.schema.rule(("ratio",)).convert("0.5"), 0.5)
+        self.assertIsNone(self.schema.rule(("ratio",)).convert("null"))
+        self.assertIsNone(self.schema.rule(("items", 0, "kind")).convert("null"))
+        self.assertEqual(self.schema.rule(("items", 0, "kind")).convert("b"), "b")
+        with self.assertRaises(ValueError):
+            self.schema.rule(("items", 0, "id")).convert("one")
+
+    def test_integral_float_is_an_integer(self):
+        self.assertEqual(list(self.schema.validate(1.0, ("items", 0, "id"))), [])
+        self.assertTrue(Schema({"type": "integer"}).is_valid(2.0))
+        self.assertFalse(Schema({"type": "integer"}).is_valid(True))
+        self.assertFalse(Schema(False).is_valid(1))
+
+    def test_validation_task_publishes_batches(self):
+        batches = []
+        data = {"name": "x", "items": [{"id": "?"} for _ in range(5)]}
+        task = ValidationTask(None, data, self.schema, batch_size=2)
+        task.publish = batches.append
+        self.assertEqual(task.work(), 5)
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        self.assertEqual(batches[0][0], (("items", 0, "id"), "Expected integer, got string."))
+
+
+class TestConversion(unittest.TestCase):
+    def test_bool_is_parsed(self):
+        self.assertIs(TypeConverter.convert_to_type("false", bool), False)
+        self.assertIs(TypeConverter.convert_to_type("True", bool), True)
+        with self.assertRaises(ValueError):
+            TypeConverter.convert_to_type("maybe", bool)
+        model = DocumentModel({"enabled": True})
+        with self.assertRaises(ValueError):
+            model.set_value(("enabled",), "maybe")
+        self.assertIs(model.data["enabled"], True)
+
+    def test_placeholder_takes_typed_type(self):
+        none_type = type(None)
+        self.assertEqual(TypeConverter.convert_to_type("12", none_type), 12)
+        self.assertEqual(TypeConverter.convert_to_type("text", none_type), "text")
+        self.assertIsNone(TypeConverter.convert_to_type("None", none_type))
+        self.assertEqual(parse_scalar('"quoted"'), "quoted")
+
+    def test_model_applies_schema(self):
+        model = DocumentModel({"name": "x", "enabled": True, "items": [{"id": None}]})
+        model.schema = Schema(SCHEMA)
+        model.set_value(("enabled",), "no")
+        model.set_value(("items", 0, "id"), "3")
+        self.assertEqual(model.data, {"name": "x", "enabled": False, "items": [{"id": 3}]})
+        with self.assertRaises(ValueError):
+            model.set_value(("name",), "")
+        with self.assertRaises(ValueError):
+            model.set_value(("items", 0, "id"), "three")
+        self.assertEqual(model.data["name"], "x")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import re
+import unittest
+from dictedit2.model import DocumentModel
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.model = DocumentModel({
+            "name": "Example",
+            "items": [{"id": 1, "label": "Item 1"}, {"id": 2, "label": "Other"}],
+            "settings": {"example_flag": True},
+        })
+
+    def test_substring_matches_keys_and_values_in_document_order(self):
+        results = self.model.search("exam")
+        self.assertEqual(results.paths, [("name",), ("settings", "example_flag")])
+        self.assertEqual(self.model.search("Exam", case_sensitive=True).paths, [("name",)])
+        self.assertEqual(self.model.search("exam", keys=False).paths, [("name",)])
+
+    def test_regex_query(self):
+        self.assertEqual(self.model.search(r"^\d$", regex=True).paths, [("items", 0, "id"), ("items", 1, "id")])
+        with self.assertRaises(re.error):
+            self.model.search("(", regex=True)
+
+    def test_index_follows_edits(self):
+        self.model.search("item")
+        self.model.set_value(("items", 1, "label"), "Item 2")
+        self.model.rename_key(("name",), "item_name")
+        self.model.remove(("items", 0))
+        self.assertEqual(self.model.search("item").paths, [("items",), ("items", 0, "label"), ("item_name",)])
+
+        self.model.undo()
+        self.assertEqual(self.model.search("item 1").paths, [("items", 0, "label")])
+
+    def test_narrowing_query_sees_edits(self):
+        self.assertEqual(len(self.model.search("e")), 6)
+        self.model.set_value(("items", 1, "label"), "Eel")
+        self.assertEqual(self.model.search("ee").paths, [("items", 1, "label")])
+
+    def test_filter_shows_matches_and_ancestors(self):
+        self.model.set_filter(self.model.search("Other"))
+        rows = [node.path for node in _flatten(self.model.render_tree())]
+        self.assertEqual(rows, [(), ("items",), ("items", 1), ("items", 1, "label")])
+
+        self.model.set_value(("name",), "Other name")
+        self.assertTrue(self.model.refresh_filter())
+        self.assertIn(("name",), self.model.filter.matches)
+        self.assertFalse(self.model.refresh_filter())
+
+    def test_load_rebuilds_index(self):
+        self.model.search("x")
+        self.model.load({"fresh": "value"})
+        self.assertEqual(self.model.search("val").paths, [("fresh",)])
+        self.assertIsNone(self.model.filter)
+
+
+def _flatten(root):
+    from dictedit2.render_tree import flatten
+    return flatten(root)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from dictedit2.json_io import ImportTask
+from dictedit2.snapshot_cache import SnapshotCache
+
+DATA = {"items": [{"id": 1, "tags": ["a"]}, {"id": 2, "tags": []}], "name": "café", "ratio": 0.5, "none": None}
+
+
+class TestSnapshotCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = SnapshotCache(os.path.join(self.directory.name, "cache"))
+        self.file_path = self.write("data.json", DATA)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, data):
+        file_path = os.path.join(self.directory.name, name)
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        return file_path
+
+    def test_second_import_skips_parsing(self):
+        data, index = ImportTask(None, self.file_path, self.cache).work()
+        with mock.patch("dictedit2.json_io.decode_document") as decode:
+            task = ImportTask(None, self.file_path, self.cache)
+            cached, cached_index = task.work()
+        decode.assert_not_called()
+        self.assertEqual(cached, DATA)
+        self.assertEqual(task.expanded, {})
+        # Rebuilt with the same node IDs
+        self.assertEqual(cached_index.id_at(("items", 1, "tags")), index.id_at(("items", 1, "tags")))
+
+    def test_changed_file_is_parsed_again(self):
+        ImportTask(None, self.file_path, self.cache).work()
+        self.write("data.json", {"changed": True})
+        self.assertIsNone(self.cache.load(self.file_path))
+        data, _ = ImportTask(None, self.file_path, self.cache).work()
+        self.assertEqual(data, {"changed": True})
+
+    def test_touched_file_is_matched_by_content(self):
+        ImportTask(None, self.file_path, self.cache).work()
+        stat = os.stat(self.file_path)
+        os.utime(self.file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertEqual(self.cache.load(self.file_path)[0], DATA)
+
+    def test_view_is_restored(self):
+        _, index = ImportTask(None, self.file_path, self.cache).work()
+        node_id = index.id_at(("items", 0))
+        self.assertTrue(self.cache.save_view(self.file_path, {node_id: True, len(index) + 5: True}))
+        _, _, expanded = self.cache.load(self.file_path)
+        self.assertEqual(expanded, {node_id: True})
+
+    def test_least_recently_used_entries_are_evicted(self):
+        paths = [self.write(f"{name}.json", {"name": name * 1000}) for name in "abc"]
+        for time, file_path in enumerate(paths):
+            ImportTask(None, file_path, self.cache).work()
+            os.utime(self.cache.entry_path(file_path), ns=(time * 10 ** 9, time * 10 ** 9))
+        self.cache.load(paths[0])
+        self.cache.max_bytes = self.cache.size() - 1
+        self.cache.evict()
+        self.assertIsNone(self.cache.load(paths[1]))
+        self.assertIsNotNone(self.cache.load(paths[0]))
+        self.assertIsNotNone(self.cache.load(paths[2]))
+
+    def test_corrupt_snapshot_is_ignored(self):
+        ImportTask(None, self.file_path, self.cache).work()
+        with open(self.cache.entry_path(self.file_path), "wb") as f:
+            f.write(b"\x00garbage")
+        self.assertIsNone(self.cache.load(self.file_path))
+        data, _ = ImportTask(None, self.file_path, self.cache).work()
+        self.assertEqual(data, DATA)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import json
+import subprocess
+import sys
+import unittest
+from unittest import mock
+from dictedit2.main import parse_args
+
+# Modules that only specific features need; embedding the editor must not load them
+DEFERRED = ["tempfile", "hashlib", "cProfile", "difflib", "decimal",
+            "dictedit2.main", "dictedit2.diff", "dictedit2.file_watcher", "dictedit2.snapshot_cache",
+            "dictedit2.renderers.virtual_view", "dictedit2.renderers.dict_renderer",
+            "dictedit2.renderers.list_renderer", "dictedit2.renderers.value_renderer"]
+
+# Upper bound for importing the editor on top of tkinter, in seconds; generous for slow CI machines
+IMPORT_BUDGET = 0.5
+
+PROBE = """
+import json, logging, sys, time, tkinter
+import dictedit2
+lazy = "DataEditor" not in vars(dictedit2)
+start = time.perf_counter()
+from dictedit2 import DataEditor
+elapsed = time.perf_counter() - start
+print(json.dumps({"lazy": lazy, "elapsed": elapsed, "modules": sorted(sys.modules)}))
+"""
+
+
+class TestStartup(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # A fresh interpreter, so modules imported by other tests do not count
+        output = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, check=True).stdout
+        cls.probe = json.loads(output)
+
+    def test_package_import_defers_the_editor(self):
+        self.assertTrue(self.probe["lazy"])
+
+    def test_editor_import_skips_optional_modules(self):
+        loaded = set(self.probe["modules"])
+        self.assertEqual([name for name in DEFERRED if name in loaded], [])
+
+    def test_editor_import_within_budget(self):
+        self.assertLess(self.probe["elapsed"], IMPORT_BUDGET)
+
+
+class TestCommandLine(unittest.TestCase):
+    def test_defaults(self):
+        args = parse_args([])
+        self.assertIsNone(args.file)
+        self.assertEqual(args.size, (800, 600))
+        self.assertEqual(args.log_level, "WARNING")
+        self.assertFalse(args.virtual)
+        self.assertFalse(args.autosave)
+
+    def test_file_size_and_log_level(self):
+        args = parse_args(["data.json", "--size", "1024x768", "--log-level", "debug", "--virtual"])
+        self.assertEqual(args.file, "data.json")
+        self.assertEqual(args.size, (1024, 768))
+        self.assertEqual(args.log_level, "DEBUG")
+        self.assertTrue(args.virtual)
+
+    def test_invalid_size_is_rejected(self):
+        with self.assertRaises(SystemExit), mock.patch("sys.stderr"):
+            parse_args(["--size", "large"])
+
+
+if __name__ == "__main__":
+    unittest.main()